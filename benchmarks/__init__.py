@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Benchmarks drive the scripts the same way the tests do: by bare module name.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'github_repo_analyzer')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
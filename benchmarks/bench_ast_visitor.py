@@ -0,0 +1,79 @@
+"""
+Micro-benchmark of symbol extraction: the previous two ast.walk passes (and the
+double parse of urls.py files) against the single-pass collector.
+
+    python -m benchmarks.bench_ast_visitor --files 2000
+"""
+import argparse
+import ast
+import time
+
+import ast_visitor
+
+
+def make_module(index: int) -> str:
+    methods = "".join(
+        f"    def method_{m}(self, value):\n"
+        f"        if value:\n"
+        f"            return [item * {m} for item in range(value) if item % 2]\n"
+        f"        return {{'key': value, 'other': (value, {m})}}\n\n"
+        for m in range(8)
+    )
+    return (
+        f"class Model{index}(models.Model):\n{methods}\n"
+        f"class View{index}(APIView):\n{methods}\n"
+        f"def helper_{index}(request):\n"
+        f"    def inner():\n"
+        f"        return request.GET.get('q', '').strip().lower()\n"
+        f"    return inner()\n\n"
+        "urlpatterns = [\n" + "".join(f"    path('items/{index}/{n}/', views.view_{n}),\n" for n in range(10)) + "]\n"
+    )
+
+
+def previous_extraction(content: str):
+    # repo_reader: one parse, two full walks
+    tree = ast.parse(content)
+    classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
+    functions = [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+    # main.py on urls.py: parse_python_file and extract_endpoints each parse again
+    ast.parse(content)
+    endpoints_tree = ast.parse(content)
+    endpoints = []
+    for n in endpoints_tree.body:
+        if isinstance(n, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'urlpatterns' for t in n.targets):
+            for element in n.value.elts:
+                if isinstance(element, ast.Call):
+                    endpoints.extend(arg.value for arg in element.args if isinstance(arg, ast.Constant))
+    return classes, functions, endpoints
+
+
+def single_pass_extraction(content: str):
+    symbols = ast_visitor.analyze_source(content)
+    return ([c['name'] for c in symbols['classes']],
+            [f['name'] for f in symbols['functions'] if not f['is_async']],
+            symbols['url_patterns'])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = [make_module(index) for index in range(args.files)]
+    print(f"{args.files} modules, {sum(len(source) for source in corpus) / 1e6:.1f} MB")
+
+    results = {}
+    for label, extract in (('previous', previous_extraction), ('single pass', single_pass_extraction)):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results[label] = [extract(source) for source in corpus]
+            best = min(best, time.perf_counter() - start)
+        print(f"{label:<12} {best:>8.3f}s")
+
+    print("outputs match" if results['previous'] == results['single pass'] else "OUTPUTS DIFFER")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares the sequential directory crawl and file downloads in repo_reader.py
+with the concurrent asyncio engine against a local stand-in server.
+
+    python -m benchmarks.bench_async_crawler --latency 0.02 --concurrency 16
+"""
+import argparse
+import time
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files
+
+import async_crawler
+import repo_reader
+
+
+def timed(server: MockGitHubServer, label: str, call):
+    server.reset_counters()
+    start = time.perf_counter()
+    result = call()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {server.request_count:>6} requests {elapsed:>9.3f}s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--dirs', type=int, default=4)
+    parser.add_argument('--files', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument('--concurrency', type=int, default=async_crawler.DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    files = generate_files(args.depth, args.dirs, args.files)
+    with MockGitHubServer(files, latency=args.latency) as server:
+        repo_reader.github_api_url = server.contents_url
+        async_crawler.github_api_url = server.contents_url
+        owner, repo = server.owner, server.repo
+        paths = sorted(files)
+
+        tree = timed(server, 'tree (sequential)',
+                     lambda: repo_reader.fetch_directory_structure_from_github(owner, repo))
+        tree_async = timed(server, 'tree (concurrent)',
+                           lambda: repo_reader.fetch_directory_structure_concurrently(owner, repo, concurrency=args.concurrency))
+        report = timed(server, 'report (sequential)',
+                       lambda: repo_reader.generate_detailed_report(owner, repo, paths, None))
+        report_async = timed(server, 'report (concurrent)',
+                             lambda: repo_reader.generate_detailed_report(owner, repo, paths, None, args.concurrency))
+
+    print("outputs match" if (tree, report) == (tree_async, report_async) else "OUTPUTS DIFFER")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Measures how long the command-line entry points take to start and what they import.
+
+    python -m benchmarks.bench_cli_startup --repeat 10
+
+Each command runs in a fresh interpreter with -X importtime. The wall time is the
+median over --repeat runs; the import time is the sum of the top-level imports
+reported by the interpreter, excluding its own startup (site and encodings).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks import ROOT
+from benchmarks.synthetic_repo import generate_files, write_files
+
+PACKAGE = os.path.join(ROOT, 'github_repo_analyzer')
+
+# Modules whose presence shows that a command paid for something it may not need
+HEAVY_MODULES = ['requests', 'sqlite3', 'ast', 'concurrent.futures', 'repository_db']
+
+# Interpreter startup imports, paid by every command alike
+STARTUP_MODULES = {'site', 'encodings', 'encodings.utf_8', 'zipimport', 'codecs', 'io', 'abc', 'time', 'locale',
+                   '_frozen_importlib_external', '_signal'}
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Returns the total microseconds spent importing and the cumulative time per top-level module.
+    """
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  '):
+            continue
+        name = name.strip()
+        if name not in STARTUP_MODULES:
+            top_level[name] = top_level.get(name, 0) + int(cumulative)
+    return sum(top_level.values()), top_level
+
+
+def run_command(args: List[str], repeat: int) -> Dict:
+    timings, imports, modules = [], 0, {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', *args], cwd=PACKAGE, capture_output=True,
+                                text=True, env=dict(os.environ, GITHUB_TOKEN=''))
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed: {result.stderr[-500:]}")
+        imports, modules = parse_importtime(result.stderr)
+    imported = {name for line in result.stderr.splitlines() for name in [line.rsplit('|', 1)[-1].strip()]}
+    return {'seconds': statistics.median(timings), 'import_us': imports, 'modules': modules,
+            'heavy': [name for name in HEAVY_MODULES if name in imported]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=3, help="show the slowest top-level imports of each command")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_cli_') as tmp:
+        repo = write_files(generate_files(depth=2, dirs_per_level=2, files_per_dir=6, layout='django'),
+                           os.path.join(tmp, 'repo'))
+        db_file = os.path.join(tmp, 'cli.db')
+        commands = [
+            ('python -c pass', ['-c', 'pass']),
+            ('cli.py --help', ['cli.py', '--help']),
+            ('cli.py tree (local)', ['cli.py', 'tree', repo]),
+            ('cli.py analyze (local)', ['cli.py', 'analyze', repo]),
+            ('cli.py store (local)', ['cli.py', 'store', repo, '--db', db_file]),
+            ('import main', ['-c', 'import main']),
+            ('import repo_directory_structure', ['-c', 'import repo_directory_structure']),
+            ('import http_client', ['-c', 'import http_client']),
+        ]
+        print(f"{'command':<34} {'wall':>9} {'imports':>9}  heavy modules loaded")
+        for label, command in commands:
+            stats = run_command(command, args.repeat)
+            print(f"{label:<34} {stats['seconds'] * 1000:>7.1f}ms {stats['import_us'] / 1000:>7.1f}ms  "
+                  f"{', '.join(stats['heavy']) or '-'}")
+            slowest = sorted(stats['modules'].items(), key=lambda item: -item[1])[:args.top]
+            if slowest and label != 'python -c pass':
+                print(' ' * 36 + ', '.join(f"{name} {us / 1000:.1f}ms" for name, us in slowest))
+
+
+if __name__ == '__main__':
+    main()
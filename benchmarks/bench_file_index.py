@@ -0,0 +1,56 @@
+"""
+Times the three separate os.walk passes the analyzers used to make against one
+shared scan_files pass, on a generated repository with a node_modules tree.
+
+    python -m benchmarks.bench_file_index --depth 4 --vendored 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import file_index
+
+
+def timed(label: str, call, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best:>9.3f}s")
+    return result
+
+
+def walk_three_times(root: str) -> int:
+    count = 0
+    for _ in range(3):
+        for _, _, files in os.walk(root):
+            count += len(files)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--dirs', type=int, default=6)
+    parser.add_argument('--files', type=int, default=12)
+    parser.add_argument('--vendored', type=int, default=5000, help='files placed under node_modules/')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    files = generate_files(args.depth, args.dirs, args.files, layout='django')
+    files.update({f"node_modules/pkg_{i % 50}/file_{i}.js": '' for i in range(args.vendored)})
+    with tempfile.TemporaryDirectory(prefix='bench_repo_') as root:
+        write_files(files, root)
+        print(f"{len(files)} files on disk")
+
+        timed('os.walk x3 (old)', lambda: walk_three_times(root), args.repeat)
+        index = timed('scan_files x1', lambda: file_index.scan_files(root), args.repeat)
+        print(f"  {len(index)} files indexed, {len(files) - len(index)} pruned")
+
+
+if __name__ == '__main__':
+    main()
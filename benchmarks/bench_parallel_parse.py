@@ -0,0 +1,48 @@
+"""
+Times serial and multiprocess parsing of a generated Django-style repository
+(about 10k Python files by default) with categorize_items and parse_files.
+
+    python -m benchmarks.bench_parallel_parse --workers 4
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import main as categorizer
+import parallel
+import repo_analyzer
+
+
+def timed(label: str, call):
+    start = time.perf_counter()
+    result = call()
+    print(f"{label:<28} {time.perf_counter() - start:>9.3f}s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--dirs', type=int, default=8)
+    parser.add_argument('--files', type=int, default=17)
+    parser.add_argument('--workers', type=int, default=parallel.default_workers())
+    args = parser.parse_args()
+
+    files = generate_files(args.depth, args.dirs, args.files, layout='django')
+    with tempfile.TemporaryDirectory(prefix='bench_repo_') as root:
+        write_files(files, root)
+        print(f"{len(files)} files, {args.workers} workers")
+
+        serial = timed('categorize_items (serial)', lambda: categorizer.categorize_items(root))
+        pooled = timed('categorize_items (parallel)', lambda: categorizer.categorize_items(root, workers=args.workers))
+        print("  outputs match" if serial == pooled else "  OUTPUTS DIFFER")
+
+        serial = timed('parse_files (serial)', lambda: repo_analyzer.parse_files(root))
+        pooled = timed('parse_files (parallel)', lambda: repo_analyzer.parse_files(root, workers=args.workers))
+        print("  outputs match" if serial == pooled else "  OUTPUTS DIFFER")
+
+
+if __name__ == '__main__':
+    main()
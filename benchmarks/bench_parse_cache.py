@@ -0,0 +1,52 @@
+"""
+Times categorize_items without a parse cache, with a cold cache, and with a warm
+cache on a second copy of the same repository (as for a fork or vendored code).
+
+    python -m benchmarks.bench_parse_cache --depth 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import main as categorizer
+import parse_cache
+
+
+def timed(label: str, call):
+    start = time.perf_counter()
+    result = call()
+    print(f"{label:<28} {time.perf_counter() - start:>9.3f}s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--dirs', type=int, default=6)
+    parser.add_argument('--files', type=int, default=12)
+    args = parser.parse_args()
+
+    files = generate_files(args.depth, args.dirs, args.files, layout='django')
+    # Make every module distinct and give it a realistic amount of code
+    files = {path: f"# {path}\n" + content * 20 if path.endswith('.py') else content for path, content in files.items()}
+    with tempfile.TemporaryDirectory(prefix='bench_repo_') as root:
+        first = write_files(files, os.path.join(root, 'first'))
+        second = write_files(files, os.path.join(root, 'second'))
+        print(f"{len(files)} files per copy")
+
+        expected = timed('no cache', lambda: categorizer.categorize_items(first))
+        cache = parse_cache.ParseCache(os.path.join(root, 'cache'))
+        parse_cache.configure(cache)
+        timed('cold cache', lambda: categorizer.categorize_items(first))
+        warm = timed('warm cache (second copy)', lambda: categorizer.categorize_items(second))
+        print("  outputs match" if warm == expected else "  OUTPUTS DIFFER")
+        print(f"  {cache.report()}")
+        parse_cache.configure(None)
+        cache.close()
+
+
+if __name__ == '__main__':
+    main()
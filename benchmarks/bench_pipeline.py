@@ -0,0 +1,87 @@
+"""
+Times staged runs against pipelined ones: the GitHub report over a slow mock API, and analysis of a git clone.
+
+    python -m benchmarks.bench_pipeline --depth 3 --latency 0.02 --workers 8
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import main as categorizer
+import pipeline
+import repo_directory_structure
+import repo_reader
+from repo_clone import clone_for_streaming
+
+
+def timed(label: str, call):
+    start = time.perf_counter()
+    result = call()
+    print(f"{label:<28} {time.perf_counter() - start:>9.3f}s")
+    return result
+
+
+def bench_report(files, latency: float, workers: int, root: str) -> None:
+    with MockGitHubServer(files, latency=latency) as server:
+        repo_reader.github_api_url = repo_directory_structure.github_api_url = server.contents_url
+        url = f"https://github.com/{server.owner}/{server.repo}"
+        staged = timed('report staged', lambda: repo_reader.write_report(url, output_file=os.path.join(root, 'a.txt')))
+        pipelined = timed('report pipelined', lambda: repo_reader.write_report(
+            url, output_file=os.path.join(root, 'b.txt'), concurrency=workers, pipelined=True))
+    with open(staged, 'rb') as want, open(pipelined, 'rb') as got:
+        print(f"{'identical':<28} {want.read() == got.read()!s:>10}")
+
+
+def bench_clone(files, workers: int, root: str) -> None:
+    origin = write_files(files, os.path.join(root, 'origin'))
+    for command in (['init', '-q'], ['add', '-A'], ['-c', 'user.name=b', '-c', 'user.email=b@b', 'commit', '-qm', 'x'],
+                    ['config', 'uploadpack.allowFilter', 'true']):
+        subprocess.run(['git', '-C', origin, *command], check=True)
+    url = f"file://{origin}"
+
+    def staged():
+        target = os.path.join(root, 'staged.git')
+        subprocess.run(['git', 'clone', '--quiet', '--bare', url, target], check=True)
+        result = categorizer.categorize_local_repository(target)
+        shutil.rmtree(target)
+        return result
+
+    def pipelined():
+        target = os.path.join(root, 'streamed.git')
+        clone_for_streaming(url, target)
+        stats = {}
+        table = pipeline.stream_symbols(target, categorizer.categorize_source, categorizer.empty_categories(),
+                                        fetch_workers=workers, stats=stats)
+        shutil.rmtree(target)
+        print(f"{'max batches in flight':<28} {stats['max_in_flight']:>10}")
+        return table.to_dict()
+
+    expected = timed('clone+analyze staged', staged)
+    result = timed('clone+analyze pipelined', pipelined)
+    print(f"{'identical':<28} {expected == result!s:>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--dirs', type=int, default=3)
+    parser.add_argument('--files', type=int, default=6)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to each mock API response")
+    parser.add_argument('--workers', type=int, default=pipeline.DEFAULT_FETCH_WORKERS)
+    args = parser.parse_args()
+
+    files = generate_files(args.depth, args.dirs, args.files, layout='django')
+    print(f"{len(files)} files")
+    with tempfile.TemporaryDirectory(prefix='bench_pipeline_') as root:
+        bench_report(files, args.latency, args.workers, root)
+        bench_clone(files, args.workers, root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Loads a million symbols into the SQLite store and times ingest and lookups.
+
+    python -m benchmarks.bench_repository_db --symbols 1000000 --repos 200
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import repository_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=1_000_000)
+    parser.add_argument('--repos', type=int, default=200)
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+
+    per_repo = args.symbols // args.repos
+    with tempfile.TemporaryDirectory(prefix='bench_db_') as tmp:
+        repository_db.DB_FILE = os.path.join(tmp, 'analysis.db')
+
+        start = time.perf_counter()
+        for repo in range(args.repos):
+            third = per_repo // 3
+            repository_db.store_analysis_run(f"https://github.com/bench/repo{repo}", {
+                'classes': [f"Class{repo}_{n}" for n in range(third)],
+                'functions': [f"function{repo}_{n}" for n in range(third)],
+                'endpoints': [f"/api/{repo}/{n}/" for n in range(per_repo - 2 * third)],
+            }, commit_sha=f"{repo:040x}")
+        ingest = time.perf_counter() - start
+        total = per_repo * args.repos
+        print(f"ingest   {total:>9} symbols {ingest:>8.2f}s {total / ingest:>12,.0f} symbols/s")
+
+        names = [f"Class{random.randrange(args.repos)}_{random.randrange(per_repo // 3)}" for _ in range(args.lookups)]
+        start = time.perf_counter()
+        for name in names:
+            assert repository_db.find_symbols(name, kind='class')
+        lookup = time.perf_counter() - start
+        print(f"lookup   {args.lookups:>9} names   {lookup:>8.2f}s {lookup / args.lookups * 1e6:>10,.0f} us/lookup")
+
+        start = time.perf_counter()
+        rows = repository_db.query_analysis_results("https://github.com/bench/repo0")
+        print(f"query    {len(rows):>9} rows    {time.perf_counter() - start:>8.2f}s")
+        repository_db.close_connections()
+
+
+if __name__ == '__main__':
+    main()
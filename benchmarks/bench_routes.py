@@ -0,0 +1,67 @@
+"""
+Times building the route table of a generated Django project, then updating one URL module and resolving again.
+
+    python -m benchmarks.bench_routes --apps 500
+"""
+import argparse
+import time
+from typing import Dict
+
+import routes
+
+
+def project_files(apps: int) -> Dict[str, str]:
+    files = {'project/settings.py': "ROOT_URLCONF = 'project.urls'\n"}
+    includes = ''.join(f"    path('app{n}/', include('app{n}.urls')),\n" for n in range(apps))
+    files['project/urls.py'] = (f"from django.urls import include, path\nfrom project.routers import router\n\n"
+                                f"urlpatterns = [\n{includes}    path('api/', include(router.urls)),\n]\n")
+    files['project/routers.py'] = "router = DefaultRouter()\n" + ''.join(
+        f"router.register(r'items{n}', ItemViewSet{n})\n" for n in range(apps))
+    for n in range(apps):
+        files[f"app{n}/urls.py"] = (f"from django.urls import path\nfrom . import views\n\n"
+                                    f"urlpatterns = [\n"
+                                    f"    path('', views.index, name='index'),\n"
+                                    f"    path('<int:pk>/', views.Detail.as_view(), name='detail'),\n"
+                                    f"    path('more/', include('app{n}.extra_urls')),\n"
+                                    f"]\n")
+        files[f"app{n}/extra_urls.py"] = "urlpatterns = [re_path(r'^export/(?P<fmt>\\w+)/$', views.export)]\n"
+        files[f"app{n}/views.py"] = "def index(request):\n    pass\n\n\nclass Detail(View):\n    pass\n"
+        files[f"app{n}/models.py"] = f"class Item{n}(models.Model):\n    name = models.CharField(max_length=10)\n"
+    return files
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--apps', type=int, default=500, help="Django apps in the generated project")
+    parser.add_argument('--repeat', type=int, default=5, help="single-file updates to time")
+    args = parser.parse_args()
+
+    files = project_files(args.apps)
+    table = routes.RouteTable()
+
+    def build() -> None:
+        for path, content in files.items():
+            table.update(path, content)
+        table.routes()
+
+    elapsed = timed(build)
+    print(f"{'cold build':<16} {len(files):>7} files {len(table):>7} routes {elapsed:>8.3f}s")
+
+    updates = []
+    for n in range(args.repeat):
+        content = files['app0/urls.py'].replace("'more/'", f"'more{n}/'")
+        updates.append(timed(lambda: (table.update('app0/urls.py', content), table.routes())))
+    print(f"{'one-file update':<16} {1:>7} file  {len(table):>7} routes {min(updates):>8.3f}s (best of {args.repeat})")
+
+    table.set_facts('app0/views.py', table.files['app0/views.py'])
+    print(f"{'resolve only':<16} {0:>7} files {len(table):>7} routes {timed(table.routes):>8.3f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Stores two runs per repository and times diffing them in SQLite, against fetching both runs and diffing in Python.
+
+    python -m benchmarks.bench_run_diff --repos 300 --symbols 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+import repository_db
+from symbol_table import SymbolTable
+
+CATEGORIES = ['classes', 'functions', 'endpoints']
+
+
+def run_table(repo: int, symbols: int, changed: int, seed: int) -> SymbolTable:
+    # The second run of a repository moves, renames and drops `changed` of its symbols
+    rng = random.Random(repo * 2 + seed)
+    table = SymbolTable(CATEGORIES)
+    touched = set(rng.sample(range(symbols), changed)) if seed else set()
+    for n in range(symbols):
+        category = CATEGORIES[n % 3]
+        kind = repository_db.KIND_BY_CATEGORY[category]
+        path = f"app{n // 50}/module{n % 7}.py"
+        name = f"{kind}_{n}"
+        if n in touched:
+            if n % 3 == 0:
+                path = f"moved/{path}"
+            elif n % 3 == 1:
+                name += '_renamed'
+            else:
+                continue
+        table.add_file(path, category, [(kind, name, name, n)])
+    return table
+
+
+def python_diff(old_run: int, new_run: int) -> int:
+    # What a caller had to do before diff_runs: fetch both runs and compare them in Python
+    conn = repository_db.get_connection()
+    query = "SELECT category, kind, qualname, name FROM symbols WHERE run_id=?"
+    old, new = Counter(conn.execute(query, (old_run,))), Counter(conn.execute(query, (new_run,)))
+    return sum(((old - new) + (new - old)).values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repos', type=int, default=300)
+    parser.add_argument('--symbols', type=int, default=2000, help="symbols per run")
+    parser.add_argument('--changed', type=int, default=30, help="symbols changed between the two runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_diff_') as tmp:
+        repository_db.DB_FILE = os.path.join(tmp, 'analysis.db')
+        runs = []
+        start = time.perf_counter()
+        for repo in range(args.repos):
+            url = f"https://github.com/bench/repo{repo}"
+            old = repository_db.store_analysis_run(url, run_table(repo, args.symbols, args.changed, 0), '0' * 40)
+            new = repository_db.store_analysis_run(url, run_table(repo, args.symbols, args.changed, 1), '1' * 40)
+            runs.append((old, new))
+        ingest = time.perf_counter() - start
+        print(f"ingest        {2 * args.repos:>6} runs {2 * args.repos * args.symbols:>10} symbols {ingest:>8.2f}s")
+
+        for label, diff in (('diff_runs', lambda old, new: repository_db.diff_runs(old, new)),
+                            ('python diff', python_diff)):
+            start = time.perf_counter()
+            for old, new in runs:
+                diff(old, new)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<13} {args.repos:>6} diffs {elapsed:>8.2f}s {elapsed / args.repos * 1000:>8.2f}ms/diff")
+        repository_db.close_connections()
+
+
+if __name__ == '__main__':
+    main()
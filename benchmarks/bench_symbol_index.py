@@ -0,0 +1,87 @@
+"""
+Builds a symbol index over thousands of synthetic repositories and times exact and prefix lookups.
+
+    python -m benchmarks.bench_symbol_index --repos 5000 --symbols 300 --compare-db
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import repository_db
+from symbol_index import SymbolIndex, SymbolIndexBuilder
+
+# Names many repositories share, as real Django projects do
+COMMON_CLASSES = ['Meta', 'Migration', 'Config', 'UserSerializer', 'Product', 'Order', 'BaseModel', 'Command']
+
+
+def synthetic_result(repo: int, symbols: int, rng: random.Random) -> dict:
+    third = symbols // 3
+    return {
+        'classes': [rng.choice(COMMON_CLASSES) if n % 10 == 0 else f"Class{repo}_{n}" for n in range(third)],
+        'functions': [f"function_{rng.randrange(symbols * 50)}" for _ in range(third)],
+        'endpoints': [f"api/v{rng.randint(1, 3)}/resource{rng.randrange(5000)}/" for _ in range(symbols - 2 * third)],
+    }
+
+
+def latencies(call, arguments) -> str:
+    timings = []
+    for argument in arguments:
+        start = time.perf_counter()
+        call(argument)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return f"p50 {statistics.median(timings) * 1e6:>8.1f}us  p99 {p99 * 1e6:>8.1f}us"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repos', type=int, default=2000)
+    parser.add_argument('--symbols', type=int, default=300, help="symbols per repository")
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--compare-db', action='store_true', help="also time repository_db.find_symbols")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    results = [(f"https://github.com/bench/repo{repo}", synthetic_result(repo, args.symbols, rng))
+               for repo in range(args.repos)]
+    total = args.repos * args.symbols
+
+    with tempfile.TemporaryDirectory(prefix='bench_index_') as tmp:
+        path = os.path.join(tmp, 'symbols.idx')
+        start = time.perf_counter()
+        builder = SymbolIndexBuilder()
+        for repo_url, result in results:
+            builder.add(repo_url, result)
+        builder.write(path)
+        print(f"build    {total:>9} symbols {time.perf_counter() - start:>8.2f}s "
+              f"{os.path.getsize(path) / 2**20:>8.1f} MiB on disk")
+
+        start = time.perf_counter()
+        index = SymbolIndex(path)
+        print(f"open     {len(index):>9} names   {(time.perf_counter() - start) * 1e3:>8.2f}ms")
+
+        classes = [f"Class{rng.randrange(args.repos)}_{rng.randrange(args.symbols // 3)}" for _ in range(args.lookups)]
+        classes = [name for name in classes if not name.endswith('_0')]
+        print(f"exact    {len(classes):>9} names   {latencies(index.lookup, classes)}")
+        print(f"common   {len(COMMON_CLASSES):>9} names   "
+              f"{latencies(lambda name: index.repositories_defining(name, kind='class'), COMMON_CLASSES)}")
+        prefixes = [f"api/v{rng.randint(1, 3)}/resource{rng.randrange(50)}" for _ in range(args.lookups // 10)]
+        print(f"prefix   {len(prefixes):>9} queries "
+              f"{latencies(lambda prefix: list(index.search_prefix(prefix, kind='endpoint')), prefixes)}")
+        index.close()
+
+        if args.compare_db:
+            db_file = os.path.join(tmp, 'analysis.db')
+            for repo_url, result in results:
+                repository_db.store_analysis_run(repo_url, result, db_file=db_file)
+            print(f"db exact {len(classes):>9} names   "
+                  f"{latencies(lambda name: repository_db.find_symbols(name, db_file=db_file), classes)}")
+            repository_db.close_connections()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures the memory held by a SymbolTable against plain per-symbol dicts and slotted objects.
+
+    python -m benchmarks.bench_symbol_table --files 20000 --symbols 50
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from symbol_table import SymbolTable
+
+CATEGORIES = ['Models', 'Views', 'Serializers', 'Forms', 'Endpoints', 'Tests', 'Others']
+KINDS = ['class', 'function', 'endpoint']
+
+
+class SlottedSymbol:
+    __slots__ = ('path', 'line', 'kind', 'name', 'qualname', 'category')
+
+    def __init__(self, path, line, kind, name, qualname, category):
+        self.path, self.line, self.kind = path, line, kind
+        self.name, self.qualname, self.category = name, qualname, category
+
+
+def synthetic_symbols(files: int, symbols: int):
+    # Names are built fresh per file, as they would be when decoded from source
+    for file in range(files):
+        path = f"app{file % 200}/module{file}.py"
+        category = CATEGORIES[file % len(CATEGORIES)]
+        yield path, category, [(KINDS[n % 3], f"name_{n}", f"Class{n // 10}.name_{n}", n * 3 + 1)
+                               for n in range(symbols)]
+
+
+def build_table(files, symbols):
+    table = SymbolTable(CATEGORIES)
+    for path, category, entries in synthetic_symbols(files, symbols):
+        table.add_file(path, category, entries)
+    return table
+
+
+def build_dicts(files, symbols):
+    return [{'path': path, 'line': line, 'kind': kind, 'name': name, 'qualname': qualname, 'category': category}
+            for path, category, entries in synthetic_symbols(files, symbols)
+            for kind, name, qualname, line in entries]
+
+
+def build_objects(files, symbols):
+    return [SlottedSymbol(path, line, kind, name, qualname, category)
+            for path, category, entries in synthetic_symbols(files, symbols)
+            for kind, name, qualname, line in entries]
+
+
+def measure(build, files, symbols):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(files, symbols)
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return retained, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--symbols', type=int, default=50, help="symbols per file")
+    args = parser.parse_args()
+
+    total = args.files * args.symbols
+    for label, build in (('dicts', build_dicts), ('slots', build_objects), ('table', build_table)):
+        retained, elapsed = measure(build, args.files, args.symbols)
+        print(f"{label:<6} {total:>9} symbols {retained / 2**20:>8.1f} MiB "
+              f"{retained / total:>7.1f} B/symbol {elapsed:>7.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Compares the per-directory Contents API crawl with the single recursive Git
+Trees API call against a local stand-in server.
+
+    python -m benchmarks.bench_tree_fetch --depth 4 --latency 0.01
+"""
+import argparse
+import time
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files
+
+import git_trees
+import repo_directory_structure
+
+
+def run(server: MockGitHubServer, label: str, fetch) -> list:
+    server.reset_counters()
+    start = time.perf_counter()
+    structure = fetch(server.owner, server.repo)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {server.request_count:>8} requests {elapsed:>10.3f}s {len(structure):>8} lines")
+    return structure
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--dirs', type=int, default=4)
+    parser.add_argument('--files', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.005, help="seconds added to every response")
+    parser.add_argument('--tree-limit', type=int, default=None, help="truncate recursive tree responses")
+    args = parser.parse_args()
+
+    files = generate_files(args.depth, args.dirs, args.files)
+    with MockGitHubServer(files, latency=args.latency, tree_limit=args.tree_limit) as server:
+        repo_directory_structure.github_api_url = server.contents_url
+        git_trees.github_trees_url = server.trees_url
+
+        contents = run(server, 'contents', repo_directory_structure.fetch_directory_structure_from_github)
+        tree = run(server, 'tree', repo_directory_structure.fetch_directory_structure_from_tree)
+
+    print("outputs match" if contents == tree else "OUTPUTS DIFFER")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+def _sha(value: str) -> str:
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+class MockGitHubServer:
+    """
+    Local stand-in for the parts of the GitHub API the analyzers use.
+
+    Serves the Contents endpoint, the Git Trees endpoint and raw file downloads
+    from an in-memory ``{path: content}`` mapping, counts every request it
+    handles and can add artificial latency to each response.
+    """
+
+    def __init__(self, files: Dict[str, str], owner: str = 'octo', repo: str = 'demo',
+                 latency: float = 0.0, tree_limit: Optional[int] = None):
+        self.files = dict(files)
+        self.owner = owner
+        self.repo = repo
+        self.latency = latency
+        self.tree_limit = tree_limit
+        self.request_count = 0
+        self.request_log: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.not_modified_count = 0
+        self._queued: List[tuple] = []
+        self._lock = threading.Lock()
+        self._dirs = self._collect_dirs()
+        self._tree_shas = {_sha(path): path for path in self._dirs}
+        self._httpd = None
+        self._thread = None
+
+    # -- lifecycle -------------------------------------------------------
+
+    def start(self) -> 'MockGitHubServer':
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40ms to each response
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.request_count = 0
+            self.request_log = []
+            self.max_in_flight = 0
+            self.not_modified_count = 0
+
+    def queue_response(self, status: int, headers: Dict[str, str] = None, body=None, count: int = 1) -> None:
+        """
+        Answers the next ``count`` requests with a canned response, e.g. a 429.
+        """
+        with self._lock:
+            self._queued.extend([(status, dict(headers or {}), body)] * count)
+
+    # -- URLs ------------------------------------------------------------
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def contents_url(self) -> str:
+        return self.base_url + "/repos/{owner}/{repo}/contents/{path}"
+
+    @property
+    def trees_url(self) -> str:
+        return self.base_url + "/repos/{owner}/{repo}/git/trees/{sha}"
+
+    # -- repository model ------------------------------------------------
+
+    def _collect_dirs(self) -> Dict[str, List[str]]:
+        dirs = {'': []}
+        for path in sorted(self.files):
+            parts = path.split('/')
+            for depth in range(1, len(parts)):
+                parent = '/'.join(parts[:depth - 1])
+                child = '/'.join(parts[:depth])
+                if child not in dirs:
+                    dirs[child] = []
+                    dirs[parent].append(child)
+            dirs['/'.join(parts[:-1])].append(path)
+        return dirs
+
+    def _item(self, path: str) -> Dict:
+        name = path.rsplit('/', 1)[-1]
+        if path in self._dirs:
+            return {'name': name, 'path': path, 'type': 'dir', 'sha': _sha(path),
+                    'download_url': None}
+        return {'name': name, 'path': path, 'type': 'file', 'sha': _sha(self.files[path]),
+                'size': len(self.files[path].encode('utf-8')),
+                'download_url': f"{self.base_url}/raw/{path}"}
+
+    def _tree_entry(self, path: str, prefix: str) -> Dict:
+        relative = path[len(prefix):].lstrip('/')
+        if path in self._dirs:
+            return {'path': relative, 'mode': '040000', 'type': 'tree', 'sha': _sha(path)}
+        return {'path': relative, 'mode': '100644', 'type': 'blob', 'sha': _sha(self.files[path]),
+                'size': len(self.files[path].encode('utf-8'))}
+
+    def _subtree(self, root: str, recursive: bool) -> List[str]:
+        paths = []
+        for child in self._dirs[root]:
+            paths.append(child)
+            if recursive and child in self._dirs:
+                paths.extend(self._subtree(child, recursive))
+        return paths
+
+    # -- request handling ------------------------------------------------
+
+    def _handle(self, handler: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.request_count += 1
+            self.request_log.append(handler.path)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            queued = self._queued.pop(0) if self._queued else None
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if queued:
+                status, headers, body = queued
+                return self._send_json(handler, status, body or {'message': 'Queued response'}, headers)
+            self._route(handler)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _route(self, handler: BaseHTTPRequestHandler) -> None:
+        url = urlsplit(handler.path)
+        query = parse_qs(url.query)
+        parts = [unquote(part) for part in url.path.split('/')]
+        prefix = ['', 'repos', self.owner, self.repo]
+
+        if parts[:2] == ['', 'raw']:
+            path = '/'.join(parts[2:])
+            if path in self.files:
+                return self._send(handler, 200, self.files[path].encode('utf-8'), 'text/plain')
+        elif parts[:4] == prefix and parts[4:5] == ['contents']:
+            path = '/'.join(part for part in parts[5:] if part)
+            if path in self._dirs:
+                body = [self._item(child) for child in self._dirs[path]]
+                return self._send_json(handler, 200, body)
+            if path in self.files:
+                body = self._item(path)
+                body['encoding'] = 'base64'
+                body['content'] = base64.b64encode(self.files[path].encode('utf-8')).decode('ascii')
+                return self._send_json(handler, 200, body)
+        elif parts[:4] == prefix and parts[4:6] == ['git', 'trees'] and len(parts) == 7:
+            sha = parts[6]
+            root = '' if sha == 'HEAD' else self._tree_shas.get(sha)
+            if root is not None:
+                recursive = query.get('recursive', ['0'])[0] not in ('0', 'false', '')
+                paths = self._subtree(root, recursive)
+                truncated = bool(recursive and self.tree_limit is not None and len(paths) > self.tree_limit)
+                if truncated:
+                    paths = paths[:self.tree_limit]
+                body = {'sha': _sha(root), 'tree': [self._tree_entry(p, root) for p in paths],
+                        'truncated': truncated}
+                return self._send_json(handler, 200, body)
+
+        self._send_json(handler, 404, {'message': 'Not Found'})
+
+    def _send_json(self, handler: BaseHTTPRequestHandler, status: int, body, headers: Dict[str, str] = None) -> None:
+        self._send(handler, status, json.dumps(body).encode('utf-8'), 'application/json', headers)
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, payload: bytes, content_type: str,
+              headers: Dict[str, str] = None) -> None:
+        if status == 200 and not headers:
+            # Validators like GitHub's, so conditional requests can be answered with a 304
+            etag = f'"{hashlib.sha1(payload).hexdigest()}"'
+            if handler.headers.get('If-None-Match') == etag:
+                with self._lock:
+                    self.not_modified_count += 1
+                status, payload = 304, b''
+            headers = {'ETag': etag, 'Last-Modified': formatdate(0, usegmt=True)}
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(payload)
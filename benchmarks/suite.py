@@ -0,0 +1,237 @@
+"""
+Runs the end-to-end benchmark suite and writes results that can be compared across commits.
+
+    python -m benchmarks.suite --size medium --output bench-results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.suite --size medium --compare bench-results/baseline.json --threshold 0.15
+
+Each stage (tree fetch, Contents crawl, categorize_items, parse_files, DB store
+and all of them in sequence) runs --repeat times against a generated Django-style
+repository and a local stand-in for the GitHub API; the median is what gets
+compared. The JSON output records the commit, machine and parameters next to the
+timings, and --compare exits with status 1 when a stage got slower than the
+baseline by more than --threshold (and more than --min-delta seconds).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import git_trees
+import http_client
+import main as categorizer
+import parse_cache
+import repo_analyzer
+import repo_directory_structure
+import repository_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bumped whenever a stage changes what it measures, so old results are not compared against new ones
+SUITE_VERSION = 1
+
+# Repository sizes: directory depth, subdirectories per directory and modules per directory
+SIZES = {
+    'small': {'depth': 2, 'dirs': 3, 'files': 12},
+    'medium': {'depth': 3, 'dirs': 4, 'files': 12},
+    'large': {'depth': 4, 'dirs': 5, 'files': 12},
+}
+
+DEFAULT_THRESHOLD = 0.10
+
+# Slowdowns smaller than this many seconds are timer noise, whatever their ratio
+DEFAULT_MIN_DELTA = 0.002
+
+
+def commit_info() -> Dict[str, Any]:
+    def git(*args) -> str:
+        return subprocess.run(['git', '-C', ROOT, *args], capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        return {'commit': git('rev-parse', 'HEAD'), 'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def machine_info() -> Dict[str, Any]:
+    return {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'platform': platform.platform(), 'machine': platform.machine(), 'cpu_count': os.cpu_count()}
+
+
+def measure(call: Callable[[], Any], repeat: int) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Runs call repeat times and returns its last result with the median, fastest and individual timings.
+    """
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        timings.append(time.perf_counter() - start)
+    return result, {'median_seconds': statistics.median(timings), 'min_seconds': min(timings), 'runs': timings}
+
+
+def run_suite(depth: int = 3, dirs: int = 4, files: int = 12, layout: str = 'django', latency: float = 0.002,
+              repeat: int = 3, workers: int = 1) -> Dict[str, Any]:
+    """
+    Runs every stage against one synthetic repository and returns the results document.
+    """
+    generated = generate_files(depth, dirs, files, layout)
+    results = {
+        'suite_version': SUITE_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'parameters': {'depth': depth, 'dirs': dirs, 'files': files, 'layout': layout, 'latency': latency,
+                       'repeat': repeat, 'workers': workers},
+        'machine': machine_info(),
+        'benchmarks': {},
+    }
+    results.update(commit_info())
+    benchmarks = results['benchmarks']
+
+    saved = (repo_directory_structure.github_api_url, git_trees.github_trees_url, parse_cache.get_cache())
+    # Each measurement has to do its own work: no parse cache and a client without a response cache
+    parse_cache.configure(None)
+    http_client.configure()
+    with MockGitHubServer(generated, latency=latency) as server, tempfile.TemporaryDirectory(prefix='bench_suite_') as tmp:
+        repo_directory_structure.github_api_url = server.contents_url
+        git_trees.github_trees_url = server.trees_url
+        repo_path = write_files(generated, os.path.join(tmp, 'repo'))
+        stores = iter(range(sys.maxsize))
+
+        def fetch_tree():
+            return repo_directory_structure.fetch_directory_structure_from_tree(server.owner, server.repo)
+
+        def fetch_contents():
+            return repo_directory_structure.fetch_directory_structure_from_github(server.owner, server.repo)
+
+        def store(analysis):
+            # A fresh database per run, so every run inserts into the same empty schema
+            db_file = os.path.join(tmp, f"store{next(stores)}.db")
+            return repository_db.store_analysis_run('https://github.com/bench/suite', analysis, '0' * 40, db_file)
+
+        def end_to_end():
+            fetch_tree()
+            categorizer.categorize_items(repo_path, workers=workers)
+            return store(repo_analyzer.parse_files(repo_path, workers=workers))
+
+        try:
+            for name, call in [('tree_fetch', fetch_tree), ('contents_fetch', fetch_contents)]:
+                server.reset_counters()
+                structure, stats = measure(call, repeat)
+                benchmarks[name] = dict(stats, requests=server.request_count // repeat, lines=len(structure))
+
+            categories, stats = measure(lambda: categorizer.categorize_items(repo_path, workers=workers), repeat)
+            benchmarks['categorize_items'] = dict(stats, items=sum(len(items) for items in categories.values()))
+
+            analysis, stats = measure(lambda: repo_analyzer.parse_files(repo_path, workers=workers), repeat)
+            symbols = sum(len(names) for names in analysis.values())
+            benchmarks['parse_files'] = dict(stats, symbols=symbols)
+
+            _, stats = measure(lambda: store(analysis), repeat)
+            benchmarks['store'] = dict(stats, symbols=symbols)
+
+            _, stats = measure(end_to_end, repeat)
+            benchmarks['end_to_end'] = stats
+        finally:
+            repository_db.close_connections()
+            repo_directory_structure.github_api_url, git_trees.github_trees_url, cache = saved
+            parse_cache.configure(cache)
+            http_client.configure()
+
+    results['files'] = len(generated)
+    return results
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD,
+                    min_delta: float = DEFAULT_MIN_DELTA) -> List[Dict[str, Any]]:
+    """
+    Compares the median of every stage present in both results.
+
+    A stage regressed when its ratio is above 1 + threshold and it got slower by more than min_delta seconds.
+    """
+    rows = []
+    for name, entry in current['benchmarks'].items():
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            continue
+        ratio = entry['median_seconds'] / before['median_seconds'] if before['median_seconds'] else float('inf')
+        rows.append({'name': name, 'baseline': before['median_seconds'], 'current': entry['median_seconds'],
+                     'ratio': ratio,
+                     'regression': ratio > 1 + threshold and entry['median_seconds'] - before['median_seconds'] > min_delta})
+    return rows
+
+
+def comparison_warnings(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    warnings = []
+    for key in ('suite_version', 'parameters', 'machine'):
+        if baseline.get(key) != current.get(key):
+            warnings.append(f"{key} differs from the baseline; timings may not be comparable")
+    return warnings
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    commit = (results.get('commit') or 'unknown')[:12] + (' (dirty)' if results.get('dirty') else '')
+    print(f"commit {commit}, {results['files']} files, {results['parameters']}")
+    for name, entry in results['benchmarks'].items():
+        counters = ', '.join(f"{key}={value}" for key, value in entry.items() if key not in ('median_seconds', 'min_seconds', 'runs'))
+        print(f"{name:<18} {entry['median_seconds']:>9.4f}s median {entry['min_seconds']:>9.4f}s min  {counters}")
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['name']:<18} {row['baseline']:>9.4f}s -> {row['current']:>9.4f}s {row['ratio']:>7.2f}x{flag}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', choices=sorted(SIZES), default='medium')
+    parser.add_argument('--depth', type=int, help="overrides the depth of --size")
+    parser.add_argument('--dirs', type=int, help="overrides the subdirectories per directory of --size")
+    parser.add_argument('--files', type=int, help="overrides the modules per directory of --size")
+    parser.add_argument('--layout', choices=['django', 'flat'], default='django')
+    parser.add_argument('--latency', type=float, default=0.002, help="seconds added to every mock API response")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=1, help="parse workers (1 parses in this process)")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="compare against results written earlier with --output")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio above which a stage counts as a regression")
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA,
+                        help="seconds a stage must slow down by before it counts as a regression")
+    args = parser.parse_args()
+
+    size = dict(SIZES[args.size])
+    size.update({key: getattr(args, key) for key in size if getattr(args, key) is not None})
+    results = run_suite(size['depth'], size['dirs'], size['files'], args.layout, args.latency, args.repeat, args.workers)
+    print_results(results)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        print(f"\ncompared with {(baseline.get('commit') or 'unknown')[:12]}:")
+        for warning in comparison_warnings(baseline, results):
+            print(f"  warning: {warning}")
+        rows = compare_results(baseline, results, args.threshold, args.min_delta)
+        print_comparison(rows)
+        if any(row['regression'] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import os
+from typing import Dict
+
+# Module names cycled through in a Django-style layout, one app per directory
+DJANGO_MODULES = ['models.py', 'views.py', 'admin.py', 'serializers.py', 'urls.py', 'tests.py',
+                  'api.py', 'signals.py', 'services.py', 'consumers.py', 'queries.py', 'querysets.py']
+
+
+def _module_source(index: int) -> str:
+    return (
+        f"class Model{index}:\n"
+        f"    def method_{index}(self):\n"
+        f"        return {index}\n\n\n"
+        f"def function_{index}():\n"
+        f"    return Model{index}()\n"
+    )
+
+
+def _urls_source(index: int) -> str:
+    return (
+        "from django.urls import path\n\n"
+        "urlpatterns = [\n"
+        f"    path('items/{index}/', views.function_{index}),\n"
+        f"    path('items/{index}/detail/', views.function_{index}),\n"
+        "]\n"
+    )
+
+
+def generate_files(depth: int = 3, dirs_per_level: int = 4, files_per_dir: int = 5, layout: str = 'flat') -> Dict[str, str]:
+    """
+    Generates a synthetic repository as a ``{path: content}`` mapping.
+
+    Every directory holds ``files_per_dir`` small Python modules and
+    ``dirs_per_level`` subdirectories, down to ``depth`` levels. The ``flat``
+    layout names modules ``module_N.py``; the ``django`` layout cycles through
+    the usual Django app modules so every category gets populated.
+    """
+    files = {'README.md': '# Synthetic repository\n'}
+
+    def fill(prefix: str, level: int) -> None:
+        for index in range(files_per_dir):
+            if layout == 'django':
+                name = DJANGO_MODULES[index % len(DJANGO_MODULES)]
+                if index >= len(DJANGO_MODULES):
+                    name = f"{name[:-3]}_{index}.py"
+            else:
+                name = f"module_{index}.py"
+            source = _urls_source(index) if name.startswith('urls') else _module_source(index)
+            files[f"{prefix}{name}"] = source
+        if level < depth:
+            for index in range(dirs_per_level):
+                fill(f"{prefix}pkg_{index}/", level + 1)
+
+    fill('', 1)
+    return files
+
+
+def write_files(files: Dict[str, str], root: str) -> str:
+    """
+    Writes a generated repository to disk under root and returns root.
+    """
+    for path, content in files.items():
+        full_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+    return root
@@ -1,21 +1,28 @@
 import os
 import requests
 from github import fetch_repository_contents, extract_github_details
-from repo_analyzer import analyze_repository
+from repo_analyzer import analyze_local_repository, analyze_repository
+import profiling
 
 def analyze_github_repository(repo_url, access_token=None):
     """
     Analyzes a GitHub repository comprehensively.
+
+    repo_url may also be the path of a local checkout or bare repository, which is
+    analyzed in place without contacting GitHub.
     """
     try:
-        # Extract GitHub details from URL
-        github_owner, github_repo, _ = extract_github_details(repo_url)
+        if os.path.isdir(repo_url):
+            analysis_results = analyze_local_repository(repo_url)
+        else:
+            # Extract GitHub details from URL
+            github_owner, github_repo, _ = extract_github_details(repo_url)
 
-        # Fetch repository contents
-        contents = fetch_repository_contents(github_owner, github_repo, access_token=access_token)
+            # Fetch repository contents
+            contents = fetch_repository_contents(github_owner, github_repo, access_token=access_token)
 
-        # Analyze repository
-        analysis_results = analyze_repository(repo_url)
+            # Analyze repository
+            analysis_results = analyze_repository(repo_url)
         if isinstance(analysis_results, dict) and analysis_results.get("error"):
             print(f"Error in repository analysis: {analysis_results['error']}")
         else:
@@ -32,8 +39,10 @@ def analyze_github_repository(repo_url, access_token=None):
 
 # Example usage
 if __name__ == "__main__":
+    # Set REPO_ANALYZER_PROFILE=report.json (and REPO_ANALYZER_CPROFILE=run.prof) to profile the run
+    profiling.enable_from_environment()
     # Example GitHub repository URL
-    repo_url = input("Enter GitHub repository URL (e.g., https://github.com/owner/repo): ").strip()
+    repo_url = input("Enter GitHub repository URL or local path (e.g., https://github.com/owner/repo): ").strip()
 
     try:
         # Prompt user for GitHub access token
@@ -0,0 +1,118 @@
+import ast
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+import file_ingest
+import parse_cache
+import profiling
+
+# Bump whenever collect_symbols returns something different, so cached parse results are not reused
+VISITOR_VERSION = '2'
+
+# Nodes that can hold statements; expression subtrees never contain definitions and are skipped
+STATEMENT_CONTAINERS = (ast.stmt, ast.excepthandler) + ((ast.match_case,) if hasattr(ast, 'match_case') else ())
+
+def dotted_name(node: ast.AST) -> Optional[str]:
+    """
+    Returns 'package.module.name' for Name/Attribute chains (and calls of them), else None.
+    """
+    if isinstance(node, ast.Call):
+        return dotted_name(node.func)
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        base = dotted_name(node.value)
+        return f"{base}.{node.attr}" if base else None
+    return None
+
+def _url_patterns(node: ast.Assign) -> List[Tuple[Any, int]]:
+    """
+    Returns the positional constant arguments of the calls in a `urlpatterns = [...]` literal, with their line numbers.
+    """
+    patterns = []
+    if isinstance(node.value, (ast.List, ast.Tuple)):
+        for element in node.value.elts:
+            if isinstance(element, ast.Call):
+                for arg in element.args:
+                    if isinstance(arg, ast.Constant):
+                        patterns.append((arg.value, arg.lineno))
+    return patterns
+
+def collect_symbols(tree: ast.Module) -> Dict[str, List]:
+    """
+    Collects classes, functions and URL patterns from a parsed module in a single traversal.
+
+    Classes and functions (sync and async, at any nesting level) are returned in
+    the same breadth-first order as ast.walk, each as a dict with its name,
+    qualified name, line number, decorators and whether it is defined at module
+    level; classes also carry their base classes. URL patterns are the
+    positional constants of the calls in module-level `urlpatterns = [...]`
+    assignments; url_pattern_lines holds the line number of each.
+    """
+    classes = []
+    functions = []
+    url_patterns = []
+    url_pattern_lines = []
+
+    queue = deque((child, '', True) for child in ast.iter_child_nodes(tree))
+    while queue:
+        node, scope, top_level = queue.popleft()
+        child_scope = scope
+
+        if isinstance(node, ast.ClassDef):
+            qualname = scope + node.name
+            classes.append({
+                'name': node.name,
+                'qualname': qualname,
+                'lineno': node.lineno,
+                'top_level': top_level,
+                'decorators': [dotted_name(d) for d in node.decorator_list],
+                'bases': [dotted_name(b) for b in node.bases],
+            })
+            child_scope = qualname + '.'
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            qualname = scope + node.name
+            functions.append({
+                'name': node.name,
+                'qualname': qualname,
+                'lineno': node.lineno,
+                'top_level': top_level,
+                'is_async': isinstance(node, ast.AsyncFunctionDef),
+                'decorators': [dotted_name(d) for d in node.decorator_list],
+            })
+            child_scope = qualname + '.<locals>.'
+        elif top_level and isinstance(node, ast.Assign):
+            if any(isinstance(t, ast.Name) and t.id == 'urlpatterns' for t in node.targets):
+                for pattern, lineno in _url_patterns(node):
+                    url_patterns.append(pattern)
+                    url_pattern_lines.append(lineno)
+
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, STATEMENT_CONTAINERS):
+                queue.append((child, child_scope, False))
+
+    return {'classes': classes, 'functions': functions, 'url_patterns': url_patterns,
+            'url_pattern_lines': url_pattern_lines}
+
+def analyze_source(content: str, filename: str = '<unknown>') -> Dict[str, List]:
+    """
+    Parses source once and collects its symbols.
+
+    When a parse_cache.ParseCache is configured, content seen before (in any
+    repository) is answered from the cache without calling ast.parse.
+    """
+    return parse_cache.cached('ast_visitor', VISITOR_VERSION, content, lambda: _parse_and_collect(content, filename))
+
+def _parse_and_collect(content: str, filename: str) -> Dict[str, List]:
+    with profiling.stage('ast.parse', len(content), None if filename == '<unknown>' else filename):
+        return collect_symbols(ast.parse(content, filename=filename))
+
+def analyze_python_file(file_path: str) -> Dict[str, List]:
+    """
+    Reads and parses a Python file once and collects its symbols.
+
+    Files that file_ingest skips (too large, binary or unreadable) have no symbols.
+    """
+    content = file_ingest.read_source(file_path)
+    if content is None:
+        return collect_symbols(ast.Module(body=[], type_ignores=[]))
+    return analyze_source(content, file_path)
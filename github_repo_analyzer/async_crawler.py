@@ -0,0 +1,145 @@
+import asyncio
+import requests
+import http_client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+from urllib.parse import urlsplit
+
+# GitHub API endpoint for repository contents
+github_api_url = "https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+
+# Default limits for concurrent requests overall and per host
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST_LIMIT = 8
+
+class AsyncGitHubCrawler:
+    """
+    Crawls repository directories and downloads files concurrently.
+
+    Blocking HTTP calls run on a thread pool sized to the concurrency cap, and
+    a semaphore per host keeps any single host from taking every slot.
+    """
+
+    def __init__(self, access_token: str = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT, get: Callable = None):
+        self.headers = {}
+        if access_token:
+            self.headers['Authorization'] = f"token {access_token}"
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, min(per_host_limit, self.concurrency))
+        self.get = get or http_client.get
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='crawler')
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    async def request(self, url: str, headers: Dict[str, str] = None) -> requests.Response:
+        """
+        Performs a GET request once a slot for the URL's host is free.
+        """
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+
+        async with self._host_limits[host]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, lambda: self.get(url, headers=headers))
+
+    async def list_directory(self, owner: str, repo: str, path: str = '') -> List[Dict]:
+        """
+        Fetches the Contents API listing of a single directory.
+        """
+        url = github_api_url.format(owner=owner, repo=repo, path=path)
+        response = await self.request(url, self.headers)
+
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise ValueError(f"Failed to fetch directory structure: {response.status_code} - {response.json().get('message', 'Unknown error')}")
+
+    async def crawl(self, owner: str, repo: str, path: str = '') -> Dict[str, List[Dict]]:
+        """
+        Lists every directory below path breadth-first, returning the listings keyed by directory path.
+        """
+        listings = {}
+        errors = []
+        queue = asyncio.Queue()
+        queue.put_nowait(path.strip('/'))
+
+        async def worker():
+            while True:
+                directory = await queue.get()
+                try:
+                    if not errors:
+                        contents = await self.list_directory(owner, repo, directory)
+                        listings[directory] = contents
+                        for item in contents:
+                            if item['type'] == 'dir':
+                                queue.put_nowait(item['path'])
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if errors:
+            raise errors[0]
+        return listings
+
+    async def fetch_file(self, owner: str, repo: str, path: str) -> Optional[str]:
+        """
+        Fetches the text of a single file, or None if path is not a file.
+        """
+        url = github_api_url.format(owner=owner, repo=repo, path=path)
+        response = await self.request(url, self.headers)
+
+        if response.status_code == 200:
+            file_content = response.json()
+            if file_content['type'] == 'file':
+                return (await self.request(file_content['download_url'])).text
+        else:
+            raise ValueError(f"Failed to fetch file content: {response.status_code} - {response.json().get('message', 'Unknown error')}")
+
+    async def fetch_files(self, owner: str, repo: str, paths: List[str]) -> List[Union[str, None, ValueError]]:
+        """
+        Fetches many files concurrently, returning contents (or the ValueError raised) in input order.
+        """
+        async def fetch_or_error(path):
+            try:
+                return await self.fetch_file(owner, repo, path)
+            except ValueError as ve:
+                return ve
+
+        return list(await asyncio.gather(*(fetch_or_error(path) for path in paths)))
+
+def crawl_directory_listings(owner: str, repo: str, path: str = '', access_token: str = None,
+                             concurrency: int = DEFAULT_CONCURRENCY,
+                             per_host_limit: int = DEFAULT_PER_HOST_LIMIT) -> Dict[str, List[Dict]]:
+    """
+    Synchronous wrapper around AsyncGitHubCrawler.crawl.
+    """
+    crawler = AsyncGitHubCrawler(access_token, concurrency, per_host_limit)
+    try:
+        return asyncio.run(crawler.crawl(owner, repo, path))
+    finally:
+        crawler.close()
+
+def fetch_files_concurrently(owner: str, repo: str, paths: List[str], access_token: str = None,
+                             concurrency: int = DEFAULT_CONCURRENCY,
+                             per_host_limit: int = DEFAULT_PER_HOST_LIMIT) -> List[Union[str, None, ValueError]]:
+    """
+    Synchronous wrapper around AsyncGitHubCrawler.fetch_files.
+    """
+    crawler = AsyncGitHubCrawler(access_token, concurrency, per_host_limit)
+    try:
+        return asyncio.run(crawler.fetch_files(owner, repo, paths))
+    finally:
+        crawler.close()
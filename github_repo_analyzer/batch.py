@@ -0,0 +1,300 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import http_cache
+import http_client
+import main as categorizer
+import parse_cache
+import repo_analyzer
+from incremental import head_commit
+from parallel import default_workers
+import profiling
+from repo_clone import clone_with_strategy
+from repository_db import store_analysis_run
+from symbol_table import SymbolTable
+
+# Clones run concurrently up to this many at a time; they wait on the network, not the CPU
+DEFAULT_CLONE_WORKERS = 4
+
+# Seconds a single repository may spend cloning and parsing; time spent waiting for a free slot does not count
+DEFAULT_TIMEOUT = 30 * 60
+
+# Analyzers a batch can run: repo_analyzer's classes/functions/endpoints or main's Django categories.
+# They return symbol tables, which are stored with each symbol's file
+ANALYZERS: Dict[str, Callable[[str], SymbolTable]] = {
+    'symbols': repo_analyzer.parse_local_symbols,
+    'categories': categorizer.categorize_local_symbols,
+}
+
+class JobTimeout(Exception):
+    pass
+
+class ProgressJournal:
+    """
+    Append-only JSON Lines record of finished jobs, so an interrupted batch can resume where it stopped.
+
+    Each line holds the repository, its status ('done' or 'failed') and either the
+    stored run id or the error.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash is ignored; its job simply runs again
+                        continue
+                    self.entries[entry['repository']] = entry
+        except OSError:
+            pass
+
+    def completed(self) -> Set[str]:
+        return {repository for repository, entry in self.entries.items() if entry['status'] == 'done'}
+
+    def record(self, repository: str, status: str, **fields) -> Dict[str, Any]:
+        entry = dict(repository=repository, status=status, finished_at=time.time(), **fields)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            self.entries[repository] = entry
+        return entry
+
+def read_repository_list(path: str) -> List[str]:
+    """
+    Reads repository URLs or paths, one per line; blank lines and '#' comments are skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip() and not line.strip().startswith('#')]
+
+def repository_key(repository: str) -> str:
+    # Local paths are stored and journaled by absolute path so relative spellings resolve to one entry
+    return os.path.abspath(repository) if os.path.isdir(repository) else repository
+
+def _analyze_in_child(connection, analyzer: str, repo_path: str, profile_settings: Optional[Tuple[bool, bool]] = None,
+                      cache_settings: Optional[Tuple[str, int]] = None) -> None:
+    try:
+        # Forkserver and spawned children start without the parent's parse cache, so they open it from its settings
+        parse_cache.configure_worker(cache_settings)
+        before = parse_cache.current_stats()
+        profiler = profiling.enable(*profile_settings) if profile_settings else None
+        result = ANALYZERS[analyzer](repo_path)
+        try:
+            commit_sha = head_commit(repo_path)
+        except subprocess.CalledProcessError:
+            commit_sha = None
+        connection.send(('ok', (result, commit_sha, profiler.snapshot() if profiler else None,
+                                parse_cache.stats_since(before))))
+    except BaseException as e:
+        connection.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        connection.close()
+
+def _process_context():
+    # Forking a process that runs clone threads can copy a held lock into the child; a fork server avoids that
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def analyze_in_process(repo_path: str, analyzer: str = 'symbols', timeout: float = None) -> Tuple[SymbolTable, Optional[str]]:
+    """
+    Runs an analyzer over repo_path in a separate process and returns (result, commit_sha).
+
+    The process is killed if it runs past timeout (JobTimeout) and a crash is
+    raised as a RuntimeError, so neither can take the batch down with it.
+    """
+    context = _process_context()
+    receiver, sender = context.Pipe(duplex=False)
+    profiler = profiling.get_profiler()
+    process = context.Process(target=_analyze_in_child,
+                              args=(sender, analyzer, repo_path, profiling.settings(), parse_cache.settings()),
+                              daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            process.kill()
+            raise JobTimeout(f"analysis timed out after {timeout:.0f}s")
+        try:
+            status, payload = receiver.recv()
+        except EOFError:
+            process.join()
+            raise RuntimeError(f"analysis process exited with code {process.exitcode}")
+        if status != 'ok':
+            raise RuntimeError(payload)
+        result, commit_sha, snapshot, cache_stats = payload
+        if snapshot is not None:
+            profiler.merge(snapshot)
+        if cache_stats:
+            parse_cache.get_cache().merge_stats(cache_stats)
+        return result, commit_sha
+    finally:
+        process.join()
+        receiver.close()
+
+def run_batch(repositories: Iterable[str], db_file: str = None, journal_path: str = None,
+              clone_workers: int = DEFAULT_CLONE_WORKERS, parse_workers: int = None, timeout: float = DEFAULT_TIMEOUT,
+              clone_strategy: str = 'shallow', mirror_cache: str = None, access_token: str = None,
+              analyzer: str = 'symbols', retry_failed: bool = True) -> Dict[str, int]:
+    """
+    Analyzes many repositories and stores every result through repository_db.
+
+    Each job clones (URLs only; local paths are analyzed in place), parses and
+    stores one repository. Up to clone_workers clones and parse_workers parses
+    run at once, so network-bound clones overlap with CPU-bound parsing. A
+    cloned job keeps its thread while it waits for a parse slot, so at most
+    clone_workers + parse_workers checkouts are on disk at once. Parsing runs
+    in its own process so a job that exceeds timeout, counted only while it
+    holds a clone or parse slot, can be killed. A failing job
+    is recorded and the batch carries on. Results are written from this thread
+    only, one transaction per repository. With journal_path set, repositories
+    already recorded as done are skipped, and failed ones too unless retry_failed.
+    Returns the number of jobs done, failed and skipped.
+    """
+    if analyzer not in ANALYZERS:
+        raise ValueError(f"Unknown analyzer: {analyzer} (expected one of {', '.join(ANALYZERS)})")
+    parse_workers = parse_workers or default_workers()
+    journal = ProgressJournal(journal_path) if journal_path else None
+
+    skip = set()
+    if journal is not None:
+        skip = journal.completed()
+        if not retry_failed:
+            skip |= set(journal.entries)
+
+    summary = {'done': 0, 'failed': 0, 'skipped': 0}
+    jobs = []
+    for repository in dict.fromkeys(repositories):
+        if repository_key(repository) in skip:
+            summary['skipped'] += 1
+        else:
+            jobs.append(repository)
+
+    clone_slots = threading.Semaphore(clone_workers)
+    parse_slots = threading.Semaphore(parse_workers)
+
+    def run_job(repository: str) -> Tuple[SymbolTable, Optional[str]]:
+        # Seconds used so far, and when the job last took a slot
+        clock = {'used': 0.0, 'since': 0.0}
+
+        @contextlib.contextmanager
+        def holding(slots: threading.Semaphore):
+            # The clock only runs while the job holds a slot, so queueing for one does not use up its timeout
+            with slots:
+                clock['since'] = time.monotonic()
+                try:
+                    yield
+                finally:
+                    clock['used'] += time.monotonic() - clock['since']
+
+        def remaining() -> float:
+            left = timeout - clock['used'] - (time.monotonic() - clock['since'])
+            if left <= 0:
+                raise JobTimeout(f"timed out after {timeout:.0f}s")
+            return left
+
+        if os.path.isdir(repository):
+            with holding(parse_slots):
+                return analyze_in_process(repository, analyzer, remaining())
+
+        temp_dir = tempfile.mkdtemp(prefix='batch_')
+        try:
+            with holding(clone_slots):
+                try:
+                    clone_with_strategy(repository, temp_dir, clone_strategy, access_token, mirror_cache, remaining())
+                except subprocess.TimeoutExpired:
+                    raise JobTimeout(f"clone timed out after {timeout:.0f}s")
+            with holding(parse_slots):
+                return analyze_in_process(temp_dir, analyzer, remaining())
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    with ThreadPoolExecutor(max_workers=max(1, clone_workers + parse_workers)) as pool:
+        futures = {pool.submit(run_job, repository): (repository, time.monotonic()) for repository in jobs}
+        for future in as_completed(futures):
+            repository, started = futures[future]
+            key = repository_key(repository)
+            try:
+                result, commit_sha = future.result()
+                run_id = store_analysis_run(key, result, commit_sha, db_file)
+            except Exception as e:
+                summary['failed'] += 1
+                print(f"Failed {repository}: {e}")
+                if journal is not None:
+                    journal.record(key, 'failed', error=str(e), elapsed=time.monotonic() - started)
+                continue
+            summary['done'] += 1
+            print(f"Stored {repository} as run {run_id}")
+            if journal is not None:
+                journal.record(key, 'done', run_id=run_id, commit_sha=commit_sha, elapsed=time.monotonic() - started)
+
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze many repositories and store the results in the database.")
+    parser.add_argument('repositories', nargs='*', help="repository URLs or local paths")
+    parser.add_argument('--file', help="file listing repository URLs or paths, one per line")
+    parser.add_argument('--db', help="SQLite database file (default: repository_db.DB_FILE)")
+    parser.add_argument('--journal', help="progress journal; finished repositories are skipped when it exists")
+    parser.add_argument('--clone-workers', type=int, default=DEFAULT_CLONE_WORKERS)
+    parser.add_argument('--parse-workers', type=int, default=None)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="seconds allowed per repository")
+    parser.add_argument('--strategy', default='shallow', help="clone strategy (full, shallow, blobless, sparse)")
+    parser.add_argument('--mirror-cache', help="directory of bare mirrors reused across runs")
+    parser.add_argument('--analyzer', default='symbols', choices=sorted(ANALYZERS))
+    parser.add_argument('--no-retry-failed', action='store_true', help="also skip repositories that failed before")
+    parser.add_argument('--profile', help="write per-stage and per-file timings to this JSON file")
+    parser.add_argument('--cprofile', help="also write a cProfile dump of the coordinating process to this file")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="also trace peak memory per stage (slows the profiled run down)")
+    parser.add_argument('--parse-cache', help="directory of parse results shared across repositories and runs")
+    parser.add_argument('--parse-cache-max-bytes', type=int, default=parse_cache.DEFAULT_MAX_BYTES,
+                        help="evict the least recently used parse results past this size")
+    parser.add_argument('--http-cache', help="directory of GitHub responses revalidated instead of re-downloaded")
+    parser.add_argument('--http-cache-ttl', type=float, default=http_cache.DEFAULT_TTL,
+                        help="seconds a cached response is kept")
+    parser.add_argument('--http-cache-max-bytes', type=int, default=http_cache.DEFAULT_MAX_BYTES,
+                        help="evict the least recently used responses past this size")
+    args = parser.parse_args()
+
+    if args.profile:
+        os.environ[profiling.PROFILE_ENV] = args.profile
+    if args.cprofile:
+        os.environ[profiling.CPROFILE_ENV] = args.cprofile
+    if args.profile_memory:
+        os.environ[profiling.MEMORY_ENV] = '1'
+    profiling.enable_from_environment()
+    if args.parse_cache:
+        parse_cache.configure(parse_cache.ParseCache(args.parse_cache, args.parse_cache_max_bytes))
+    if args.http_cache:
+        http_client.configure(cache=http_cache.ResponseCache(args.http_cache, args.http_cache_max_bytes,
+                                                             args.http_cache_ttl))
+
+    repositories = list(args.repositories)
+    if args.file:
+        repositories += read_repository_list(args.file)
+    summary = run_batch(repositories, args.db, args.journal, args.clone_workers, args.parse_workers, args.timeout,
+                        args.strategy, args.mirror_cache, os.environ.get('GITHUB_TOKEN'), args.analyzer,
+                        not args.no_retry_failed)
+    print(f"Done: {summary['done']}, failed: {summary['failed']}, skipped: {summary['skipped']}")
+    if args.parse_cache:
+        print(parse_cache.describe_report(parse_cache.get_cache().report()))
+    if args.http_cache:
+        print(http_cache.describe_report(http_client.get_stats()['cache']))
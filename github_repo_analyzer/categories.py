@@ -0,0 +1,239 @@
+import json
+import re
+import sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from file_index import glob_to_regex
+from local_repo import read_files
+
+# File at the repository root whose rules are tried before the configured ones (see parse_rules)
+CONFIG_FILE = '.repo-categories.json'
+
+OTHERS = 'Others'
+
+# Every result lists these categories, in this order; rules may add more, which go before Others
+DEFAULT_CATEGORIES = ['Admin', 'API Views', 'Views', 'Models', 'Serializers', 'Tests', 'Signals', 'Services',
+                      'Consumers', 'Endpoints', 'Queries', 'Querysets', OTHERS]
+
+class CategoryRule(NamedTuple):
+    """
+    Puts files and classes in a category.
+
+    paths are gitignore-style globs over the repository-relative path (a glob
+    without '/' matches the file name in any directory), directories are
+    directory names anywhere above the file, and bases are the dotted names of
+    base classes ('models.Model' also matches `Model` and `django.db.models.Model`).
+    """
+    category: str
+    paths: Tuple[str, ...] = ()
+    directories: Tuple[str, ...] = ()
+    bases: Tuple[str, ...] = ()
+
+DEFAULT_RULES = [
+    # Conventional module names come first, so views.py in an api/ package is still Views
+    CategoryRule('Tests', ('tests.py', 'test_*.py', 'tests_*.py', '*_test.py', '*_tests.py', 'conftest.py'),
+                 ('tests', 'test')),
+    CategoryRule('Admin', ('admin.py',)),
+    CategoryRule('API Views', ('api.py', 'api_views.py')),
+    CategoryRule('Views', ('views.py',)),
+    CategoryRule('Models', ('models.py',)),
+    CategoryRule('Serializers', ('serializers.py',)),
+    CategoryRule('Signals', ('signals.py',)),
+    CategoryRule('Services', ('services.py',)),
+    CategoryRule('Consumers', ('consumers.py',)),
+    CategoryRule('Querysets', ('querysets.py',)),
+    CategoryRule('Queries', ('queries.py',)),
+    CategoryRule('Endpoints', ('urls.py',)),
+    # Then the package a module sits in: api/, views/, models/ ...
+    CategoryRule('API Views', directories=('api',)),
+    CategoryRule('Admin', directories=('admin',)),
+    CategoryRule('Views', directories=('views',)),
+    CategoryRule('Models', directories=('models',)),
+    CategoryRule('Serializers', directories=('serializers',)),
+    CategoryRule('Signals', directories=('signals',)),
+    CategoryRule('Services', directories=('services',)),
+    CategoryRule('Consumers', directories=('consumers',)),
+    CategoryRule('Querysets', directories=('querysets',)),
+    CategoryRule('Queries', directories=('queries',)),
+    # Then looser names such as product_views.py or order_serializer.py
+    CategoryRule('Admin', ('*admin.py',)),
+    CategoryRule('API Views', ('api_*.py', '*_api.py')),
+    CategoryRule('Views', ('*views.py',)),
+    CategoryRule('Models', ('*models.py',)),
+    CategoryRule('Serializers', ('*serializer*.py',)),
+    CategoryRule('Signals', ('*signal*.py',)),
+    CategoryRule('Services', ('*service*.py',)),
+    CategoryRule('Consumers', ('*consumer*.py',)),
+    CategoryRule('Querysets', ('*queryset*.py',)),
+    CategoryRule('Queries', ('*quer*.py',)),
+    CategoryRule('Endpoints', ('*urls.py',)),
+    # Classes are also categorized by what they inherit from, whichever file they are in
+    CategoryRule('Tests', bases=('TestCase', 'SimpleTestCase', 'TransactionTestCase', 'LiveServerTestCase',
+                                 'APITestCase', 'APISimpleTestCase', 'APITransactionTestCase')),
+    CategoryRule('Admin', bases=('admin.ModelAdmin', 'admin.TabularInline', 'admin.StackedInline',
+                                 'admin.AdminSite')),
+    CategoryRule('API Views', bases=('APIView', 'generics.GenericAPIView', 'generics.ListAPIView',
+                                     'generics.CreateAPIView', 'generics.RetrieveAPIView',
+                                     'generics.ListCreateAPIView', 'generics.RetrieveUpdateAPIView',
+                                     'generics.RetrieveDestroyAPIView', 'generics.RetrieveUpdateDestroyAPIView',
+                                     'generics.UpdateAPIView', 'generics.DestroyAPIView', 'viewsets.ViewSet',
+                                     'viewsets.GenericViewSet', 'viewsets.ModelViewSet',
+                                     'viewsets.ReadOnlyModelViewSet')),
+    CategoryRule('Views', bases=('View', 'TemplateView', 'RedirectView', 'ListView', 'DetailView', 'CreateView',
+                                 'UpdateView', 'DeleteView', 'FormView')),
+    CategoryRule('Models', bases=('models.Model',)),
+    CategoryRule('Serializers', bases=('serializers.Serializer', 'serializers.ModelSerializer',
+                                       'serializers.HyperlinkedModelSerializer', 'serializers.ListSerializer')),
+    CategoryRule('Consumers', bases=('WebsocketConsumer', 'AsyncWebsocketConsumer', 'JsonWebsocketConsumer',
+                                     'AsyncJsonWebsocketConsumer', 'AsyncConsumer', 'SyncConsumer')),
+    CategoryRule('Querysets', bases=('models.QuerySet', 'models.Manager')),
+]
+
+def _compile(alternatives: List[str]) -> Optional[re.Pattern]:
+    return re.compile('|'.join(alternatives)) if alternatives else None
+
+def base_matches(base: str, rule: str) -> bool:
+    """
+    Returns True if the dotted names base and rule name the same class, one possibly more qualified than the other.
+    """
+    return base == rule or base.endswith('.' + rule) or rule.endswith('.' + base)
+
+class CategoryMatcher:
+    """
+    Category rules compiled once into a single matcher.
+
+    Globs without a '/' become named alternatives of one regular expression
+    over the file name, tried in rule order, and its answer is memoized per
+    name; directory names go in a dict, with the answer memoized per
+    directory; anchored globs share a second expression over the whole path.
+    A file's category is the earliest rule any of them finds, so the first rule
+    listed wins, and most files cost two dict lookups. Base-class rules are indexed by the last component of the
+    base's name, so a class costs a dict lookup per base.
+    """
+
+    def __init__(self, rules: Sequence[CategoryRule] = DEFAULT_RULES):
+        self.rules = list(rules)
+        names, anchored = [], []
+        self._directories: Dict[str, int] = {}
+        self._bases: Dict[str, List[Tuple[str, str]]] = {}
+        for number, rule in enumerate(self.rules):
+            globs = [pattern.replace('\\', '/') for pattern in rule.paths]
+            unanchored = [glob_to_regex(glob.rstrip('/')) for glob in globs if '/' not in glob.rstrip('/')]
+            rooted = [glob_to_regex(glob.strip('/')) for glob in globs if '/' in glob.rstrip('/')]
+            if unanchored:
+                names.append(f"(?P<r{number}>{'|'.join(unanchored)})")
+            if rooted:
+                anchored.append(f"(?P<r{number}>{'|'.join(rooted)})")
+            for directory in rule.directories:
+                self._directories.setdefault(directory.strip('/'), number)
+            for base in rule.bases:
+                self._bases.setdefault(base.rsplit('.', 1)[-1], []).append((base, rule.category))
+        self._names = _compile(names)
+        self._anchored = _compile(anchored)
+        self._name_rules: Dict[str, int] = {}
+        self._directory_rules: Dict[str, int] = {'': len(self.rules)}
+        added = [rule.category for rule in self.rules if rule.category not in DEFAULT_CATEGORIES]
+        self.categories = list(dict.fromkeys(DEFAULT_CATEGORIES[:-1] + added)) + [OTHERS]
+
+    def _name_rule(self, name: str) -> int:
+        number = self._name_rules.get(name)
+        if number is None:
+            match = self._names.fullmatch(name) if self._names else None
+            number = self._name_rules[name] = int(match.lastgroup[1:]) if match else len(self.rules)
+        return number
+
+    def _directory_rule(self, directory: str) -> int:
+        number = self._directory_rules.get(directory)
+        if number is None:
+            numbers = [self._directories.get(part, len(self.rules)) for part in directory.split('/')]
+            number = self._directory_rules[directory] = min(numbers)
+        return number
+
+    def file_category(self, path: str) -> str:
+        """
+        Returns the category of a repository-relative path, or Others when no rule matches it.
+        """
+        path = path.replace('\\', '/')
+        directory, _, name = path.rpartition('/')
+        number = min(self._name_rule(name), self._directory_rule(directory))
+        if self._anchored is not None:
+            match = self._anchored.fullmatch(path)
+            if match:
+                number = min(number, int(match.lastgroup[1:]))
+        return self.rules[number].category if number < len(self.rules) else OTHERS
+
+    def class_category(self, bases: Iterable[Optional[str]], local: Dict[str, str] = None) -> Optional[str]:
+        """
+        Returns the category of a class from its base classes' dotted names, or None when no rule matches one.
+
+        local maps the names of classes already categorized in the same module,
+        so a class inherits the category of a local base class as well.
+        """
+        for base in bases:
+            if not base:
+                continue
+            for name, category in self._bases.get(base.rsplit('.', 1)[-1], ()):
+                if base_matches(base, name):
+                    return category
+            if local and base in local:
+                return local[base]
+        return None
+
+def parse_rules(text: str, rules: Sequence[CategoryRule] = DEFAULT_RULES) -> List[CategoryRule]:
+    """
+    Returns the rules of a JSON configuration, tried before rules unless it sets "replace_defaults".
+
+        {"rules": [{"category": "Tasks", "paths": ["tasks.py"], "bases": ["celery.Task"]}]}
+    """
+    try:
+        config = json.loads(text)
+        configured = [CategoryRule(_string(entry['category'], 'category'), _strings(entry, 'paths'),
+                                   _strings(entry, 'directories'), _strings(entry, 'bases'))
+                      for entry in config.get('rules', [])]
+        replace = config.get('replace_defaults', False)
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError(f"Failed to read category rules: {e}")
+    return configured if replace else configured + list(rules)
+
+def _string(value, field: str) -> str:
+    if not isinstance(value, str):
+        raise TypeError(f"{field} must be a string, not {value!r}")
+    return value
+
+def _strings(entry: Dict, field: str) -> Tuple[str, ...]:
+    values = entry.get(field, ())
+    if not isinstance(values, (list, tuple)) or not all(isinstance(value, str) for value in values):
+        raise TypeError(f"{field} must be a list of strings, not {values!r}")
+    return tuple(values)
+
+def load_rules(path: str, rules: Sequence[CategoryRule] = DEFAULT_RULES) -> List[CategoryRule]:
+    with open(path, 'r', encoding='utf-8') as file:
+        return parse_rules(file.read(), rules)
+
+_matcher = CategoryMatcher()
+
+def configure(rules: Sequence[CategoryRule] = DEFAULT_RULES) -> CategoryMatcher:
+    """
+    Sets the process-wide rules that every repository's own CONFIG_FILE extends.
+    """
+    global _matcher
+    _matcher = CategoryMatcher(rules)
+    return _matcher
+
+def get_matcher() -> CategoryMatcher:
+    return _matcher
+
+def project_matcher(repo_path: str, ref: str = None) -> CategoryMatcher:
+    """
+    Returns the matcher for a repository: its CONFIG_FILE's rules in front of the configured ones, if it has one.
+
+    The file is repository content, so a malformed one is reported on stderr and
+    the configured rules are used instead of failing the analysis.
+    """
+    content = next(read_files(repo_path, [CONFIG_FILE], ref))
+    if isinstance(content, ValueError):
+        return _matcher
+    try:
+        return CategoryMatcher(parse_rules(content, _matcher.rules))
+    except ValueError as e:
+        print(f"Ignoring {CONFIG_FILE}: {e}", file=sys.stderr)
+        return _matcher
@@ -0,0 +1,374 @@
+"""
+Single non-interactive entry point for the analyzers:
+
+    python github_repo_analyzer/cli.py tree REPO [--output FILE] [--http-cache DIR]
+    python github_repo_analyzer/cli.py analyze REPO [--output FILE] [--workers N] [--pipeline] [--categories FILE]
+                                                    [--parse-cache DIR]
+    python github_repo_analyzer/cli.py report REPO [--output FILE] [--pipeline] [--http-cache DIR] [--parse-cache DIR]
+    python github_repo_analyzer/cli.py store REPO [--db FILE] [--analyzer symbols|categories] [--categories FILE]
+    python github_repo_analyzer/cli.py routes REPO [--output FILE] [--state-dir DIR]
+    python github_repo_analyzer/cli.py diff REPO [--db FILE] [--base COMMIT] [--head COMMIT] [--against REPO]
+
+REPO is a GitHub URL or the path of a local checkout or bare repository. The
+access token comes from --token or GITHUB_TOKEN; nothing is prompted for. Only
+argparse is imported up front: each subcommand imports the modules it needs
+when it runs, so `--help` and local runs never load requests or sqlite3 unless
+they use them.
+"""
+import argparse
+import os
+import sys
+
+
+def configure_categories(args) -> None:
+    """
+    Puts the rules of --categories in front of the default category rules.
+    """
+    if args.categories:
+        import categories
+        categories.configure(categories.load_rules(args.categories))
+
+
+def configure_http_cache(args) -> None:
+    """
+    Revalidates GitHub responses against the on-disk cache of --http-cache instead of downloading them again.
+    """
+    if getattr(args, 'http_cache', None):
+        import http_client
+        from http_cache import ResponseCache
+        limits = {'max_bytes': args.http_cache_max_bytes, 'ttl': args.http_cache_ttl}
+        cache = ResponseCache(args.http_cache, **{key: value for key, value in limits.items() if value is not None})
+        http_client.configure(cache=cache)
+
+
+def configure_parse_cache(args) -> None:
+    """
+    Answers parses of content seen before, in any repository, from the on-disk cache of --parse-cache.
+    """
+    if getattr(args, 'parse_cache', None):
+        import parse_cache
+        max_bytes = args.parse_cache_max_bytes or parse_cache.DEFAULT_MAX_BYTES
+        parse_cache.configure(parse_cache.ParseCache(args.parse_cache, max_bytes))
+
+
+def print_cache_reports(args) -> None:
+    # Standard output may be the results themselves, so the summaries go to standard error
+    if getattr(args, 'parse_cache', None):
+        import parse_cache
+        print(parse_cache.describe_report(parse_cache.get_cache().report()), file=sys.stderr)
+    if getattr(args, 'http_cache', None):
+        import http_client
+        from http_cache import describe_report
+        print(describe_report(http_client.get_stats()['cache']), file=sys.stderr)
+
+
+def run_tree(args) -> int:
+    """
+    Prints or writes the directory structure.
+    """
+    import repo_directory_structure as structure_module
+    if os.path.isdir(args.repo):
+        structure = structure_module.fetch_directory_structure_from_local(args.repo, ref=args.ref)
+    else:
+        owner, repo, path = structure_module.extract_github_details(args.repo)
+        if args.contents:
+            structure = structure_module.iter_directory_structure_from_github(owner, repo, path, args.token)
+        else:
+            structure = structure_module.fetch_directory_structure_from_tree(owner, repo, path, args.token,
+                                                                             args.ref or 'HEAD')
+    if args.output:
+        structure_module.write_directory_structure_to_file(structure, args.output)
+        print(f"Directory structure written to {args.output}")
+    else:
+        for line in structure:
+            print(line)
+    return 0
+
+
+def run_analyze(args) -> int:
+    """
+    Categorizes the repository's classes, functions and endpoints as main.py does.
+    """
+    import main as categorizer
+    configure_categories(args)
+    if os.path.isdir(args.repo):
+        categorizer.write_results(categorizer.categorize_local_repository(args.repo, args.ref, args.workers),
+                                  args.output)
+        return 0
+
+    import shutil
+    if args.pipeline:
+        import tempfile
+        from repo_clone import clone_for_streaming
+        repo_path = tempfile.mkdtemp(prefix='stream_')
+        try:
+            clone_for_streaming(args.repo, repo_path, args.token, args.ref)
+            categorized_items = categorizer.categorize_streamed_symbols(repo_path, args.ref).to_dict()
+        finally:
+            shutil.rmtree(repo_path, ignore_errors=True)
+        categorizer.write_results(categorized_items, args.output)
+        return 0
+
+    repo_path = categorizer.clone_repo(args.repo, args.token, args.strategy, args.mirror_cache)
+    try:
+        if args.state_dir:
+            from incremental import IncrementalRun, state_file
+            incremental = IncrementalRun(repo_path, state_file(args.state_dir, args.repo, 'categorize_items'),
+                                         categorizer.ANALYZER_VERSION)
+            categorized_items = categorizer.categorize_items(repo_path, incremental, args.workers, exclude=args.exclude)
+            incremental.save()
+        else:
+            categorized_items = categorizer.categorize_items(repo_path, workers=args.workers, exclude=args.exclude)
+    finally:
+        shutil.rmtree(repo_path, ignore_errors=True)
+    categorizer.write_results(categorized_items, args.output)
+    return 0
+
+
+def run_report(args) -> int:
+    """
+    Writes the directory structure followed by details of the important files, as repo_reader.py does.
+    """
+    # repo_reader.py lives one level up, at the repository root
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.append(root)
+    import repo_reader
+    output_file = repo_reader.write_report(args.repo, args.token, args.output, args.ref, args.concurrency,
+                                           args.pipeline)
+    print(f"Directory structure and details written to {output_file}")
+    return 0
+
+
+def run_store(args) -> int:
+    """
+    Analyzes the repository and stores the result as a new run in the SQLite database.
+    """
+    import shutil
+    import subprocess
+    import tempfile
+    from incremental import head_commit
+    from repository_db import close_connections, store_analysis_run
+
+    # Symbol tables are stored with the file of every symbol, so later diffs can tell moves apart
+    if args.analyzer == 'categories':
+        configure_categories(args)
+        from main import categorize_local_symbols as analyze, categorize_streamed_symbols as analyze_streamed
+    else:
+        from repo_analyzer import parse_local_symbols as analyze, parse_streamed_symbols as analyze_streamed
+
+    temp_dir = None
+    repo_path = args.repo
+    if not os.path.isdir(repo_path):
+        temp_dir = repo_path = tempfile.mkdtemp(prefix='store_')
+    try:
+        if temp_dir and args.pipeline:
+            from repo_clone import clone_for_streaming
+            clone_for_streaming(args.repo, temp_dir, args.token, args.ref)
+            result = analyze_streamed(repo_path, args.ref)
+        else:
+            if temp_dir:
+                from repo_clone import clone_with_strategy
+                clone_with_strategy(args.repo, temp_dir, args.strategy, args.token, args.mirror_cache)
+            result = analyze(repo_path, args.ref, args.workers)
+        try:
+            commit_sha = head_commit(repo_path, args.ref or 'HEAD')
+        except subprocess.CalledProcessError:
+            commit_sha = None
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    # Local paths are stored by absolute path, as the batch driver does
+    repo_url = os.path.abspath(args.repo) if temp_dir is None else args.repo
+    run_id = store_analysis_run(repo_url, result, commit_sha, args.db)
+    close_connections()
+    print(f"Stored {args.repo} as run {run_id}")
+    return 0
+
+
+def run_routes(args) -> int:
+    """
+    Prints or writes the resolved route table: Django include() chains, DRF routers, Flask and FastAPI routes.
+    """
+    import routes
+    if os.path.isdir(args.repo):
+        table = routes.local_route_table(args.repo, args.ref, args.workers)
+        lines = [routes.format_route(route) for route in table]
+    else:
+        import shutil
+        from main import clone_repo
+        repo_path = clone_repo(args.repo, args.token, args.strategy, args.mirror_cache)
+        try:
+            if args.state_dir:
+                from incremental import IncrementalRun, state_file
+                incremental = IncrementalRun(repo_path, state_file(args.state_dir, args.repo, 'routes'),
+                                             routes.ROUTES_VERSION)
+                table = routes.build_route_table(repo_path, incremental, args.workers)
+                incremental.save()
+            else:
+                table = routes.build_route_table(repo_path, workers=args.workers)
+            lines = [routes.format_route(route) for route in table]
+        finally:
+            shutil.rmtree(repo_path, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.writelines(f"{line}\n" for line in lines)
+        print(f"{len(lines)} routes written to {args.output}")
+    else:
+        for line in lines:
+            print(line)
+    return 0
+
+
+def run_diff(args) -> int:
+    """
+    Prints the symbols added, removed or moved between two stored runs, by category.
+    """
+    from repository_db import close_connections, diff_runs, format_diff, latest_run_id, previous_run_id
+
+    def run_of(repo: str, commit_sha: str = None) -> int:
+        # Local paths are stored by absolute path, as store does
+        repo_url = os.path.abspath(repo) if os.path.isdir(repo) else repo
+        run_id = latest_run_id(repo_url, args.db, commit_sha)
+        if run_id is None:
+            raise ValueError(f"No stored run of {repo}" + (f" at {commit_sha}" if commit_sha else ''))
+        return run_id
+
+    head = run_of(args.repo, args.head)
+    if args.against:
+        base = run_of(args.against, args.base)
+    elif args.base:
+        base = run_of(args.repo, args.base)
+    else:
+        base = previous_run_id(head, args.db)
+    lines = format_diff(diff_runs(base, head, args.db))
+    close_connections()
+    for line in lines:
+        print(line)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Analyze GitHub repositories and local checkouts.")
+    parser.add_argument('--profile', help="write per-stage and per-file timings to this JSON file")
+    parser.add_argument('--cprofile', help="also write a cProfile dump to this file")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="also trace peak memory per stage (slows the profiled run down)")
+    subparsers = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    def add_command(name: str, handler, help: str) -> argparse.ArgumentParser:
+        command = subparsers.add_parser(name, help=help, description=help)
+        command.add_argument('repo', help="GitHub repository URL, or path of a local checkout or bare repository")
+        command.add_argument('--token', default=os.environ.get('GITHUB_TOKEN'),
+                             help="GitHub access token (default: $GITHUB_TOKEN)")
+        command.add_argument('--ref', help="commit, branch or tag to read (local repositories and tree)")
+        command.set_defaults(handler=handler)
+        return command
+
+    def add_http_cache_options(command: argparse.ArgumentParser) -> None:
+        command.add_argument('--http-cache', help="directory of GitHub responses revalidated instead of re-downloaded")
+        command.add_argument('--http-cache-ttl', type=float, default=None,
+                             help="seconds a cached response is kept (default: 7 days)")
+        command.add_argument('--http-cache-max-bytes', type=int, default=None,
+                             help="evict the least recently used responses past this size (default: 256 MiB)")
+
+    def add_parse_cache_options(command: argparse.ArgumentParser) -> None:
+        command.add_argument('--parse-cache', help="directory of parse results shared across repositories and runs")
+        command.add_argument('--parse-cache-max-bytes', type=int, default=None,
+                             help="evict the least recently used parse results past this size (default: 128 MiB)")
+
+    def add_clone_options(command: argparse.ArgumentParser, pipeline: bool = True) -> None:
+        command.add_argument('--strategy', default='shallow', help="clone strategy (full, shallow, blobless, sparse)")
+        command.add_argument('--mirror-cache', help="directory of bare mirrors reused across runs")
+        command.add_argument('--workers', type=int, default=None, help="parse in this many processes")
+        command.add_argument('--max-file-size', type=int, default=None,
+                             help="skip source files larger than this many bytes (default: 2 MiB)")
+        add_parse_cache_options(command)
+        if pipeline:
+            command.add_argument('--pipeline', action='store_true',
+                                 help="parse files while they download instead of after the clone (repository URLs)")
+
+    tree = add_command('tree', run_tree, "Print or write the directory structure.")
+    tree.add_argument('--output', '-o', help="write to this file instead of standard output")
+    tree.add_argument('--contents', action='store_true',
+                      help="crawl the Contents API one directory at a time instead of one Git Trees request")
+    add_http_cache_options(tree)
+
+    analyze = add_command('analyze', run_analyze, "Categorize models, views, serializers and the other Django items.")
+    analyze.add_argument('--output', '-o', help="write to this file instead of standard output")
+    analyze.add_argument('--state-dir', help="re-parse only files changed since the last run recorded here")
+    analyze.add_argument('--exclude', action='append', help="gitignore-style glob to skip (repeatable)")
+    analyze.add_argument('--categories', help="JSON file of category rules tried before the defaults")
+    add_clone_options(analyze)
+
+    report = add_command('report', run_report, "Write the directory structure and details of its important files.")
+    report.add_argument('--output', '-o', help="report file (default: <repo>_directory_structure.txt)")
+    report.add_argument('--concurrency', type=int, default=None, help="download files with this many requests in flight")
+    report.add_argument('--pipeline', action='store_true',
+                        help="download and render important files while the directory crawl is still running")
+    add_http_cache_options(report)
+    add_parse_cache_options(report)
+
+    store = add_command('store', run_store, "Analyze the repository and store the result in the database.")
+    store.add_argument('--db', help="SQLite database file (default: repository_db.DB_FILE)")
+    store.add_argument('--analyzer', default='symbols', choices=['symbols', 'categories'],
+                       help="repo_analyzer's classes, functions and endpoints, or main's Django categories")
+    store.add_argument('--categories',
+                       help="JSON file of category rules tried before the defaults (categories analyzer)")
+    add_clone_options(store)
+
+    routes = add_command('routes', run_routes,
+                         "List every endpoint with include() chains and router prefixes resolved.")
+    routes.add_argument('--output', '-o', help="write to this file instead of standard output")
+    routes.add_argument('--state-dir', help="re-parse only files changed since the last run recorded here")
+    add_clone_options(routes, pipeline=False)
+
+    diff = add_command('diff', run_diff, "Show the symbols added, removed or moved between two stored runs.")
+    diff.add_argument('--db', help="SQLite database file (default: repository_db.DB_FILE)")
+    diff.add_argument('--head', help="commit of the newer run (default: the latest run)")
+    diff.add_argument('--base', help="commit of the older run (default: the run stored before the newer one)")
+    diff.add_argument('--against', help="take the older run from this repository instead")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.repo) and '://' not in args.repo:
+        parser.error(f"{args.repo} is neither a local directory nor a repository URL")
+    if args.profile or args.cprofile:
+        import profiling
+        if args.profile:
+            os.environ[profiling.PROFILE_ENV] = args.profile
+        if args.cprofile:
+            os.environ[profiling.CPROFILE_ENV] = args.cprofile
+        if args.profile_memory:
+            os.environ[profiling.MEMORY_ENV] = '1'
+        profiling.enable_from_environment()
+    try:
+        configure_http_cache(args)
+        configure_parse_cache(args)
+        # Only the commands that parse files take --max-file-size and report what they skipped
+        if not hasattr(args, 'max_file_size'):
+            status = args.handler(args)
+        else:
+            import file_ingest
+            if args.max_file_size is not None:
+                file_ingest.configure(max_size=args.max_file_size)
+            with file_ingest.counting() as counts:
+                status = args.handler(args)
+            # Standard output may be the results themselves, so the summary goes to standard error
+            file_ingest.print_counts(counts, sys.stderr)
+        print_cache_reports(args)
+        return status
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
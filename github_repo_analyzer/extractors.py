@@ -0,0 +1,235 @@
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Result keys every extractor fills, in the order parse_files returns them
+RESULT_KEYS = ('classes', 'functions', 'endpoints')
+
+# Literals and comments for each family of languages; declarations inside them are never reported.
+# String bodies are written as unrolled loops (runs of plain characters between escapes), which keeps the regex fast
+PYTHON_SKIP = (r'#[^\n]*'
+               r'|"""[^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*"""'
+               r"|'''[^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*'''"
+               r'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+               r"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'")
+C_COMMENTS = r'//[^\n]*|/\*[\s\S]*?\*/'
+C_STRINGS = r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"' + r"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+JAVA_SKIP = C_COMMENTS + r'|"""[\s\S]*?"""|' + C_STRINGS
+JS_SKIP = C_COMMENTS + r'|`[^`\\]*(?:\\[\s\S][^`\\]*)*`|' + C_STRINGS
+GO_SKIP = C_COMMENTS + r'|`[^`]*`|' + C_STRINGS
+
+# Bracket tokens, for following line continuations in indentation-scoped languages
+OPENING_BRACKETS = ('(', '[', '{')
+CLOSING_BRACKETS = (')', ']', '}')
+
+class Rule(NamedTuple):
+    key: str
+    kind: str
+    # Anchored at a line start with ^; the symbol is the `name` group, an optional `owner` group qualifies it
+    pattern: str
+    # 'any', or 'body' for declarations that only count directly inside a class body (methods)
+    scope: str = 'any'
+    # 'class' or 'function' if the declaration's body is a scope of its own
+    opens: Optional[str] = None
+
+class Extractor:
+    """
+    Extracts classes, functions and endpoints from one language's source in a single pass.
+
+    Every rule and the language's string and comment syntax are compiled into one
+    alternation scanned with finditer, so literals and comments are consumed as
+    whole tokens and nothing inside them is mistaken for a declaration. Scopes are
+    followed through braces or indentation (scoping='braces' or 'indent') to
+    build qualified names and to keep body-only rules to class bodies; with
+    indentation, every line holding code closes the scopes indented as deep as
+    it or deeper, whether or not it declares anything, unless it continues a
+    bracketed expression.
+
+    Rules match from the newline before their line rather than from ^, so every
+    alternative starts with a literal character and the regex engine can skip
+    straight over text that cannot start a token.
+    """
+
+    def __init__(self, language: str, extensions: Sequence[str], rules: Sequence[Rule], skip: str,
+                 scoping: Optional[str] = None):
+        self.language = language
+        self.extensions = tuple(extensions)
+        self.rules = tuple(rules)
+        self.scoping = scoping
+        alternatives = []
+        for index, rule in enumerate(self.rules):
+            pattern = re.sub(r'\(\?P<(\w+)>', lambda m: f"(?P<r{index}_{m.group(1)}>", rule.pattern)
+            alternatives.append(f"\\n(?P<r{index}>{pattern[1:]})")
+        if scoping == 'braces':
+            alternatives.append(r'\{|\}|;')
+        elif scoping == 'indent':
+            # Any other line of code, so a dedented if/try/except closes the def or class above it, and the
+            # brackets that make lines inside them (such as a signature's closing '):') continuation lines
+            alternatives.append(r'\n(?P<dedent>[ \t]*)(?=[^\s#)\]}])|[()\[\]{}]')
+        # Braces, literals and comments capture no group, so their matches have no lastgroup
+        alternatives.append(skip)
+        self.regex = re.compile('|'.join(alternatives))
+        groups = self.regex.groupindex
+        self._groups = {f"r{index}": (rule, f"r{index}_name", f"r{index}_owner" if f"r{index}_owner" in groups else None,
+                                      f"r{index}_indent" if f"r{index}_indent" in groups else None)
+                        for index, rule in enumerate(self.rules)}
+
+    def extract(self, content: str) -> Dict[str, List[Tuple[str, str, str, int]]]:
+        """
+        Returns (kind, name, qualname, line) entries under each of RESULT_KEYS.
+        """
+        result = {key: [] for key in RESULT_KEYS}
+        # The leading newline lets a rule match on the first line; it is counted as line 1 starting
+        content = '\n' + content
+        line, position = 0, 0
+        # Open scopes as (kind, name, indent); braces push one per '{', indentation one per class or def
+        scopes: List[Tuple[Optional[str], Optional[str], int]] = []
+        pending = None
+        # Brackets open around the current position, for indentation scoping
+        depth = 0
+        indented = self.scoping == 'indent'
+        for match in self.regex.finditer(content):
+            group = match.lastgroup
+            if group == 'dedent':
+                indent = len(match.group(group))
+                while not depth and scopes and scopes[-1][2] >= indent:
+                    scopes.pop()
+                continue
+            if group is None:
+                token = match.group()
+                if indented:
+                    if token in OPENING_BRACKETS:
+                        depth += 1
+                    elif token in CLOSING_BRACKETS and depth:
+                        depth -= 1
+                elif token == '{':
+                    scopes.append(pending or (None, None, 0))
+                    pending = None
+                elif token == '}':
+                    if scopes:
+                        scopes.pop()
+                elif token == ';':
+                    pending = None
+                continue
+
+            rule, name_group, owner_group, indent_group = self._groups[group]
+            indent = len(match.group(indent_group)) if indent_group else 0
+            if indented:
+                # A rule may consume an opening bracket, as @app.route( does
+                text = match.group()
+                depth += sum(map(text.count, OPENING_BRACKETS)) - sum(map(text.count, CLOSING_BRACKETS))
+                while scopes and scopes[-1][2] >= indent:
+                    scopes.pop()
+            if rule.scope == 'body' and not (scopes and scopes[-1][0] == 'class'):
+                continue
+
+            name = match.group(name_group)
+            if rule.key == 'endpoints':
+                # Routes are not qualified by the code around them
+                qualname = name
+            else:
+                owner = match.group(owner_group) if owner_group else None
+                parts = [f"{scope_name}.<locals>" if kind == 'function' else scope_name
+                         for kind, scope_name, _ in scopes if scope_name]
+                qualname = '.'.join(parts + ([owner] if owner else []) + [name])
+
+            line += content.count('\n', position, match.start(name_group))
+            position = match.start(name_group)
+            result[rule.key].append((rule.kind, name, qualname, line))
+
+            if rule.opens:
+                if indented:
+                    scopes.append((rule.opens, name, indent))
+                elif self.scoping == 'braces':
+                    pending = (rule.opens, name, 0)
+        return result
+
+    def names(self, content: str) -> Dict[str, List[str]]:
+        return {key: [entry[1] for entry in entries] for key, entries in self.extract(content).items()}
+
+PYTHON = Extractor('Python', ['.py', '.pyw'], [
+    Rule('classes', 'class', r'^(?P<indent>[ \t]*)class[ \t]+(?P<name>\w+)', opens='class'),
+    Rule('functions', 'function', r'^(?P<indent>[ \t]*)(?:async[ \t]+)?def[ \t]+(?P<name>\w+)', opens='function'),
+    Rule('endpoints', 'endpoint', r'''^(?P<indent>[ \t]*)@app\.route\(\s*['"](?P<name>[^'"\n]+)['"]'''),
+], PYTHON_SKIP, scoping='indent')
+
+JAVA_MODIFIERS = r'(?:(?:public|protected|private|static|final|abstract|sealed|non-sealed|strictfp|synchronized|native|default|transient|volatile)[ \t]+)*'
+
+JAVA = Extractor('Java', ['.java'], [
+    Rule('endpoints', 'endpoint',
+         r'^[ \t]*@(?:Get|Post|Put|Delete|Patch|Request)Mapping\(\s*(?:(?:value|path)\s*=\s*)?\{?\s*"(?P<name>[^"\n]*)"'),
+    Rule('classes', 'class', r'^[ \t]*' + JAVA_MODIFIERS + r'(?:class|interface|enum|record|@interface)\s+(?P<name>[\w$]+)',
+         opens='class'),
+    Rule('functions', 'function',
+         r'^[ \t]*(?:@[\w.]+(?:\([^)\n]*\))?[ \t]+)*' + JAVA_MODIFIERS + r'(?:<[^>\n]*>[ \t]+)?'
+         r'(?!(?:return|new|throw|else|case|yield)\b)[\w$.]+(?:<[^\n;(){}]*>)?(?:\[\])*[ \t]+(?P<name>[\w$]+)[ \t]*\(',
+         scope='body', opens='function'),
+    # Constructors: a capitalized name and its parameters, with no return type
+    Rule('functions', 'function', r'^[ \t]*(?:(?:public|protected|private)[ \t]+)?(?P<name>[A-Z][\w$]*)[ \t]*\(',
+         scope='body', opens='function'),
+], JAVA_SKIP, scoping='braces')
+
+JS_RULES = [
+    Rule('endpoints', 'endpoint',
+         r'''^[ \t]*(?:app|router|server)\.(?:get|post|put|delete|patch|all|options|head)\(\s*['"`](?P<name>[^'"`\n]*)['"`]'''),
+    Rule('classes', 'class', r'^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:declare[ \t]+)?(?:abstract[ \t]+)?'
+                             r'class[ \t]+(?P<name>[\w$]+)', opens='class'),
+    Rule('functions', 'function', r'^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:declare[ \t]+)?(?:async[ \t]+)?'
+                                  r'function[ \t]*\*?[ \t]*(?P<name>[\w$]+)', opens='function'),
+    Rule('functions', 'function', r'^[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+(?P<name>[\w$]+)[ \t]*(?::[^=\n]+)?=[ \t]*'
+                                  r'(?:async[ \t]+)?(?:function\b|(?:\([^()\n]*\)|[\w$]+)[ \t]*(?::[^=\n]+)?=>)',
+         opens='function'),
+    Rule('functions', 'function',
+         r'^[ \t]*(?:(?:public|private|protected|static|readonly|abstract|override|async|get|set)[ \t]+)*\*?'
+         r'(?!(?:if|for|while|switch|catch|with|return|function)\b)(?P<name>[\w$#]+)[ \t]*(?:<[^>\n]*>)?[ \t]*\(',
+         scope='body', opens='function'),
+]
+
+JAVASCRIPT = Extractor('JavaScript', ['.js', '.jsx', '.mjs', '.cjs'], JS_RULES, JS_SKIP, scoping='braces')
+TYPESCRIPT = Extractor('TypeScript', ['.ts', '.tsx'], JS_RULES, JS_SKIP, scoping='braces')
+
+GO = Extractor('Go', ['.go'], [
+    Rule('endpoints', 'endpoint', r'^[ \t]*[\w.]+\.(?:HandleFunc|Handle|GET|POST|PUT|DELETE|PATCH|Get|Post|Put|Delete|Patch)'
+                                  r'\(\s*"(?P<name>[^"\n]*)"'),
+    Rule('classes', 'class', r'^type[ \t]+(?P<name>\w+)(?:\[[^\]\n]*\])?[ \t]+(?:struct|interface)\b'),
+    # Methods are qualified with their receiver's type
+    Rule('functions', 'function', r'^func[ \t]+(?:\([ \t]*(?:\w+[ \t]+)?\*?[ \t]*(?P<owner>\w+)(?:\[[^\]\n]*\])?[ \t]*\)[ \t]*)?'
+                                  r'(?P<name>\w+)'),
+], GO_SKIP)
+
+# Extension (with its dot) -> extractor
+EXTRACTORS: Dict[str, Extractor] = {}
+
+def register(extractor: Extractor) -> Extractor:
+    """
+    Makes extractor handle its extensions, replacing whichever extractor handled them before.
+    """
+    for extension in extractor.extensions:
+        EXTRACTORS[extension] = extractor
+    return extractor
+
+for _extractor in (PYTHON, JAVA, JAVASCRIPT, TYPESCRIPT, GO):
+    register(_extractor)
+
+def extractor_for(path: str) -> Optional[Extractor]:
+    return EXTRACTORS.get(os.path.splitext(path)[1])
+
+def languages_for_extensions(extensions: Iterable[str]) -> List[str]:
+    """
+    Returns the languages with a registered extractor among extensions, once each, in first-seen order.
+    """
+    languages = []
+    for extension in extensions:
+        extractor = EXTRACTORS.get(extension)
+        if extractor is not None and extractor.language not in languages:
+            languages.append(extractor.language)
+    return languages
+
+def extract(path: str, content: str) -> Dict[str, List[Tuple[str, str, str, int]]]:
+    """
+    Extracts symbols with the extractor registered for path's extension; other files have none.
+    """
+    extractor = extractor_for(path)
+    if extractor is None:
+        return {key: [] for key in RESULT_KEYS}
+    return extractor.extract(content)
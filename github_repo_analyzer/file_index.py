@@ -0,0 +1,216 @@
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+import profiling
+
+# Directory names never descended into: VCS metadata, dependency trees, virtualenvs and vendored code
+PRUNED_DIRECTORIES = frozenset({
+    '.git', '.hg', '.svn', 'node_modules', 'bower_components', '__pycache__', '.tox', '.nox',
+    '.mypy_cache', '.pytest_cache', 'venv', '.venv', 'virtualenv', 'site-packages', 'vendor', 'third_party',
+})
+
+class FileEntry(NamedTuple):
+    path: str
+    relpath: str
+    size: int
+    extension: str
+
+class IgnoreRule(NamedTuple):
+    base: str
+    regex: re.Pattern
+    negated: bool
+    dir_only: bool
+    anchored: bool
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translates a gitignore glob into a regular expression over '/'-separated paths.
+
+    The expression is not anchored; callers match it with fullmatch. Ignore rules
+    and categories' path rules are both built from it.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                i += 2
+                if pattern.startswith('/', i):
+                    out.append('(?:.*/)?')
+                    i += 1
+                else:
+                    out.append('.*')
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            start = i + 1
+            if pattern[start:start + 1] in ('!', '^'):
+                start += 1
+            if pattern[start:start + 1] == ']':
+                start += 1
+            end = pattern.find(']', start)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+def compile_rules(lines: Iterable[str], base: str = '') -> List[IgnoreRule]:
+    """
+    Compiles gitignore lines into rules that apply below base (a '/'-separated path relative to the scan root).
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        if not line.endswith('\\ '):
+            line = line.rstrip(' ')
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        rules.append(IgnoreRule(base, re.compile(glob_to_regex(line.lstrip('/'))), negated, dir_only, anchored))
+    return rules
+
+def read_ignore_file(path: str, base: str = '') -> List[IgnoreRule]:
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            return compile_rules(file, base)
+    except OSError:
+        return []
+
+def is_ignored(rules: Sequence[IgnoreRule], relpath: str, is_dir: bool) -> bool:
+    """
+    Returns True if the last rule matching relpath excludes it, as git does.
+    """
+    name = relpath.rsplit('/', 1)[-1]
+    for rule in reversed(rules):
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.base:
+            if not relpath.startswith(rule.base + '/'):
+                continue
+            subject = relpath[len(rule.base) + 1:] if rule.anchored else name
+        else:
+            subject = relpath if rule.anchored else name
+        if rule.regex.fullmatch(subject):
+            return not rule.negated
+    return False
+
+class FileIndex:
+    """
+    Every file under a directory, found in one scan and shared by the steps that need to list files.
+    """
+
+    def __init__(self, root: str, entries: List[FileEntry]):
+        self.root = root
+        self.entries = entries
+        self.by_extension: Dict[str, List[FileEntry]] = {}
+        for entry in entries:
+            self.by_extension.setdefault(entry.extension, []).append(entry)
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def extensions(self) -> List[str]:
+        return list(self.by_extension)
+
+    def with_extension(self, extension: str) -> List[FileEntry]:
+        """
+        Returns the files with the given extension, in scan order.
+        """
+        return self.by_extension.get(extension, [])
+
+    def with_extensions(self, extensions: Iterable[str]) -> List[FileEntry]:
+        """
+        Returns the files with any of the given extensions, in scan order.
+        """
+        wanted = set(extensions)
+        return [entry for entry in self.entries if entry.extension in wanted]
+
+def _scan_directory(path: str) -> Tuple[List[os.DirEntry], List[os.DirEntry], bool]:
+    files, dirs = [], []
+    virtualenv = False
+    try:
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                try:
+                    if entry.is_dir():
+                        # Like os.walk, symlinked directories are not followed
+                        if not entry.is_symlink():
+                            dirs.append(entry)
+                    else:
+                        files.append(entry)
+                        if entry.name == 'pyvenv.cfg':
+                            virtualenv = True
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, dirs, virtualenv
+
+def scan_files(root: str, exclude: Sequence[str] = None, use_gitignore: bool = True,
+               prune: Iterable[str] = PRUNED_DIRECTORIES) -> FileIndex:
+    """
+    Indexes every file under root in a single os.scandir pass.
+
+    Directories named in prune, virtualenvs (anything holding a pyvenv.cfg) and
+    paths matched by .gitignore files or the exclude globs (gitignore syntax,
+    relative to root) are skipped before they are descended into. Files come out
+    in the same top-down order as os.walk.
+    """
+    prune = frozenset(prune)
+    # Later rules win: info/exclude, then .gitignore files from the root down, then the caller's globs
+    excluded = compile_rules(exclude or [])
+    inherited = read_ignore_file(os.path.join(root, '.git', 'info', 'exclude')) if use_gitignore else []
+
+    entries = []
+
+    def visit(path: str, prefix: str, inherited: List[IgnoreRule]) -> None:
+        files, dirs, virtualenv = _scan_directory(path)
+        if virtualenv and prefix:
+            return
+        if use_gitignore and any(f.name == '.gitignore' for f in files):
+            inherited = inherited + read_ignore_file(os.path.join(path, '.gitignore'), prefix.rstrip('/'))
+        rules = inherited + excluded
+        for entry in files:
+            relpath = prefix + entry.name
+            if rules and is_ignored(rules, relpath, False):
+                continue
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            entries.append(FileEntry(entry.path, relpath, size, os.path.splitext(entry.name)[1]))
+        for entry in dirs:
+            relpath = prefix + entry.name
+            if entry.name in prune or (rules and is_ignored(rules, relpath, True)):
+                continue
+            visit(entry.path, relpath + '/', inherited)
+
+    with profiling.stage('scan'):
+        visit(root, '', inherited)
+    return FileIndex(root, entries)
@@ -0,0 +1,148 @@
+import contextlib
+import io
+import mmap
+import os
+import tokenize
+from collections import Counter
+from typing import Dict, Iterator, NamedTuple, Optional, Union
+
+# Files larger than this are skipped: they are generated code, data dumps or minified bundles, not something to parse
+DEFAULT_MAX_FILE_SIZE = 2 * 1024 * 1024
+# Files at least this large are decoded straight from a memory map instead of being read into a bytes copy first
+DEFAULT_MMAP_THRESHOLD = 256 * 1024
+# A NUL byte in this many leading bytes marks a file as binary, the same heuristic git uses
+DEFAULT_SNIFF_SIZE = 8000
+
+# Reasons a file is skipped, in the order they are reported
+SKIP_REASONS = ('too_large', 'binary', 'unreadable')
+
+class IngestLimits(NamedTuple):
+    max_size: int = DEFAULT_MAX_FILE_SIZE
+    mmap_threshold: int = DEFAULT_MMAP_THRESHOLD
+    sniff_size: int = DEFAULT_SNIFF_SIZE
+
+_limits = IngestLimits()
+_counts = Counter()
+
+def configure(max_size: int = None, mmap_threshold: int = None, sniff_size: int = None) -> IngestLimits:
+    """
+    Sets the process-wide limits; arguments left as None keep their current value.
+    """
+    global _limits
+    _limits = IngestLimits(
+        _limits.max_size if max_size is None else max_size,
+        _limits.mmap_threshold if mmap_threshold is None else mmap_threshold,
+        _limits.sniff_size if sniff_size is None else sniff_size,
+    )
+    return _limits
+
+def get_limits() -> IngestLimits:
+    return _limits
+
+def get_counts() -> Dict[str, int]:
+    return dict(_counts)
+
+def record(reason: str) -> None:
+    _counts[reason] += 1
+
+def merge_counts(counts: Dict[str, int]) -> None:
+    """
+    Adds counts recorded elsewhere, such as in a worker process, to this process's counts.
+    """
+    _counts.update(counts)
+
+@contextlib.contextmanager
+def counting() -> Iterator[Counter]:
+    """
+    Counts the files skipped or decoded with replacement characters inside the block.
+
+    The yielded Counter keeps its figures after the block ends; they are also
+    added to any enclosing counting() block.
+    """
+    global _counts
+    outer, _counts = _counts, Counter()
+    counts = _counts
+    try:
+        yield counts
+    finally:
+        outer.update(counts)
+        _counts = outer
+
+def describe_counts(counts: Dict[str, int]) -> str:
+    """
+    Returns a one-line summary such as 'Skipped 3 files: 2 too large, 1 binary', or '' if nothing happened.
+    """
+    parts = []
+    skipped = sum(counts.get(reason, 0) for reason in SKIP_REASONS)
+    if skipped:
+        reasons = ', '.join(f"{counts[reason]} {reason.replace('_', ' ')}"
+                            for reason in SKIP_REASONS if counts.get(reason))
+        parts.append(f"Skipped {skipped} file{'s' if skipped != 1 else ''}: {reasons}")
+    if counts.get('replaced'):
+        parts.append(f"decoded {counts['replaced']} with replacement characters")
+    return '; '.join(parts)
+
+def print_counts(counts: Dict[str, int], file=None) -> None:
+    summary = describe_counts(counts)
+    if summary:
+        print(summary, file=file)
+
+def is_binary(data: Union[bytes, mmap.mmap]) -> bool:
+    return data.find(b'\0', 0, _limits.sniff_size) != -1
+
+def decode_source(data: Union[bytes, mmap.mmap]) -> str:
+    """
+    Decodes source bytes the way Python would: a UTF-8 BOM or a PEP 263 coding cookie wins, UTF-8 otherwise.
+
+    Content that does not decode is decoded as UTF-8 with replacement characters
+    and counted, so one mis-encoded file cannot abort a whole run.
+    """
+    try:
+        # Only the first two lines are read; a bounded prefix keeps that true for a file without newlines
+        encoding, _ = tokenize.detect_encoding(io.BytesIO(data[:1024]).readline)
+    except SyntaxError:
+        # An unknown coding cookie, or a cookie that contradicts the BOM
+        encoding = 'utf-8'
+    try:
+        return str(data, encoding)
+    except UnicodeDecodeError:
+        record('replaced')
+        return str(data, 'utf-8-sig', 'replace')
+
+def ingest_bytes(data: bytes) -> Optional[str]:
+    """
+    Returns the text of content that is worth parsing, or None (and counts why) if it is too large or binary.
+    """
+    if len(data) > _limits.max_size:
+        record('too_large')
+        return None
+    if is_binary(data):
+        record('binary')
+        return None
+    return decode_source(data)
+
+def read_source(path: str) -> Optional[str]:
+    """
+    Reads a file's text if it is worth parsing, or returns None (and counts why) if it is not.
+
+    The size is checked before anything is read. Files of at least the mmap
+    threshold are sniffed and decoded from a memory map, so their bytes are
+    never copied into a Python object on the way to the decoded text.
+    """
+    limits = _limits
+    try:
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size > limits.max_size:
+                record('too_large')
+                return None
+            if size == 0 or size < limits.mmap_threshold:
+                return ingest_bytes(file.read())
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if is_binary(mapped):
+                    record('binary')
+                    return None
+                return decode_source(mapped)
+    except OSError:
+        record('unreadable')
+        return None
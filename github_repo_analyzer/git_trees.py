@@ -0,0 +1,74 @@
+from typing import List, Dict
+
+# GitHub API endpoint for git trees
+github_trees_url = "https://api.github.com/repos/{owner}/{repo}/git/trees/{sha}"
+
+# Git tree entry types mapped onto the item types reported by the Contents API
+# (submodules show up as "file" in Contents API directory listings)
+TREE_ENTRY_TYPES = {'tree': 'dir', 'blob': 'file', 'commit': 'file'}
+
+def fetch_tree(owner: str, repo: str, sha: str = 'HEAD', access_token: str = None, recursive: bool = True) -> Dict:
+    """
+    Fetches a single git tree object, optionally with all of its descendants.
+    """
+    # Imported here so local-only callers of build_directory_listings never load requests
+    import http_client
+
+    headers = {}
+    if access_token:
+        headers['Authorization'] = f"token {access_token}"
+
+    url = github_trees_url.format(owner=owner, repo=repo, sha=sha)
+    params = {'recursive': '1'} if recursive else None
+    response = http_client.get(url, headers=headers, params=params)
+
+    if response.status_code == 200:
+        return response.json()
+    else:
+        raise ValueError(f"Failed to fetch repository tree: {response.status_code} - {response.json().get('message', 'Unknown error')}")
+
+def fetch_tree_entries(owner: str, repo: str, sha: str = 'HEAD', access_token: str = None, prefix: str = '') -> List[Dict]:
+    """
+    Fetches every entry below a tree with as few requests as possible.
+
+    A single recursive call covers the whole tree unless GitHub truncates the
+    response; in that case the tree is listed one level at a time and each
+    subtree is fetched recursively on its own.
+    """
+    tree = fetch_tree(owner, repo, sha, access_token)
+    if not tree.get('truncated'):
+        return [dict(entry, path=prefix + entry['path']) for entry in tree['tree']]
+
+    entries = []
+    for entry in fetch_tree(owner, repo, sha, access_token, recursive=False)['tree']:
+        entry = dict(entry, path=prefix + entry['path'])
+        entries.append(entry)
+        if entry['type'] == 'tree':
+            entries.extend(fetch_tree_entries(owner, repo, entry['sha'], access_token, entry['path'] + '/'))
+    return entries
+
+def build_directory_listings(entries: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Groups flat tree entries into per-directory listings shaped like Contents API responses.
+    """
+    listings = {'': []}
+    for entry in entries:
+        if entry['type'] == 'tree':
+            listings.setdefault(entry['path'], [])
+
+    for entry in entries:
+        item_type = TREE_ENTRY_TYPES.get(entry['type'])
+        if item_type is None:
+            continue
+        parent, _, name = entry['path'].rpartition('/')
+        listings.setdefault(parent, []).append({'name': name, 'path': entry['path'], 'type': item_type})
+    return listings
+
+def fetch_directory_listings(owner: str, repo: str, path: str = '', access_token: str = None, ref: str = 'HEAD') -> Dict[str, List[Dict]]:
+    """
+    Fetches the listings of every directory in the repository from the Git Trees API.
+    """
+    listings = build_directory_listings(fetch_tree_entries(owner, repo, ref, access_token))
+    if path.strip('/') not in listings:
+        raise ValueError("Failed to fetch directory structure: 404 - Not Found")
+    return listings
@@ -1,4 +1,4 @@
-import requests
+import http_client
 
 github_api_url = "https://api.github.com/repos/{owner}/{repo}/contents/{path}"
 
@@ -21,7 +21,7 @@ def fetch_repository_contents(owner, repo, path='', access_token=None):
         headers['Authorization'] = f"token {access_token}"
 
     url = github_api_url.format(owner=owner, repo=repo, path=path)
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
 
     if response.status_code == 200:
         contents = response.json()
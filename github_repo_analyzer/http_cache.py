@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+from typing import Dict, Optional
+
+# Default on-disk location and limits for cached responses
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'repo_analyzer')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# Once over the cap, least recently used entries are evicted until the cache is back under this fraction of it
+EVICT_TO = 0.9
+# Entries fetched per query while evicting
+EVICT_BATCH = 256
+
+# Response headers that describe the connection rather than the resource
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-encoding', 'content-length'}
+
+class ResponseCache:
+    """
+    On-disk cache of GitHub responses revalidated with conditional requests.
+
+    Responses carrying an ETag or Last-Modified header are stored in SQLite,
+    keyed by URL, query parameters and a hash of the Authorization header so
+    different tokens never share entries. Later requests send If-None-Match /
+    If-Modified-Since and a 304 is answered from disk. Entries older than the
+    TTL are dropped, and the least recently used entries are evicted once the
+    cache grows past max_bytes, until it is back under EVICT_TO of it.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL):
+        cache_dir = os.path.expanduser(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'http_cache.sqlite')
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'saved_bytes': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+        # Running size of the cache, so storing a response does not sum the whole table
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def cache_key(url: str, headers: Dict[str, str] = None, params: Dict[str, str] = None) -> str:
+        """
+        Builds the cache key from the request URL, its parameters and the auth scope.
+        """
+        authorization = (headers or {}).get('Authorization')
+        scope = hashlib.sha256(authorization.encode('utf-8')).hexdigest() if authorization else 'anonymous'
+        query = json.dumps(sorted((params or {}).items()))
+        return hashlib.sha256(f"{scope}\n{url}\n{query}".encode('utf-8')).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Returns the stored entry for key, or None if it is missing or past its TTL.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, headers, body, size, stored_at FROM responses WHERE key=?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[6] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key=?", (key,))
+                self._conn.commit()
+                self._total -= row[5]
+                return None
+        return {'key': key, 'url': row[0], 'etag': row[1], 'last_modified': row[2],
+                'headers': json.loads(row[3]), 'body': row[4], 'size': row[5]}
+
+    @staticmethod
+    def conditional_headers(entry: Dict) -> Dict[str, str]:
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def resolve(self, key: str, entry: Optional[Dict], response: requests.Response) -> requests.Response:
+        """
+        Serves a 304 from the stored entry, or stores a fresh 200 that can be revalidated later.
+        """
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                self.stats['hits'] += 1
+                self.stats['saved_bytes'] += entry['size']
+                self._conn.execute("UPDATE responses SET accessed_at=? WHERE key=?", (time.time(), key))
+                self._conn.commit()
+            return self._build_response(entry, response)
+
+        with self._lock:
+            self.stats['misses'] += 1
+        if response.status_code == 200:
+            self._store(key, response)
+        return response
+
+    def _store(self, key: str, response: requests.Response) -> None:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        body = response.content
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS}
+        now = time.time()
+        with self._lock:
+            replaced = self._conn.execute("SELECT size FROM responses WHERE key=?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, url, etag, last_modified, headers, body, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, etag, last_modified, json.dumps(headers), body, len(body), now, now))
+            self._total += len(body) - (replaced[0] if replaced else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until the cache is comfortably under max_bytes again. The table is
+        # summed first, since another process sharing the cache file may have changed it
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        target = self.max_bytes * EVICT_TO if total > self.max_bytes else total
+        while total > target:
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at LIMIT ?",
+                                      (EVICT_BATCH,)).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key=?", (key,))
+                self.stats['evictions'] += 1
+                total -= size
+                if total <= target:
+                    break
+        self._total = total
+
+    @staticmethod
+    def _build_response(entry: Dict, not_modified: requests.Response) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response._content = entry['body']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        # Rate-limit headers on the 304 are current, the stored ones are not
+        for name, value in not_modified.headers.items():
+            if name.lower().startswith('x-ratelimit-'):
+                response.headers[name] = value
+        response.url = entry['url']
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        response.from_cache = True
+        return response
+
+    def report(self) -> Dict[str, int]:
+        """
+        Returns hit, miss, saved-byte and eviction counters along with the current cache size.
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return dict(self.stats, entries=entries, size_bytes=size)
+
+def describe_report(report: Dict[str, int]) -> str:
+    """
+    Returns a one-line summary of report() such as 'HTTP cache: 40 hits, 2 misses, 1.3 MiB not downloaded ...'.
+    """
+    return (f"HTTP cache: {report['hits']} hits, {report['misses']} misses, "
+            f"{report['saved_bytes'] / 2 ** 20:.1f} MiB not downloaded, {report['evictions']} evicted; "
+            f"{report['entries']} entries, {report['size_bytes'] / 2 ** 20:.1f} MiB on disk")
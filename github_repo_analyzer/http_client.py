@@ -0,0 +1,198 @@
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional
+from http_cache import ResponseCache
+import profiling
+
+# Defaults for the shared HTTP client
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+DEFAULT_MAX_WAIT = 300.0
+# Start spreading requests out once fewer than this many remain in the rate-limit window
+DEFAULT_RATE_LIMIT_THRESHOLD = 10
+
+# Server-side failures that are worth retrying
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+
+class GitHubClient:
+    """
+    Pooled, keep-alive HTTP client shared by every module that talks to GitHub.
+
+    Retries transient failures with jittered exponential backoff, honours
+    Retry-After and X-RateLimit-* headers, and slows down before the rate
+    limit is exhausted rather than after. With a ResponseCache attached,
+    requests are revalidated with ETag / Last-Modified and 304s are served
+    from disk.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, max_wait: float = DEFAULT_MAX_WAIT,
+                 rate_limit_threshold: int = DEFAULT_RATE_LIMIT_THRESHOLD, cache: ResponseCache = None):
+        self.cache = cache
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_wait = max_wait
+        self.rate_limit_threshold = rate_limit_threshold
+        self.sleep = time.sleep
+
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._throttle_until = 0.0
+        self.stats = {'requests': 0, 'retries': 0, 'wait_time': 0.0}
+
+    def get(self, url: str, headers: Dict[str, str] = None, params: Dict[str, str] = None, **kwargs) -> requests.Response:
+        """
+        Sends a GET request, retrying rate-limited and transient failures.
+
+        Once retries are exhausted the last response is returned as-is so
+        callers can report the status code the way they always have.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        with profiling.stage('http'):
+            if self.cache is not None:
+                key = self.cache.cache_key(url, headers, params)
+                entry = self.cache.lookup(key)
+                if entry is not None:
+                    headers = dict(headers or {}, **self.cache.conditional_headers(entry))
+                response = self.cache.resolve(key, entry, self._send(url, headers, params, **kwargs))
+            else:
+                response = self._send(url, headers, params, **kwargs)
+        if profiling.enabled() and not getattr(response, 'from_cache', False):
+            profiling.add('http', nbytes=len(response.content), calls=0)
+        return response
+
+    def _send(self, url: str, headers: Dict[str, str], params: Dict[str, str], **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            self._wait_for_rate_limit()
+            self._count('requests')
+            try:
+                response = self.session.get(url, headers=headers, params=params, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                self._record_rate_limit(response)
+                delay = self._retry_delay(response, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    return response
+
+            attempt += 1
+            self._count('retries')
+            self._wait(delay)
+
+    def _count(self, key: str, amount=1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def _wait(self, delay: float) -> None:
+        if delay > 0:
+            self._count('wait_time', delay)
+            self.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _retry_delay(self, response: requests.Response, attempt: int) -> Optional[float]:
+        """
+        Returns how long to wait before retrying response, or None if it should not be retried.
+        """
+        retry_after = response.headers.get('Retry-After')
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        rate_limited = response.status_code == 429 or (
+            response.status_code == 403 and (retry_after is not None or remaining == '0'))
+
+        if rate_limited:
+            if retry_after is not None:
+                delay = float(retry_after) if retry_after.isdigit() else self._backoff_delay(attempt)
+            elif remaining == '0':
+                delay = self._reset_delay(response)
+            else:
+                delay = self._backoff_delay(attempt)
+            return delay if delay <= self.max_wait else None
+        if response.status_code in RETRY_STATUS_CODES:
+            return self._backoff_delay(attempt)
+        return None
+
+    def _reset_delay(self, response: requests.Response) -> float:
+        reset = response.headers.get('X-RateLimit-Reset')
+        if reset is None or not reset.isdigit():
+            return self.backoff
+        return max(0.0, int(reset) - time.time())
+
+    def _record_rate_limit(self, response: requests.Response) -> None:
+        """
+        Spreads the requests left in the current window evenly until it resets.
+        """
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None or not remaining.isdigit() or not reset.isdigit():
+            return
+        remaining = int(remaining)
+        if remaining >= self.rate_limit_threshold:
+            return
+
+        window = max(0.0, int(reset) - time.time())
+        pause = window if remaining == 0 else window / (remaining + 1)
+        with self._lock:
+            self._throttle_until = max(self._throttle_until, time.time() + min(pause, self.max_wait))
+
+    def _wait_for_rate_limit(self) -> None:
+        with self._lock:
+            delay = self._throttle_until - time.time()
+        self._wait(delay)
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+def get_client() -> GitHubClient:
+    """
+    Returns the process-wide client, creating it on first use.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = GitHubClient()
+        return _default_client
+
+def configure(**options) -> GitHubClient:
+    """
+    Replaces the process-wide client with one built from the given options.
+    """
+    global _default_client
+    with _default_client_lock:
+        _default_client = GitHubClient(**options)
+        return _default_client
+
+def get(url: str, headers: Dict[str, str] = None, params: Dict[str, str] = None, **kwargs) -> requests.Response:
+    """
+    Sends a GET request through the process-wide client.
+    """
+    return get_client().get(url, headers=headers, params=params, **kwargs)
+
+def get_stats() -> Dict[str, float]:
+    """
+    Returns a snapshot of the request, retry and wait-time counters, plus cache counters if enabled.
+    """
+    client = get_client()
+    with client._lock:
+        stats = dict(client.stats)
+    if client.cache is not None:
+        stats['cache'] = client.cache.report()
+    return stats
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import subprocess
+from typing import Any, Callable, Dict
+
+# Default location for per-repository incremental analysis state
+DEFAULT_STATE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'repo_analyzer', 'incremental')
+
+def head_commit(repo_dir: str, rev: str = 'HEAD') -> str:
+    """
+    Returns the SHA of the commit checked out in repo_dir, or of the commit rev points to.
+    """
+    result = subprocess.run(['git', '-C', repo_dir, 'rev-parse', f"{rev}^{{commit}}"], check=True, capture_output=True,
+                            text=True)
+    return result.stdout.strip()
+
+def blob_hashes(repo_dir: str, rev: str = 'HEAD') -> Dict[str, str]:
+    """
+    Returns the blob SHA of every file in rev, keyed by path relative to the repository root.
+    """
+    result = subprocess.run(['git', '-C', repo_dir, 'ls-tree', '-r', '-z', rev], check=True, capture_output=True)
+    hashes = {}
+    for record in result.stdout.decode('utf-8', errors='surrogateescape').split('\0'):
+        if not record:
+            continue
+        meta, path = record.split('\t', 1)
+        _, object_type, sha = meta.split()
+        if object_type == 'blob':
+            hashes[path] = sha
+    return hashes
+
+def state_file(state_dir: str, repo_url: str, analyzer: str) -> str:
+    """
+    Returns the path of the state file for one repository and analyzer.
+    """
+    digest = hashlib.sha256(repo_url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(state_dir), f"{digest}-{analyzer}.json")
+
+def load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+    os.replace(temp_path, path)
+
+# Sentinel returned by IncrementalRun.reuse when a file has to be analyzed again
+MISSING = object()
+
+class IncrementalRun:
+    """
+    Reuses per-file results from the previous run of an analyzer when the file's blob is unchanged.
+
+    State is keyed by the analyzer's version, so changing what an analyzer
+    extracts invalidates everything it stored before.
+    """
+
+    def __init__(self, repo_dir: str, state_path: str, version: str):
+        self.repo_dir = repo_dir
+        self.state_path = state_path
+        self.version = version
+        self.commit = head_commit(repo_dir)
+        self.blobs = blob_hashes(repo_dir)
+        previous = load_state(state_path)
+        self.previous_commit = previous.get('commit') if previous.get('version') == version else None
+        self.previous_files = previous.get('files', {}) if self.previous_commit else {}
+        self.files = {}
+        self.stats = {'reused': 0, 'parsed': 0}
+
+    def reuse(self, relative_path: str) -> Any:
+        """
+        Returns the stored result for relative_path if its blob is unchanged, otherwise MISSING.
+        """
+        relative_path = relative_path.replace(os.sep, '/')
+        blob = self.blobs.get(relative_path)
+        previous = self.previous_files.get(relative_path)
+
+        if blob is None or previous is None or previous['blob'] != blob:
+            return MISSING
+        self.files[relative_path] = previous
+        self.stats['reused'] += 1
+        return previous['result']
+
+    def record(self, relative_path: str, result: Any) -> None:
+        """
+        Records a freshly computed result so the next run can reuse it.
+        """
+        relative_path = relative_path.replace(os.sep, '/')
+        blob = self.blobs.get(relative_path)
+        if blob is not None:
+            self.files[relative_path] = {'blob': blob, 'result': result}
+        self.stats['parsed'] += 1
+
+    def save(self) -> None:
+        save_state(self.state_path, {'version': self.version, 'commit': self.commit, 'files': self.files})
@@ -0,0 +1,226 @@
+import os
+import subprocess
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import file_ingest
+from file_index import scan_files
+from git_trees import build_directory_listings
+
+def is_git_repository(path: str) -> bool:
+    result = subprocess.run(['git', '-C', path, 'rev-parse', '--git-dir'], capture_output=True)
+    return result.returncode == 0
+
+def is_bare_repository(path: str) -> bool:
+    result = subprocess.run(['git', '-C', path, 'rev-parse', '--is-bare-repository'], capture_output=True, text=True)
+    return result.returncode == 0 and result.stdout.strip() == 'true'
+
+def promisor_remote(repo_path: str) -> Optional[str]:
+    """
+    Returns the remote missing objects are fetched from if repo_path is a partial (--filter) clone, else None.
+    """
+    result = subprocess.run(['git', '-C', repo_path, 'config', '--get-regexp', r'^(remote\..*\.promisor|extensions\.partialclone)$'],
+                            capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition(' ')
+        if key == 'extensions.partialclone':
+            return value
+        if value == 'true':
+            return key[len('remote.'):-len('.promisor')]
+    return None
+
+def prefetch_blobs(repo_path: str, shas: Iterable[str], remote: str = 'origin', timeout: float = None) -> None:
+    """
+    Downloads the given blobs of a partial clone in one request, as git itself does before a checkout.
+
+    Without this, each blob read through cat-file would be fetched with a request of its own.
+    """
+    shas = ''.join(f"{sha}\n" for sha in shas)
+    if not shas:
+        return
+    result = subprocess.run(['git', '-C', repo_path, '-c', 'fetch.negotiationAlgorithm=noop', 'fetch', '--quiet',
+                             '--no-tags', '--no-write-fetch-head', '--recurse-submodules=no', '--filter=blob:none',
+                             '--stdin', remote], input=shas.encode('ascii'), capture_output=True, timeout=timeout)
+    if result.returncode != 0:
+        raise ValueError(f"Failed to fetch file contents: {result.stderr.decode('utf-8', errors='replace').strip()}")
+
+def uses_git_objects(repo_path: str, ref: str = None) -> bool:
+    """
+    Returns True if repo_path should be read from git objects rather than from files on disk.
+
+    Bare repositories have no files on disk, and asking for a specific ref means
+    the working tree may not match it; everything else is read straight from disk.
+    """
+    return ref is not None or is_bare_repository(repo_path)
+
+def list_tree_entries(repo_path: str, ref: str = 'HEAD') -> List[Dict]:
+    """
+    Lists every entry of ref's tree, shaped like Git Trees API entries.
+    """
+    result = subprocess.run(['git', '-C', repo_path, 'ls-tree', '-r', '-t', '-z', ref], capture_output=True)
+    if result.returncode != 0:
+        raise ValueError(f"Failed to read repository tree: {result.stderr.decode('utf-8', errors='replace').strip()}")
+
+    entries = []
+    for record in result.stdout.decode('utf-8', errors='surrogateescape').split('\0'):
+        if record:
+            meta, path = record.split('\t', 1)
+            mode, object_type, sha = meta.split()
+            entries.append({'path': path, 'mode': mode, 'type': object_type, 'sha': sha})
+    return entries
+
+def working_tree_entries(repo_path: str) -> List[Dict]:
+    """
+    Lists the files and directories of a checkout on disk, shaped like list_tree_entries.
+
+    In a git working copy these are the tracked files still on disk, so caches,
+    virtualenvs and build output stay out of the tree as they do on GitHub; any
+    other directory is scanned with file_index, which honors .gitignore files.
+    """
+    if is_git_repository(repo_path):
+        result = subprocess.run(['git', '-C', repo_path, 'ls-files', '-z', '--stage'], capture_output=True)
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace').strip()
+            raise ValueError(f"Failed to read repository tree: {stderr}")
+        files = {}
+        for record in result.stdout.decode('utf-8', errors='surrogateescape').split('\0'):
+            if record:
+                meta, path = record.split('\t', 1)
+                # Submodules are gitlinks, listed like the Trees API's commit entries
+                files[path] = 'commit' if meta.startswith('160000') else 'blob'
+        files = {path: kind for path, kind in files.items() if os.path.lexists(os.path.join(repo_path, path))}
+    else:
+        files = {entry.relpath: 'blob' for entry in scan_files(repo_path)}
+
+    directories = {}
+    for path in files:
+        parent = path.rpartition('/')[0]
+        while parent and parent not in directories:
+            directories[parent] = None
+            parent = parent.rpartition('/')[0]
+    return ([{'path': path, 'type': 'tree'} for path in directories] +
+            [{'path': path, 'type': kind} for path, kind in files.items()])
+
+def directory_listings(repo_path: str, path: str = '', ref: str = None) -> Dict[str, List[Dict]]:
+    """
+    Builds Contents-API-shaped directory listings for a local repository.
+    """
+    if uses_git_objects(repo_path, ref):
+        listings = build_directory_listings(list_tree_entries(repo_path, ref or 'HEAD'))
+    else:
+        listings = build_directory_listings(working_tree_entries(repo_path))
+    if path.strip('/') not in listings:
+        raise ValueError(f"Failed to read directory structure: {path} not found")
+    return listings
+
+def walk_files(listings: Dict[str, List[Dict]], path: str = '') -> Iterator[str]:
+    """
+    Yields file paths in the same top-down order as os.walk: a directory's files, then each subdirectory.
+    """
+    contents = sorted(listings[path], key=lambda x: x['name'])
+    for item in contents:
+        if item['type'] == 'file':
+            yield item['path']
+    for item in contents:
+        if item['type'] == 'dir':
+            yield from walk_files(listings, item['path'])
+
+class BlobReader:
+    """
+    Reads many objects through a single `git cat-file --batch` process instead of one process per file.
+    """
+
+    def __init__(self, repo_path: str):
+        self.process = subprocess.Popen(['git', '-C', repo_path, 'cat-file', '--batch'],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, object_name: str) -> bytes:
+        """
+        Returns the object's content; object_name may be a SHA or `<ref>:<path>`. Raises KeyError if it is missing.
+        """
+        size = self._request(object_name)
+        content = self.process.stdout.read(size)
+        self.process.stdout.read(1)
+        return content
+
+    def read_source(self, object_name: str) -> Optional[str]:
+        """
+        Returns the object's text if file_ingest considers it worth parsing, else None. Raises KeyError if it is missing.
+
+        Objects over the size limit are drained from the pipe in chunks instead of being held in memory.
+        """
+        size = self._request(object_name)
+        if size > file_ingest.get_limits().max_size:
+            remaining = size + 1
+            while remaining:
+                remaining -= len(self.process.stdout.read(min(remaining, 1 << 20)))
+            file_ingest.record('too_large')
+            return None
+        content = self.process.stdout.read(size)
+        self.process.stdout.read(1)
+        return file_ingest.ingest_bytes(content)
+
+    def _request(self, object_name: str) -> int:
+        self.process.stdin.write(object_name.encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        # `<sha> <type> <size>`, or `<object name> missing` where the name may itself contain spaces
+        header = self.process.stdout.readline().rstrip(b'\n')
+        if header.endswith((b' missing', b' ambiguous')):
+            raise KeyError(object_name)
+        return int(header.rsplit(b' ', 1)[1])
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            # A process forked while this reader was open can hold git's stdin, so EOF never arrives
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_sources(repo_path: str, suffix: Union[str, Tuple[str, ...]] = '.py',
+                 ref: str = 'HEAD') -> Iterator[Tuple[str, str]]:
+    """
+    Yields (path, text) for every file in ref ending with suffix (or one of a tuple of suffixes),
+    in os.walk order, read from git objects.
+
+    Files that file_ingest skips (too large or binary) are left out and counted.
+    """
+    entries = list_tree_entries(repo_path, ref)
+    shas = {entry['path']: entry['sha'] for entry in entries}
+    with BlobReader(repo_path) as reader:
+        for path in walk_files(build_directory_listings(entries)):
+            if path.endswith(suffix):
+                content = reader.read_source(shas[path])
+                if content is not None:
+                    yield path, content
+
+def read_files(repo_path: str, paths: Iterable[str], ref: str = None) -> Iterator[Union[str, ValueError]]:
+    """
+    Yields each file's text, or a ValueError if it does not exist or is not UTF-8 text, in input order.
+    """
+    if not uses_git_objects(repo_path, ref):
+        for path in paths:
+            try:
+                with open(os.path.join(repo_path, path), 'r', encoding='utf-8') as file:
+                    yield file.read()
+            except OSError as e:
+                yield ValueError(f"Failed to read file content: {path} - {e.strerror}")
+            except UnicodeDecodeError:
+                yield ValueError(f"Failed to read file content: {path} - not UTF-8 text")
+        return
+
+    ref = ref or 'HEAD'
+    with BlobReader(repo_path) as reader:
+        for path in paths:
+            try:
+                yield reader.read(f"{ref}:{path}").decode('utf-8')
+            except KeyError:
+                yield ValueError(f"Failed to read file content: {path} - not found at {ref}")
+            except UnicodeDecodeError:
+                yield ValueError(f"Failed to read file content: {path} - not UTF-8 text")
@@ -1,93 +1,166 @@
 import os
-import ast
+import shutil
 import subprocess
 import tempfile
-import requests
+from ast_visitor import analyze_python_file, analyze_source
+from categories import get_matcher, project_matcher
+import file_ingest
+from file_index import scan_files
+from incremental import IncrementalRun, state_file
+from local_repo import iter_sources, uses_git_objects
+from parallel import analyze_files
+import parse_cache
+from pipeline import stream_symbols
+import profiling
+from repo_clone import clone_for_streaming, clone_with_strategy
+from symbol_table import SymbolTable
 
-def clone_repo(repo_url, access_token=None):
+# Bump whenever extract_symbols returns something different, so stored incremental state is discarded
+ANALYZER_VERSION = '3'
+
+def clone_repo(repo_url, access_token=None, strategy='full', mirror_cache=None):
+    # strategy is one of repo_clone.CLONE_STRATEGIES; mirror_cache reuses a local bare mirror across runs
     temp_dir = tempfile.mkdtemp()
-    clone_url = repo_url
-    if access_token:
-        clone_url = repo_url.replace("https://", f"https://{access_token}@")
-    subprocess.run(["git", "clone", clone_url, temp_dir], check=True)
+    clone_with_strategy(repo_url, temp_dir, strategy, access_token, mirror_cache)
     return temp_dir
 
 def parse_python_file(file_path):
-    with open(file_path, "r", encoding="utf-8") as file:
-        node = ast.parse(file.read(), filename=file_path)
-    
-    classes = [n.name for n in node.body if isinstance(n, ast.ClassDef)]
-    functions = [n.name for n in node.body if isinstance(n, ast.FunctionDef)]
-    
+    symbols = analyze_python_file(file_path)
+    classes = [c['name'] for c in symbols['classes'] if c['top_level']]
+    functions = [f['name'] for f in symbols['functions'] if f['top_level'] and not f['is_async']]
     return classes, functions
 
 def extract_endpoints(file_path):
-    with open(file_path, "r", encoding="utf-8") as file:
-        node = ast.parse(file.read(), filename=file_path)
-    
-    endpoints = []
-    for n in node.body:
-        if isinstance(n, ast.Assign) and any(isinstance(t, ast.Name) and t.id == 'urlpatterns' for t in n.targets):
-            for element in n.value.elts:
-                if isinstance(element, ast.Call):
-                    for arg in element.args:
-                        if isinstance(arg, ast.Constant):
-                            endpoints.append(arg.value)
-    return endpoints
-
-def categorize_items(base_path):
-    categorized_items = {
-        "Admin": [],
-        "API Views": [],
-        "Views": [],
-        "Models": [],
-        "Serializers": [],
-        "Tests": [],
-        "Signals": [],
-        "Services": [],
-        "Consumers": [],
-        "Endpoints": [],
-        "Queries": [],
-        "Querysets": [],
-        "Others": []
+    return analyze_python_file(file_path)['url_patterns']
+
+def categorize_file(file, matcher=None):
+    """
+    Returns the category of a Python file from its repository-relative path (or name), by the category rules.
+    """
+    return (matcher or get_matcher()).file_category(file)
+
+def symbol_facts(symbols):
+    """
+    Returns what categorizing a file needs from its parsed symbols, whatever the rules are: its module-level
+    classes as (name, qualname, line, bases), module-level functions as (name, qualname, line) and URL patterns
+    as (pattern, line).
+    """
+    return {
+        'classes': [(c['name'], c['qualname'], c['lineno'], c['bases']) for c in symbols['classes'] if c['top_level']],
+        'functions': [(f['name'], f['qualname'], f['lineno'])
+                      for f in symbols['functions'] if f['top_level'] and not f['is_async']],
+        'endpoints': list(zip(symbols['url_patterns'], symbols['url_pattern_lines'])),
     }
 
-    for root, _, files in os.walk(base_path):
-        for file in files:
-            if file.endswith(".py"):
-                file_path = os.path.join(root, file)
-                classes, functions = parse_python_file(file_path)
-                relative_path = os.path.relpath(file_path, base_path)
-
-                if "admin.py" in file:
-                    categorized_items["Admin"].extend(classes + functions)
-                elif "views.py" in file:
-                    categorized_items["Views"].extend(classes + functions)
-                elif "api" in file:
-                    categorized_items["API Views"].extend(classes + functions)
-                elif "models.py" in file:
-                    categorized_items["Models"].extend(classes + functions)
-                elif "serializers.py" in file or "serializer" in file:
-                    categorized_items["Serializers"].extend(classes + functions)
-                elif "tests.py" in file or "test" in file:
-                    categorized_items["Tests"].extend(classes + functions)
-                elif "signals.py" in file or "signal" in file:
-                    categorized_items["Signals"].extend(classes + functions)
-                elif "services.py" in file or "service" in file:
-                    categorized_items["Services"].extend(classes + functions)
-                elif "consumers.py" in file or "consumer" in file:
-                    categorized_items["Consumers"].extend(classes + functions)
-                elif "queries.py" in file or "query" in file:
-                    categorized_items["Queries"].extend(classes + functions)
-                elif "querysets.py" in file or "queryset" in file:
-                    categorized_items["Querysets"].extend(classes + functions)
-                elif "urls.py" in file:
-                    endpoints = extract_endpoints(file_path)
-                    categorized_items["Endpoints"].extend(endpoints)
-                else:
-                    categorized_items["Others"].extend(classes + functions)
-
-    return categorized_items
+def categorize_facts(path, facts, matcher=None):
+    """
+    Returns the (category, symbol entries) pairs for one file, as SymbolTable.add_file takes them.
+
+    The file's category comes from its path. Classes whose base classes match a
+    rule (or a class categorized earlier in the module) go to that category
+    instead; the file lists the rest of its classes and its functions, or its
+    endpoints for URL configs.
+    """
+    matcher = matcher or get_matcher()
+    category = matcher.file_category(path)
+    grouped = {category: []}
+    local = {}
+    for name, qualname, line, bases in facts['classes']:
+        inherited = matcher.class_category(bases, local)
+        if inherited is not None:
+            local[name] = inherited
+        elif category == "Endpoints":
+            continue
+        grouped.setdefault(inherited or category, []).append(('class', name, qualname, line))
+    if category == "Endpoints":
+        grouped[category] += [('endpoint', pattern, pattern, line) for pattern, line in facts['endpoints']]
+    else:
+        grouped[category] += [('function', name, qualname, line) for name, qualname, line in facts['functions']]
+    return [(category, symbols) for category, symbols in grouped.items() if symbols]
+
+def extract_symbols(file_path):
+    """
+    Extracts the facts categorize_facts needs for a file from a single read and parse.
+    """
+    return symbol_facts(analyze_python_file(file_path))
+
+def empty_categories(matcher=None):
+    return {category: [] for category in (matcher or get_matcher()).categories}
+
+def categorize_symbols(base_path, incremental=None, workers=None, index=None, exclude=None, matcher=None):
+    """
+    Collects the items of every Python file in the repository as a SymbolTable, grouped by category.
+
+    Each symbol carries the file's path relative to base_path, its line, kind and
+    qualified name. Files are listed from index, a file_index.FileIndex, or from a
+    fresh scan of base_path that honors .gitignore and the exclude globs.
+    With an IncrementalRun, files whose blob is unchanged since the last run are not parsed again.
+    With workers set, files are parsed in that many processes; the output is the same as a serial run.
+    Categories follow matcher, a categories.CategoryMatcher, or the repository's own rules by default.
+    Stored results do not depend on the rules, so changing them re-parses nothing.
+    """
+    if index is None:
+        index = scan_files(base_path, exclude)
+    if matcher is None:
+        matcher = project_matcher(base_path)
+    table = SymbolTable(empty_categories(matcher))
+    entries = index.with_extension('.py')
+
+    results = analyze_files(extract_symbols, [(entry.path,) for entry in entries], base_path, incremental, workers)
+    for entry, facts in zip(entries, results):
+        for category, symbols in categorize_facts(entry.relpath, facts, matcher):
+            table.add_file(entry.relpath, category, symbols)
+
+    return table
+
+def categorize_items(base_path, incremental=None, workers=None, index=None, exclude=None, matcher=None):
+    """
+    Groups the items of every Python file in the repository by category.
+
+    This is the dict-of-lists view of categorize_symbols, which takes the same arguments.
+    """
+    return categorize_symbols(base_path, incremental, workers, index, exclude, matcher).to_dict()
+
+def categorize_local_symbols(repo_path, ref=None, workers=None):
+    """
+    Collects the categorized symbols of a repository that is already on disk, without cloning it.
+
+    Working copies are read straight from disk. Bare repositories, or a specific
+    ref, are read from git objects through a single `git cat-file --batch` process.
+    """
+    if not uses_git_objects(repo_path, ref):
+        return categorize_symbols(repo_path, workers=workers)
+
+    matcher = project_matcher(repo_path, ref)
+    table = SymbolTable(empty_categories(matcher))
+    for path, source in iter_sources(repo_path, '.py', ref or 'HEAD'):
+        for category, symbols in categorize_source(path, source, matcher):
+            table.add_file(path, category, symbols)
+    return table
+
+def categorize_source(path, source, matcher=None):
+    """
+    Returns the (category, symbol entries) pairs for one file's source, as SymbolTable.add_file takes them.
+    """
+    return categorize_facts(path, symbol_facts(analyze_source(source, path)), matcher)
+
+def categorize_streamed_symbols(repo_path, ref=None):
+    """
+    Categorizes a repository's git objects through a pipeline.Pipeline.
+
+    On a clone made by repo_clone.clone_for_streaming, file contents are
+    downloaded batch by batch while earlier batches are parsed. The table is
+    the same as categorize_local_symbols gives for the same objects.
+    """
+    matcher = project_matcher(repo_path, ref)
+    return stream_symbols(repo_path, lambda path, source: categorize_source(path, source, matcher),
+                          empty_categories(matcher), ref or 'HEAD')
+
+def categorize_local_repository(repo_path, ref=None, workers=None):
+    """
+    Categorizes a repository that is already on disk, as the dict-of-lists view of categorize_local_symbols.
+    """
+    return categorize_local_symbols(repo_path, ref, workers).to_dict()
 
 def print_section(header, items, file=None):
     output = [f"{header}:"]
@@ -103,26 +176,70 @@ def print_section(header, items, file=None):
     else:
         print("\n".join(output))
 
-def analyze_github_repository(repo_url, access_token=None, output_file=None):
+def analyze_github_repository(repo_url, access_token=None, output_file=None, state_dir=None, workers=None,
+                              clone_strategy='full', mirror_cache=None, exclude=None, pipelined=False):
+    # pipelined parses files while they download instead of after the clone; it reads git objects like a bare clone
     try:
-        repo_path = clone_repo(repo_url, access_token)
-        categorized_items = categorize_items(repo_path)
-        
-        if output_file:
-            with open(output_file, 'w', encoding='utf-8') as file:
-                for header, items in categorized_items.items():
-                    print_section(header, items, file)
-            print(f"Results have been written to {output_file}")
-        else:
-            for header, items in categorized_items.items():
-                print_section(header, items)
+        if pipelined:
+            repo_path = tempfile.mkdtemp(prefix='stream_')
+            try:
+                with file_ingest.counting() as counts:
+                    clone_for_streaming(repo_url, repo_path, access_token)
+                    categorized_items = categorize_streamed_symbols(repo_path).to_dict()
+            finally:
+                shutil.rmtree(repo_path, ignore_errors=True)
+            write_results(categorized_items, output_file)
+            file_ingest.print_counts(counts)
+            return
+
+        repo_path = clone_repo(repo_url, access_token, clone_strategy, mirror_cache)
+        with file_ingest.counting() as counts:
+            if state_dir:
+                # Only re-parse files whose blobs changed since the last analyzed commit
+                incremental = IncrementalRun(repo_path, state_file(state_dir, repo_url, 'categorize_items'),
+                                             ANALYZER_VERSION)
+                categorized_items = categorize_items(repo_path, incremental, workers, exclude=exclude)
+                incremental.save()
+            else:
+                categorized_items = categorize_items(repo_path, workers=workers, exclude=exclude)
+        write_results(categorized_items, output_file)
+        file_ingest.print_counts(counts)
     except subprocess.CalledProcessError as e:
         print(f"Failed to clone the repository - {e}")
     except Exception as ex:
         print(f"An unexpected error occurred - {ex}")
 
+def analyze_local_repository(repo_path, output_file=None, ref=None, workers=None):
+    try:
+        with file_ingest.counting() as counts:
+            categorized_items = categorize_local_repository(repo_path, ref, workers)
+        write_results(categorized_items, output_file)
+        file_ingest.print_counts(counts)
+    except subprocess.CalledProcessError as e:
+        print(f"Failed to read the repository - {e}")
+    except Exception as ex:
+        print(f"An unexpected error occurred - {ex}")
+
+def write_results(categorized_items, output_file=None):
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as file:
+            for header, items in categorized_items.items():
+                print_section(header, items, file)
+        print(f"Results have been written to {output_file}")
+    else:
+        for header, items in categorized_items.items():
+            print_section(header, items)
+
 if __name__ == "__main__":
-    repo_url = input("Enter GitHub repository URL (e.g., https://github.com/owner/repo): ").strip()
-    access_token = input("Enter GitHub access token (press Enter if none): ").strip()
-    output_file = input("Enter output file name (e.g., output.txt): ").strip()
-    analyze_github_repository(repo_url, access_token, output_file)
+    # Set REPO_ANALYZER_PROFILE=report.json (and REPO_ANALYZER_CPROFILE=run.prof) to profile the run,
+    # and REPO_ANALYZER_PARSE_CACHE=DIR to reuse parse results across runs
+    profiling.enable_from_environment()
+    parse_cache.configure_from_environment()
+    repo_url = input("Enter GitHub repository URL or local path (e.g., https://github.com/owner/repo): ").strip()
+    if os.path.isdir(repo_url):
+        output_file = input("Enter output file name (e.g., output.txt): ").strip()
+        analyze_local_repository(repo_url, output_file)
+    else:
+        access_token = input("Enter GitHub access token (press Enter if none): ").strip()
+        output_file = input("Enter output file name (e.g., output.txt): ").strip()
+        analyze_github_repository(repo_url, access_token, output_file)
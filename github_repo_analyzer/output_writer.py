@@ -0,0 +1,26 @@
+from typing import Iterable
+import profiling
+
+# Bytes of output held in memory before they are flushed to disk
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+def write_lines(lines: Iterable[str], output_file: str, mode: str = 'w', separator: str = "\n",
+                buffer_size: int = DEFAULT_BUFFER_SIZE) -> int:
+    """
+    Writes lines to output_file as they are produced, joined by separator.
+
+    The result is byte-for-byte what separator.join(lines) would give, but lines
+    can come from a generator and only buffer_size worth of output is held in
+    memory at a time. Returns the number of lines written.
+    """
+    count = 0
+    with open(output_file, mode, encoding='utf-8', buffering=buffer_size) as file:
+        start = file.tell() if profiling.enabled() else 0
+        for line in lines:
+            if count:
+                file.write(separator)
+            file.write(line)
+            count += 1
+        if profiling.enabled():
+            profiling.add('write', nbytes=file.tell() - start)
+    return count
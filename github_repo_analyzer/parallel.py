@@ -0,0 +1,99 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import file_ingest
+from incremental import MISSING, IncrementalRun
+import parse_cache
+import profiling
+
+# Files handed to a worker process at a time
+DEFAULT_CHUNK_SIZE = 64
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+def _apply_batch(function: Callable, batch: Sequence[Tuple]) -> List[Any]:
+    return [function(*args) for args in batch]
+
+def _apply_noting_skips(function: Callable, *args) -> Tuple[Any, bool]:
+    # Pairs a per-file result with whether file_ingest skipped the file, which only the call itself can tell
+    with file_ingest.counting() as counts:
+        result = function(*args)
+    return result, any(counts.get(reason) for reason in file_ingest.SKIP_REASONS)
+
+def _apply_batch_in_worker(function: Callable, batch: Sequence[Tuple], limits: file_ingest.IngestLimits,
+                           profile_settings: Optional[Tuple[bool, bool]] = None,
+                           cache_settings: Optional[Tuple[str, int]] = None
+                           ) -> Tuple[List[Any], Dict[str, int], Dict[str, int], Dict[str, Any]]:
+    # Workers use the parent's ingest limits, parse cache and profiler settings, and hand their skip counts,
+    # cache counters (and profiler figures) back with the results
+    file_ingest.configure(*limits)
+    parse_cache.configure_worker(cache_settings)
+    before = parse_cache.current_stats()
+    profiled = profile_settings is not None
+    profiler = profiling.enable(*profile_settings) if profiled else None
+    try:
+        with file_ingest.counting() as counts:
+            results = _apply_batch(function, batch)
+        return results, dict(counts), parse_cache.stats_since(before), profiler.snapshot() if profiled else None
+    finally:
+        if profiled:
+            profiling.disable()
+
+def map_in_order(function: Callable, tasks: Sequence[Tuple], workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Any]:
+    """
+    Applies function to every argument tuple in tasks and returns the results in task order.
+
+    With workers set, tasks are split into chunks of chunk_size and spread over a
+    process pool; otherwise they run serially in this process. function must be
+    a module-level function so it can be sent to the workers.
+    """
+    if not workers or workers <= 1 or len(tasks) <= chunk_size:
+        return _apply_batch(function, tasks)
+
+    # Imported here: the process pool machinery (multiprocessing, socket, logging) is only paid for when used
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = [tasks[start:start + chunk_size] for start in range(0, len(tasks), chunk_size)]
+    results = []
+    profiler = profiling.get_profiler()
+    limits = file_ingest.get_limits()
+    cache = parse_cache.get_cache()
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        # map yields chunk results in submission order, so merging stays deterministic
+        for chunk_results, counts, cache_stats, snapshot in pool.map(
+                _apply_batch_in_worker, [function] * len(chunks), chunks, [limits] * len(chunks),
+                [profiling.settings()] * len(chunks), [parse_cache.settings()] * len(chunks)):
+            results.extend(chunk_results)
+            file_ingest.merge_counts(counts)
+            if cache_stats:
+                cache.merge_stats(cache_stats)
+            if profiler is not None:
+                profiler.merge(snapshot)
+    return results
+
+def analyze_files(function: Callable, tasks: Sequence[Tuple], base_path: str, incremental: IncrementalRun = None,
+                  workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Any]:
+    """
+    Runs a per-file analysis over tasks, whose first argument is the file path.
+
+    Results stored by an IncrementalRun are reused, everything else is computed
+    with map_in_order, and the results come back in task order either way.
+    Files that file_ingest skipped are not recorded, so they are read again (and
+    counted again) on the next run, whose limits may let them through.
+    """
+    results = [MISSING] * len(tasks)
+    pending = []
+    for index, args in enumerate(tasks):
+        if incremental is not None:
+            results[index] = incremental.reuse(os.path.relpath(args[0], base_path))
+        if results[index] is MISSING:
+            pending.append(index)
+
+    with profiling.stage(f"analyze:{function.__name__}"):
+        computed = map_in_order(_apply_noting_skips, [(function,) + tuple(tasks[index]) for index in pending], workers,
+                                chunk_size)
+    for index, (result, skipped) in zip(pending, computed):
+        results[index] = result
+        if incremental is not None and not skipped:
+            incremental.record(os.path.relpath(tasks[index][0], base_path), result)
+    return results
@@ -0,0 +1,239 @@
+import hashlib
+import marshal
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Default on-disk location and size cap for cached parse results
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'repo_analyzer')
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+# Encoded results larger than this are zlib-compressed; the first byte of a value records which form it is in
+COMPRESS_THRESHOLD = 512
+
+# Once over the cap, least recently used entries are evicted until the cache is back under this fraction of it
+EVICT_TO = 0.9
+# Entries fetched per query while evicting
+EVICT_BATCH = 256
+
+# Sentinel returned by ParseCache.get for a key that is not stored
+MISSING = object()
+
+# Cache directory for the scripts that take no options (main.py, repo_analyzer.py, repo_reader.py)
+CACHE_ENV = 'REPO_ANALYZER_PARSE_CACHE'
+
+def encode(value: Any) -> bytes:
+    data = marshal.dumps(value)
+    if len(data) > COMPRESS_THRESHOLD:
+        return b'z' + zlib.compress(data, 1)
+    return b'm' + data
+
+def decode(blob: bytes) -> Any:
+    if blob[:1] == b'z':
+        return marshal.loads(zlib.decompress(blob[1:]))
+    return marshal.loads(blob[1:])
+
+def content_key(namespace: str, version: str, content: str) -> bytes:
+    """
+    Returns the key of content's result for one analyzer: a SHA-256 of the analyzer, its version and the content.
+    """
+    digest = hashlib.sha256(f"{namespace}\0{version}\0".encode('utf-8'))
+    digest.update(content.encode('utf-8', errors='surrogatepass'))
+    return digest.digest()
+
+class ParseCache:
+    """
+    Persistent cache of parse results keyed by file content, shared across repositories and runs.
+
+    Identical files (vendored libraries, generated migrations, forks) are parsed
+    once. Results are stored marshal-encoded in SQLite, compressed when large, and
+    the least recently used entries are evicted once the cache grows past max_bytes.
+    Worker processes forked from the configuring process open their own connection.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        cache_dir = os.path.expanduser(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, 'parse_cache.sqlite')
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'stored_bytes': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._conn = None
+        # Running size of the cache as this process sees it, summed once per connection
+        self._total = 0
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not be shared with a forked child, so each process opens its own
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key BLOB PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed_at ON results (accessed_at)")
+            self._conn.commit()
+            self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
+
+    def get(self, key: bytes) -> Any:
+        """
+        Returns the result stored under key, or MISSING.
+        """
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute("SELECT value FROM results WHERE key=?", (key,)).fetchone()
+                if row is None:
+                    self.stats['misses'] += 1
+                    return MISSING
+                conn.execute("UPDATE results SET accessed_at=? WHERE key=?", (time.time(), key))
+                conn.commit()
+            except sqlite3.Error:
+                # A cache that cannot be read is treated as empty; the caller parses instead
+                self.stats['misses'] += 1
+                return MISSING
+            self.stats['hits'] += 1
+        return decode(row[0])
+
+    def put(self, key: bytes, value: Any) -> None:
+        blob = encode(value)
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute("INSERT OR REPLACE INTO results (key, value, size, accessed_at) VALUES (?, ?, ?, ?)",
+                             (key, blob, len(blob), time.time()))
+                self.stats['stored_bytes'] += len(blob)
+                # A replaced entry is counted twice until the next eviction sums the table again
+                self._total += len(blob)
+                if self._total > self.max_bytes:
+                    self._evict(conn)
+                conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Drop least recently used entries until the cache is comfortably under max_bytes again. The running
+        # total misses what other processes sharing the cache stored, so the table is summed before evicting
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        target = self.max_bytes * EVICT_TO if total > self.max_bytes else total
+        while total > target:
+            rows = conn.execute("SELECT key, size FROM results ORDER BY accessed_at LIMIT ?", (EVICT_BATCH,)).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM results WHERE key=?", (key,))
+                self.stats['evictions'] += 1
+                total -= size
+                if total <= target:
+                    break
+        self._total = total
+
+    def get_or_compute(self, namespace: str, version: str, content: str, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the cached result for content, or computes and stores it.
+
+        Exceptions from compute (a SyntaxError, say) propagate and nothing is stored.
+        """
+        key = content_key(namespace, version, content)
+        result = self.get(key)
+        if result is MISSING:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def merge_stats(self, stats: Dict[str, int]) -> None:
+        """
+        Adds counters gathered elsewhere, such as in a worker process, to this cache's.
+        """
+        with self._lock:
+            for key, value in stats.items():
+                self.stats[key] += value
+
+    def report(self) -> Dict[str, int]:
+        """
+        Returns hit, miss, stored-byte and eviction counters along with the current cache size.
+        """
+        with self._lock:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            return dict(self.stats, entries=entries, size_bytes=size)
+
+_cache = None
+
+def configure(cache: ParseCache = None) -> None:
+    """
+    Sets the cache used by the analyzers in this process; None turns caching off.
+    """
+    global _cache
+    _cache = cache
+
+def get_cache() -> ParseCache:
+    return _cache
+
+def settings() -> Optional[Tuple[str, int]]:
+    """
+    Returns the configured cache's (cache_dir, max_bytes), for a worker process to pass to configure_worker, or None.
+    """
+    return None if _cache is None else (_cache.cache_dir, _cache.max_bytes)
+
+def configure_worker(cache_settings: Optional[Tuple[str, int]]) -> None:
+    """
+    Gives a worker process its parent's cache: a forked worker already holds it, a forkserver or spawned one opens it.
+    """
+    if cache_settings is None:
+        configure(None)
+    elif settings() != tuple(cache_settings):
+        configure(ParseCache(*cache_settings))
+
+def current_stats() -> Dict[str, int]:
+    return dict(_cache.stats) if _cache is not None else {}
+
+def stats_since(before: Dict[str, int]) -> Dict[str, int]:
+    """
+    Returns how far the configured cache's counters have moved on from before, a current_stats() snapshot.
+    """
+    return {key: value - before.get(key, 0) for key, value in current_stats().items()}
+
+def configure_from_environment() -> Optional[ParseCache]:
+    """
+    Configures a cache in the directory named by REPO_ANALYZER_PARSE_CACHE, if it is set.
+    """
+    cache_dir = os.environ.get(CACHE_ENV)
+    if cache_dir:
+        configure(ParseCache(cache_dir))
+    return _cache
+
+def describe_report(report: Dict[str, int]) -> str:
+    """
+    Returns a one-line summary of ParseCache.report() such as 'Parse cache: 516 hits, 12 misses ...'.
+    """
+    return (f"Parse cache: {report['hits']} hits, {report['misses']} misses, {report['evictions']} evicted; "
+            f"{report['entries']} entries, {report['size_bytes'] / 2 ** 20:.1f} MiB on disk")
+
+def cached(namespace: str, version: str, content: str, compute: Callable[[], Any]) -> Any:
+    """
+    Runs compute through the configured cache, or directly when none is configured.
+    """
+    if _cache is None:
+        return compute()
+    return _cache.get_or_compute(namespace, version, content, compute)
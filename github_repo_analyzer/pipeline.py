@@ -0,0 +1,210 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from git_trees import build_directory_listings
+from local_repo import BlobReader, list_tree_entries, prefetch_blobs, promisor_remote, walk_files
+from symbol_table import SymbolTable
+
+# Items allowed between discovery and storage at once; discovery waits for a free slot, so memory stays bounded
+DEFAULT_CAPACITY = 16
+# Fetches run on threads: they wait on git or the network, not the CPU
+DEFAULT_FETCH_WORKERS = 4
+DEFAULT_PARSE_WORKERS = 1
+# Files fetched per item when streaming from git objects; one `git fetch` and one cat-file process each
+DEFAULT_BATCH_SIZE = 32
+
+# Seconds a blocked stage waits before checking whether the pipeline was stopped
+_POLL_INTERVAL = 0.05
+
+# Queue markers: no more work for a stage, and (in place of a sequence number) the item count or a stage's exception
+_DONE = object()
+_END = object()
+_ERROR = object()
+
+class Pipeline:
+    """
+    Runs discover, fetch, parse and store as concurrent stages joined by bounded queues.
+
+    run(items) iterates items (discover) on one thread, calls fetch(item) on
+    fetch_workers threads and parse(item, fetched) on parse_workers threads,
+    and yields (item, parsed) to the caller (store) in discovery order, however
+    the stages interleave. At most capacity items are in flight at once: an
+    item holds its slot from discovery until the caller has stored it, so a
+    slow store stage throttles discovery instead of letting work pile up.
+    The first exception raised by any stage stops the pipeline and is
+    re-raised from run().
+    """
+
+    def __init__(self, fetch: Callable[[Any], Any], parse: Callable[[Any, Any], Any],
+                 fetch_workers: int = DEFAULT_FETCH_WORKERS, parse_workers: int = DEFAULT_PARSE_WORKERS,
+                 capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1 or fetch_workers < 1 or parse_workers < 1:
+            raise ValueError("Failed to create pipeline: capacity and worker counts must be at least 1")
+        self.fetch = fetch
+        self.parse = parse
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.capacity = capacity
+        self.stats = {'items': 0, 'max_in_flight': 0}
+
+    def run(self, items: Iterable[Any]) -> Iterator[Tuple[Any, Any]]:
+        stop = threading.Event()
+        slots = threading.Semaphore(self.capacity)
+        fetch_queue = queue.Queue(self.capacity)
+        parse_queue = queue.Queue(self.capacity)
+        # Unbounded, but never holds more than capacity items because of the slots
+        done_queue = queue.Queue()
+        lock = threading.Lock()
+        in_flight = [0]
+        remaining = [self.fetch_workers]
+
+        def put(target: queue.Queue, message) -> bool:
+            while not stop.is_set():
+                try:
+                    target.put(message, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(source: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    pass
+            return _DONE
+
+        def discover() -> None:
+            try:
+                count = 0
+                iterator = iter(items)
+                while True:
+                    # The slot is taken before the next item is discovered, so discovery itself pauses too
+                    while not slots.acquire(timeout=_POLL_INTERVAL):
+                        if stop.is_set():
+                            return
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        break
+                    with lock:
+                        in_flight[0] += 1
+                        self.stats['max_in_flight'] = max(self.stats['max_in_flight'], in_flight[0])
+                    if not put(fetch_queue, (count, item, None)):
+                        return
+                    count += 1
+                done_queue.put((_END, count, None))
+                for _ in range(self.fetch_workers):
+                    put(fetch_queue, _DONE)
+            except BaseException as e:
+                done_queue.put((_ERROR, e, None))
+                stop.set()
+
+        def stage(source: queue.Queue, target: queue.Queue, function: Callable[[Any, Any], Any]) -> bool:
+            # Returns True once source is exhausted, False if the pipeline stopped first
+            try:
+                while True:
+                    message = get(source)
+                    if message is _DONE:
+                        return not stop.is_set()
+                    sequence, item, value = message
+                    if not put(target, (sequence, item, function(item, value))):
+                        return False
+            except BaseException as e:
+                done_queue.put((_ERROR, e, None))
+                stop.set()
+                return False
+
+        def fetch_stage() -> None:
+            if stage(fetch_queue, parse_queue, lambda item, _: self.fetch(item)):
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                # The last fetch worker to finish tells every parse worker there is nothing more to come
+                if last:
+                    for _ in range(self.parse_workers):
+                        put(parse_queue, _DONE)
+
+        threads = [threading.Thread(target=discover, name='pipeline-discover', daemon=True)]
+        threads += [threading.Thread(target=fetch_stage, name=f"pipeline-fetch-{n}", daemon=True)
+                    for n in range(self.fetch_workers)]
+        threads += [threading.Thread(target=stage, args=(parse_queue, done_queue, self.parse),
+                                     name=f"pipeline-parse-{n}", daemon=True) for n in range(self.parse_workers)]
+        for thread in threads:
+            thread.start()
+
+        pending: Dict[int, Tuple[Any, Any]] = {}
+        next_sequence, total = 0, None
+        try:
+            while total is None or next_sequence < total:
+                sequence, item, value = done_queue.get()
+                if sequence is _ERROR:
+                    raise item
+                if sequence is _END:
+                    total = item
+                    continue
+                # Later items can finish first; they wait here, still holding their slots
+                pending[sequence] = (item, value)
+                while next_sequence in pending:
+                    yield pending.pop(next_sequence)
+                    next_sequence += 1
+                    self.stats['items'] += 1
+                    with lock:
+                        in_flight[0] -= 1
+                    slots.release()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+def iter_blob_batches(repo_path: str, suffix: Union[str, Tuple[str, ...]] = '.py', ref: str = 'HEAD',
+                      batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Tuple[str, str]]]:
+    """
+    Yields (path, blob sha) lists for the files of ref ending with suffix, in the order local_repo.iter_sources reads them.
+    """
+    entries = list_tree_entries(repo_path, ref)
+    shas = {entry['path']: entry['sha'] for entry in entries}
+    batch = []
+    for path in walk_files(build_directory_listings(entries)):
+        if path.endswith(suffix):
+            batch.append((path, shas[path]))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def stream_symbols(repo_path: str, analyze: Callable[[str, str], Iterable[Tuple[str, Sequence]]],
+                   categories: Iterable[str] = (), ref: str = 'HEAD', suffix: Union[str, Tuple[str, ...]] = '.py',
+                   batch_size: int = DEFAULT_BATCH_SIZE, fetch_workers: int = DEFAULT_FETCH_WORKERS,
+                   capacity: int = DEFAULT_CAPACITY, stats: Optional[Dict[str, int]] = None) -> SymbolTable:
+    """
+    Analyzes the files of a repository's git objects through a Pipeline and collects them in a SymbolTable.
+
+    analyze(path, source) returns (category, symbol entries) pairs, as
+    SymbolTable.add_file takes them. In a partial clone, each batch of blobs
+    is downloaded by a fetch worker while earlier batches are parsed, so
+    analysis starts before the repository's contents have finished arriving.
+    The table is the same as reading the files one by one with iter_sources.
+    """
+    remote = promisor_remote(repo_path)
+
+    def fetch(batch: List[Tuple[str, str]]) -> List[Tuple[str, Optional[str]]]:
+        if remote is not None:
+            prefetch_blobs(repo_path, [sha for _, sha in batch], remote)
+        with BlobReader(repo_path) as reader:
+            return [(path, reader.read_source(sha)) for path, sha in batch]
+
+    def parse(batch, sources: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, List]]:
+        return [(path, list(analyze(path, source))) for path, source in sources if source is not None]
+
+    table = SymbolTable(categories)
+    pipeline = Pipeline(fetch, parse, fetch_workers, DEFAULT_PARSE_WORKERS, capacity)
+    for _, results in pipeline.run(iter_blob_batches(repo_path, suffix, ref, batch_size)):
+        for path, entries in results:
+            for category, symbols in entries:
+                table.add_file(path, category, symbols)
+    if stats is not None:
+        stats.update(pipeline.stats)
+    return table
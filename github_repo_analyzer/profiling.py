@@ -0,0 +1,211 @@
+import atexit
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Environment variables that switch profiling on for the command-line entry points
+PROFILE_ENV = 'REPO_ANALYZER_PROFILE'
+CPROFILE_ENV = 'REPO_ANALYZER_CPROFILE'
+# Set to 1 to also trace peak memory per stage; tracemalloc slows Python down several times, so timings suffer
+MEMORY_ENV = 'REPO_ANALYZER_PROFILE_MEMORY'
+
+# Returned by stage() while profiling is off; a nullcontext can be entered any number of times
+_NULL_STAGE = contextlib.nullcontext()
+
+def _max_rss_bytes() -> int:
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+class Profiler:
+    """
+    Collects wall time, call counts, bytes and peak memory per pipeline stage and per file.
+
+    Stages nest and their times are inclusive. Peak memory is the highest
+    tracemalloc reading seen while a stage ran (trace_memory=True; tracing slows
+    Python down noticeably) and is approximate when stages run on several
+    threads at once. With cprofile=True a cProfile profile runs alongside.
+    """
+
+    def __init__(self, per_file: bool = True, trace_memory: bool = False, cprofile: bool = False):
+        self.per_file = per_file
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.files: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self.started = time.perf_counter()
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self) -> None:
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def stop(self) -> None:
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def add(self, name: str, seconds: float = 0.0, nbytes: int = 0, calls: int = 1, path: str = None,
+            peak_memory: int = 0) -> None:
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {'calls': 0, 'seconds': 0.0, 'bytes': 0, 'peak_memory_bytes': 0}
+            entry['calls'] += calls
+            entry['seconds'] += seconds
+            entry['bytes'] += nbytes
+            entry['peak_memory_bytes'] = max(entry['peak_memory_bytes'], peak_memory)
+            if path is not None and self.per_file:
+                stats = self.files.setdefault(path, {}).setdefault(name, {'calls': 0, 'seconds': 0.0, 'bytes': 0})
+                stats['calls'] += calls
+                stats['seconds'] += seconds
+                stats['bytes'] += nbytes
+
+    @contextlib.contextmanager
+    def stage(self, name: str, nbytes: int = 0, path: str = None) -> Iterator[None]:
+        stack: List[int] = getattr(self._local, 'peaks', None)
+        if stack is None:
+            stack = self._local.peaks = []
+        if self.trace_memory and tracemalloc.is_tracing():
+            # The parent's peak so far is kept on the stack because reset_peak clears it for everyone
+            if stack:
+                stack[-1] = max(stack[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        stack.append(0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak = stack.pop()
+            if self.trace_memory and tracemalloc.is_tracing():
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1] = max(stack[-1], peak)
+            self.add(name, seconds, nbytes, path=path, peak_memory=peak)
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """
+        Adds the stages and files recorded by another profiler, e.g. one running in a worker process.
+        """
+        for name, entry in snapshot['stages'].items():
+            self.add(name, entry['seconds'], entry['bytes'], entry['calls'], peak_memory=entry['peak_memory_bytes'])
+        for path, stages in snapshot['files'].items():
+            for name, entry in stages.items():
+                with self._lock:
+                    stats = self.files.setdefault(path, {}).setdefault(name, {'calls': 0, 'seconds': 0.0, 'bytes': 0})
+                    for key in stats:
+                        stats[key] += entry[key]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'stages': {name: dict(entry) for name, entry in self.stages.items()},
+                    'files': {path: {name: dict(e) for name, e in stages.items()} for path, stages in self.files.items()}}
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the machine-readable report: totals, then per-stage and per-file figures.
+        """
+        report = self.snapshot()
+        report['wall_seconds'] = time.perf_counter() - self.started
+        report['max_rss_bytes'] = _max_rss_bytes()
+        return report
+
+    def write_report(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=2, sort_keys=True)
+
+    def dump_cprofile(self, path: str) -> None:
+        """
+        Writes the cProfile statistics, readable with pstats or snakeviz.
+        """
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(path)
+
+_profiler = None
+
+def enable(per_file: bool = True, trace_memory: bool = False, cprofile: bool = False) -> Profiler:
+    """
+    Starts a new process-wide profiler and returns it.
+    """
+    global _profiler
+    disable()
+    _profiler = Profiler(per_file, trace_memory, cprofile)
+    _profiler.start()
+    return _profiler
+
+def disable() -> Profiler:
+    """
+    Stops the process-wide profiler and returns it, so its report can still be read.
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+def get_profiler() -> Profiler:
+    return _profiler
+
+def settings() -> Optional[Tuple[bool, bool]]:
+    """
+    Returns the running profiler's (per_file, trace_memory), for a worker process to pass to enable(), or None.
+    """
+    return None if _profiler is None else (_profiler.per_file, _profiler.trace_memory)
+
+def enabled() -> bool:
+    return _profiler is not None
+
+def stage(name: str, nbytes: int = 0, path: str = None):
+    """
+    Context manager timing one stage; free apart from the call itself while profiling is off.
+    """
+    if _profiler is None:
+        return _NULL_STAGE
+    return _profiler.stage(name, nbytes, path)
+
+def add(name: str, seconds: float = 0.0, nbytes: int = 0, calls: int = 1, path: str = None) -> None:
+    """
+    Records figures measured by the caller, such as the size of a response once it has arrived.
+    """
+    if _profiler is not None:
+        _profiler.add(name, seconds, nbytes, calls, path)
+
+def enable_from_environment() -> Profiler:
+    """
+    Enables profiling when REPO_ANALYZER_PROFILE names a report file, writing it (and the
+    cProfile dump named by REPO_ANALYZER_CPROFILE, if any) when the process exits.
+    Peak memory is only traced when REPO_ANALYZER_PROFILE_MEMORY is set as well.
+    """
+    report_path = os.environ.get(PROFILE_ENV)
+    cprofile_path = os.environ.get(CPROFILE_ENV)
+    if not report_path and not cprofile_path:
+        return None
+    profiler = enable(cprofile=bool(cprofile_path), trace_memory=os.environ.get(MEMORY_ENV, '') not in ('', '0'))
+
+    def finish() -> None:
+        profiler.stop()
+        if report_path:
+            profiler.write_report(report_path)
+        if cprofile_path:
+            profiler.dump_cprofile(cprofile_path)
+
+    atexit.register(finish)
+    return profiler
@@ -3,82 +3,124 @@ import subprocess
 import tempfile
 import shutil
 import glob
-import re
-from typing import List, Dict
-from repository_db import store_analysis_result
+from typing import List, Dict, Tuple
+import extractors
+import file_ingest
+from file_index import FileIndex, scan_files
+from incremental import IncrementalRun, state_file
+from parallel import analyze_files
+from pipeline import stream_symbols
+from repo_clone import clone_for_streaming, clone_with_strategy
+import profiling
+from local_repo import iter_sources, list_tree_entries, uses_git_objects
+from symbol_table import SymbolTable
 
-# Regular expressions for extracting information from files
-CLASS_REGEX = re.compile(r'class\s+([^\(:]+)')
-FUNCTION_REGEX = re.compile(r'def\s+([^\(:]+)')
-ENDPOINT_REGEX = re.compile(r'@app\.route\(\'([^\']+)')
+# Bump whenever parse_file_symbols extracts something different, so stored incremental state is discarded
+ANALYZER_VERSION = '3'
 
-def clone_repository(repo_url: str, temp_dir: str) -> None:
+def clone_repository(repo_url: str, temp_dir: str, strategy: str = 'full', mirror_cache: str = None) -> None:
     """
     Clones the GitHub repository into a temporary directory.
+
+    strategy is one of repo_clone.CLONE_STRATEGIES; with mirror_cache set, a persistent
+    bare mirror is updated with a fetch and the clone is made from it.
     """
     try:
-        subprocess.run(['git', 'clone', repo_url, temp_dir], check=True)
+        clone_with_strategy(repo_url, temp_dir, strategy, mirror_cache=mirror_cache)
     except subprocess.CalledProcessError as e:
         raise ValueError(f"Failed to clone repository: {e}")
 
-def detect_languages(temp_dir: str) -> List[str]:
+def detect_languages(temp_dir: str, index: FileIndex = None) -> List[str]:
     """
     Detects the programming language(s) used in the repository.
+
+    Only the extensions already collected in the file index are looked at; no file is opened.
     """
-    languages = []
-    extensions = set()
+    if index is None:
+        index = scan_files(temp_dir)
+    return languages_for_extensions(index.extensions())
 
-    for root, _, files in os.walk(temp_dir):
-        for file in files:
-            extension = os.path.splitext(file)[1]
-            extensions.add(extension)
+def languages_for_extensions(extensions) -> List[str]:
+    """
+    Maps a set of file extensions to the languages they belong to.
 
-    for ext in extensions:
-        if ext in ['.py', '.pyw']:
-            languages.append('Python')
-        elif ext in ['.java']:
-            languages.append('Java')
-        # Add more languages as needed
+    A language is listed when extractors has an extractor registered for one of its extensions.
+    """
+    return extractors.languages_for_extensions(extensions)
 
-    return languages
+def parse_file(file_path: str) -> Dict[str, List[str]]:
+    """
+    Extracts classes, functions, and endpoints from a single file, with the extractor for its extension.
+    """
+    with profiling.stage('regex_parse', os.path.getsize(file_path) if profiling.enabled() else 0, file_path):
+        symbols = extractors.extract(file_path, file_ingest.read_source(file_path) or '')
+    return {key: [entry[1] for entry in entries] for key, entries in symbols.items()}
 
-def parse_files(temp_dir: str) -> Dict[str, List[str]]:
+def parse_source(content: str, extension: str = '.py') -> Dict[str, List[str]]:
     """
-    Parses each file in the repository to extract classes, functions, and endpoints.
+    Extracts classes, functions, and endpoints from source text, Python unless another extension is given.
     """
-    classes = []
-    functions = []
-    endpoints = []
+    return extractors.EXTRACTORS[extension].names(content)
 
-    for root, _, files in os.walk(temp_dir):
-        for file in files:
-            file_path = os.path.join(root, file)
+def parse_source_symbols(content: str, extension: str = '.py') -> Dict[str, List[Tuple[str, str, str, int]]]:
+    """
+    Extracts classes, functions, and endpoints from source text as (kind, name, qualname, line) entries.
 
-            if file_path.endswith('.py'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+    Qualified names follow the enclosing classes and functions, as far as the extractor tracks scopes.
+    """
+    return extractors.EXTRACTORS[extension].extract(content)
 
-                    # Extract classes
-                    class_matches = CLASS_REGEX.findall(content)
-                    classes.extend(class_matches)
+def parse_file_symbols(file_path: str) -> Dict[str, List[Tuple[str, str, str, int]]]:
+    """
+    Extracts classes, functions, and endpoints from a single file, with their lines.
+    """
+    with profiling.stage('regex_parse', os.path.getsize(file_path) if profiling.enabled() else 0, file_path):
+        return extractors.extract(file_path, file_ingest.read_source(file_path) or '')
 
-                    # Extract functions
-                    function_matches = FUNCTION_REGEX.findall(content)
-                    functions.extend(function_matches)
+def parse_symbols(temp_dir: str, incremental: IncrementalRun = None, workers: int = None,
+                  index: FileIndex = None) -> SymbolTable:
+    """
+    Parses each file in the repository and collects its classes, functions, and endpoints as a SymbolTable.
 
-                    # Extract endpoints (assuming Flask-like decorators)
-                    endpoint_matches = ENDPOINT_REGEX.findall(content)
-                    endpoints.extend(endpoint_matches)
+    Files are listed from index, or from a fresh scan_files pass over temp_dir.
+    With an IncrementalRun, files whose blob is unchanged since the last run are not read again.
+    With workers set, files are parsed in that many processes; the output is the same as a serial run.
+    Every file with a registered extractor is parsed, whatever its language.
+    """
+    table = SymbolTable(extractors.RESULT_KEYS)
 
-    return {
-        'classes': classes,
-        'functions': functions,
-        'endpoints': endpoints
-    }
+    if index is None:
+        index = scan_files(temp_dir)
+    entries = index.with_extensions(extractors.EXTRACTORS)
+    tasks = [(entry.path,) for entry in entries]
 
-def analyze_repository(repo_url: str) -> Dict[str, List[str]]:
+    for entry, result in zip(entries, analyze_files(parse_file_symbols, tasks, temp_dir, incremental, workers)):
+        for key, symbols in result.items():
+            table.add_file(entry.relpath, key, symbols)
+
+    return table
+
+def parse_files(temp_dir: str, incremental: IncrementalRun = None, workers: int = None,
+                index: FileIndex = None) -> Dict[str, List[str]]:
+    """
+    Parses each file in the repository to extract classes, functions, and endpoints.
+
+    This is the dict-of-lists view of parse_symbols, which takes the same arguments.
+    """
+    return parse_symbols(temp_dir, incremental, workers, index).to_dict()
+
+def analyze_repository(repo_url: str, state_dir: str = None, workers: int = None,
+                       clone_strategy: str = 'full', mirror_cache: str = None,
+                       exclude: List[str] = None, pipelined: bool = False) -> Dict[str, List[str]]:
     """
     Analyzes the GitHub repository by cloning it, detecting languages, and parsing files.
+
+    The clone is scanned once; .gitignore rules and the exclude globs are honored.
+    If state_dir is given, the analyzed commit and per-file blob hashes are recorded
+    there and only files that changed since the previous run are parsed again.
+    With pipelined set, files are parsed while their contents are still downloading
+    instead; they are read from git objects as for a bare repository, so the clone
+    options, state_dir and exclude do not apply.
     """
     analysis_result = {
         'classes': [],
@@ -89,16 +131,41 @@ def analyze_repository(repo_url: str) -> Dict[str, List[str]]:
     temp_dir = tempfile.mkdtemp(prefix='repo_')
 
     try:
+        if pipelined:
+            try:
+                clone_for_streaming(repo_url, temp_dir)
+            except subprocess.CalledProcessError as e:
+                raise ValueError(f"Failed to clone repository: {e}")
+            entries = list_tree_entries(temp_dir)
+            languages = languages_for_extensions({os.path.splitext(e['path'])[1]
+                                                  for e in entries if e['type'] == 'blob'})
+            if languages:
+                print(f"Detected Languages: {', '.join(languages)}")
+            with file_ingest.counting() as counts:
+                analysis_result = parse_streamed_symbols(temp_dir).to_dict()
+            file_ingest.print_counts(counts)
+            return analysis_result
+
         # Clone repository
-        clone_repository(repo_url, temp_dir)
+        clone_repository(repo_url, temp_dir, clone_strategy, mirror_cache)
+
+        index = scan_files(temp_dir, exclude)
 
         # Detect languages
-        languages = detect_languages(temp_dir)
+        languages = detect_languages(temp_dir, index)
         if languages:
             print(f"Detected Languages: {', '.join(languages)}")
 
         # Parse files
-        analysis_result = parse_files(temp_dir)
+        with file_ingest.counting() as counts:
+            if state_dir:
+                incremental = IncrementalRun(temp_dir, state_file(state_dir, repo_url, 'parse_files'), ANALYZER_VERSION)
+                analysis_result = parse_files(temp_dir, incremental, workers, index)
+                incremental.save()
+                print(f"Parsed {incremental.stats['parsed']} changed files, reused {incremental.stats['reused']}")
+            else:
+                analysis_result = parse_files(temp_dir, workers=workers, index=index)
+        file_ingest.print_counts(counts)
     except ValueError as e:
         print(f"Error: {e}")
     finally:
@@ -107,8 +174,84 @@ def analyze_repository(repo_url: str) -> Dict[str, List[str]]:
 
     return analysis_result
 
+def parse_local_symbols(repo_path: str, ref: str = None, workers: int = None) -> SymbolTable:
+    """
+    Parses a checkout in place, or a bare repository or ref from git objects, into a SymbolTable.
+    """
+    if not uses_git_objects(repo_path, ref):
+        return parse_symbols(repo_path, workers=workers)
+
+    table = SymbolTable(extractors.RESULT_KEYS)
+    for path, content in iter_sources(repo_path, tuple(extractors.EXTRACTORS), ref or 'HEAD'):
+        for key, symbols in parse_path_source(path, content):
+            table.add_file(path, key, symbols)
+    return table
+
+def parse_path_source(path: str, content: str) -> List[Tuple[str, List[Tuple[str, str, str, int]]]]:
+    """
+    Returns the (result key, symbol entries) pairs for one file's source, as SymbolTable.add_file takes them.
+    """
+    with profiling.stage('regex_parse', len(content), path):
+        return list(extractors.extract(path, content).items())
+
+def parse_streamed_symbols(repo_path: str, ref: str = None) -> SymbolTable:
+    """
+    Parses a repository's git objects through a pipeline.Pipeline.
+
+    On a clone made by repo_clone.clone_for_streaming, file contents are
+    downloaded batch by batch while earlier batches are parsed. The table is
+    the same as parse_local_symbols gives for the same objects.
+    """
+    return stream_symbols(repo_path, parse_path_source, extractors.RESULT_KEYS, ref or 'HEAD',
+                          tuple(extractors.EXTRACTORS))
+
+def parse_local_repository(repo_path: str, ref: str = None, workers: int = None) -> Dict[str, List[str]]:
+    """
+    Parses a checkout in place, or a bare repository or ref from git objects.
+
+    Unlike analyze_local_repository, nothing is printed and errors are raised.
+    """
+    return parse_local_symbols(repo_path, ref, workers).to_dict()
+
+def analyze_local_repository(repo_path: str, ref: str = None, workers: int = None) -> Dict[str, List[str]]:
+    """
+    Analyzes a repository that is already on disk, without cloning it or using the network.
+
+    A working copy is parsed in place. A bare repository, or a specific ref, is read
+    from git objects through a single `git cat-file --batch` process.
+    """
+    analysis_result = {
+        'classes': [],
+        'functions': [],
+        'endpoints': []
+    }
+
+    try:
+        with file_ingest.counting() as counts:
+            if not uses_git_objects(repo_path, ref):
+                index = scan_files(repo_path)
+                languages = detect_languages(repo_path, index)
+                if languages:
+                    print(f"Detected Languages: {', '.join(languages)}")
+                analysis_result = parse_files(repo_path, workers=workers, index=index)
+            else:
+                entries = list_tree_entries(repo_path, ref or 'HEAD')
+                languages = languages_for_extensions({os.path.splitext(e['path'])[1]
+                                                      for e in entries if e['type'] == 'blob'})
+                if languages:
+                    print(f"Detected Languages: {', '.join(languages)}")
+                analysis_result = parse_local_repository(repo_path, ref, workers)
+        file_ingest.print_counts(counts)
+    except (ValueError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}")
+
+    return analysis_result
+
 # Example usage
 if __name__ == "__main__":
+    from repository_db import store_analysis_result
+    # Set REPO_ANALYZER_PROFILE=report.json (and REPO_ANALYZER_CPROFILE=run.prof) to profile the run
+    profiling.enable_from_environment()
     # Example GitHub repository URL
     repo_url = "https://github.com/username/repository"
 
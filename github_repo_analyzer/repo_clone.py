@@ -0,0 +1,129 @@
+import hashlib
+import os
+import subprocess
+from typing import List
+from extractors import EXTRACTORS
+import profiling
+
+# Clone strategies, from most to least data fetched
+CLONE_STRATEGIES = ('full', 'shallow', 'blobless', 'sparse')
+
+# Paths checked out by the sparse strategy; everything the analyzers read
+SPARSE_PATTERNS = [f"*{extension}" for extension in EXTRACTORS] + ['README.md']
+
+# Default location for bare mirrors reused across runs
+DEFAULT_MIRROR_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'repo_analyzer', 'mirrors')
+
+def authenticated_url(repo_url: str, access_token: str = None) -> str:
+    if access_token:
+        return repo_url.replace("https://", f"https://{access_token}@")
+    return repo_url
+
+def validate_strategy(strategy: str) -> None:
+    if strategy not in CLONE_STRATEGIES:
+        raise ValueError(f"Unknown clone strategy: {strategy} (expected one of {', '.join(CLONE_STRATEGIES)})")
+
+def clone_command(repo_url: str, target_dir: str, strategy: str = 'full') -> List[str]:
+    """
+    Builds the git clone command for a strategy.
+
+    shallow fetches only the latest commit, blobless fetches every commit and tree
+    but downloads file contents on demand, and sparse combines both and leaves the
+    checkout to checkout_sparse.
+    """
+    validate_strategy(strategy)
+    command = ['git', 'clone']
+    if strategy == 'shallow':
+        command += ['--depth', '1']
+    elif strategy == 'blobless':
+        command += ['--filter=blob:none']
+    elif strategy == 'sparse':
+        command += ['--depth', '1', '--filter=blob:none', '--no-checkout']
+    return command + [repo_url, target_dir]
+
+def checkout_sparse(target_dir: str, patterns: List[str] = SPARSE_PATTERNS, timeout: float = None) -> None:
+    """
+    Checks out only the files matching patterns in a clone made with --no-checkout.
+    """
+    subprocess.run(['git', '-C', target_dir, 'sparse-checkout', 'set', '--no-cone', *patterns], check=True, timeout=timeout)
+    subprocess.run(['git', '-C', target_dir, 'checkout', '--quiet'], check=True, timeout=timeout)
+
+def clone_for_streaming(repo_url: str, target_dir: str, access_token: str = None, ref: str = None,
+                        timeout: float = None) -> None:
+    """
+    Makes a bare clone holding only commits and trees; file contents are fetched later, batch by batch.
+
+    This is what pipeline.stream_symbols reads from. Without a ref only the
+    latest commit is fetched; with one, the whole history's trees are, so that
+    any commit can be read.
+    """
+    command = ['git', 'clone', '--quiet', '--bare', '--filter=blob:none']
+    if ref is None:
+        command += ['--depth', '1']
+    with profiling.stage('clone'):
+        subprocess.run(command + [authenticated_url(repo_url, access_token), target_dir], check=True, timeout=timeout)
+
+def mirror_path(cache_dir: str, repo_url: str) -> str:
+    name = repo_url.rstrip('/').rsplit('/', 1)[-1]
+    digest = hashlib.sha256(repo_url.rstrip('/').encode('utf-8')).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(cache_dir), f"{name}-{digest}.git")
+
+def update_mirror(repo_url: str, cache_dir: str = DEFAULT_MIRROR_CACHE, access_token: str = None,
+                  timeout: float = None) -> str:
+    """
+    Creates a bare mirror of the repository on first use and fetches into it afterwards.
+
+    The stored remote URL never contains the access token; it is only passed on the command line.
+    """
+    mirror = mirror_path(cache_dir, repo_url)
+    source = authenticated_url(repo_url, access_token)
+    if os.path.isdir(mirror):
+        subprocess.run(['git', '-C', mirror, 'fetch', '--quiet', '--prune', source, '+refs/*:refs/*'], check=True,
+                       timeout=timeout)
+    else:
+        os.makedirs(os.path.dirname(mirror), exist_ok=True)
+        subprocess.run(['git', 'clone', '--quiet', '--mirror', source, mirror], check=True, timeout=timeout)
+        subprocess.run(['git', '-C', mirror, 'remote', 'set-url', 'origin', repo_url], check=True)
+    return mirror
+
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def clone_with_strategy(repo_url: str, target_dir: str, strategy: str = 'full', access_token: str = None,
+                        mirror_cache: str = None, timeout: float = None) -> None:
+    """
+    Clones repo_url into target_dir with the given strategy.
+
+    With mirror_cache set, the repository is fetched into a persistent bare mirror
+    and the working copy is a local clone sharing the mirror's objects, so later
+    runs only download what changed upstream. Each git command is killed after
+    timeout seconds, raising subprocess.TimeoutExpired.
+    """
+    validate_strategy(strategy)
+    with profiling.stage('clone'):
+        _clone(repo_url, target_dir, strategy, access_token, mirror_cache, timeout)
+    if profiling.enabled():
+        # What git wrote to disk; with a mirror cache only the clone's own objects are counted
+        profiling.add('clone', nbytes=directory_size(os.path.join(target_dir, '.git')), calls=0)
+
+def _clone(repo_url: str, target_dir: str, strategy: str, access_token: str, mirror_cache: str,
+           timeout: float) -> None:
+    if mirror_cache:
+        mirror = update_mirror(repo_url, mirror_cache, access_token, timeout)
+        command = ['git', 'clone', '--quiet', '--shared']
+        if strategy == 'sparse':
+            command.append('--no-checkout')
+        subprocess.run(command + [mirror, target_dir], check=True, timeout=timeout)
+    else:
+        subprocess.run(clone_command(authenticated_url(repo_url, access_token), target_dir, strategy), check=True,
+                       timeout=timeout)
+
+    if strategy == 'sparse':
+        checkout_sparse(target_dir, timeout=timeout)
@@ -1,5 +1,8 @@
 import os
-import requests
+from git_trees import fetch_directory_listings
+from local_repo import directory_listings
+from output_writer import write_lines
+import profiling
 
 # GitHub API endpoint for repository contents
 github_api_url = "https://api.github.com/repos/{owner}/{repo}/contents/{path}"
@@ -12,19 +15,20 @@ def extract_github_details(repo_url):
     path = '/'.join(parts[6:]) if len(parts) > 6 else ''
     return owner, repo, path
 
-def fetch_directory_structure_from_github(owner, repo, path='', access_token=None, indent=''):
+def iter_directory_structure_from_github(owner, repo, path='', access_token=None, indent=''):
+    # Yields tree lines as each directory listing arrives instead of building the whole list first
+    # (http_client is imported here so rendering a local repository never loads requests)
+    import http_client
     headers = {}
     if access_token:
         headers['Authorization'] = f"token {access_token}"
 
     url = github_api_url.format(owner=owner, repo=repo, path=path)
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
 
     if response.status_code == 200:
         contents = response.json()
 
-        structure = []
-
         # Sort contents by type (directories first, then files)
         contents.sort(key=lambda x: (x['type'], x['name']))
 
@@ -33,21 +37,52 @@ def fetch_directory_structure_from_github(owner, repo, path='', access_token=Non
             prefix = '└── ' if is_last else '├── '
 
             if item['type'] == 'dir':
-                structure.append(f"{indent}{prefix}{item['name']}/")
-                structure.extend(fetch_directory_structure_from_github(owner, repo, item['path'], access_token, indent + '│   '))
+                yield f"{indent}{prefix}{item['name']}/"
+                yield from iter_directory_structure_from_github(owner, repo, item['path'], access_token, indent + '│   ')
             elif item['type'] == 'file':
-                structure.append(f"{indent}{prefix}{item['name']}")
-
-        return structure
+                yield f"{indent}{prefix}{item['name']}"
     else:
         raise ValueError(f"Failed to fetch directory structure: {response.status_code} - {response.json().get('message', 'Unknown error')}")
 
+def fetch_directory_structure_from_github(owner, repo, path='', access_token=None, indent=''):
+    return list(iter_directory_structure_from_github(owner, repo, path, access_token, indent))
+
+def iter_render_directory_structure(listings, path='', indent=''):
+    # Renders the same tree as fetch_directory_structure_from_github from listings already in memory
+    contents = sorted(listings[path.strip('/')], key=lambda x: (x['type'], x['name']))
+
+    for index, item in enumerate(contents):
+        is_last = index == len(contents) - 1
+        prefix = '└── ' if is_last else '├── '
+
+        if item['type'] == 'dir':
+            yield f"{indent}{prefix}{item['name']}/"
+            yield from iter_render_directory_structure(listings, item['path'], indent + '│   ')
+        elif item['type'] == 'file':
+            yield f"{indent}{prefix}{item['name']}"
+
+def render_directory_structure(listings, path='', indent=''):
+    return list(iter_render_directory_structure(listings, path, indent))
+
+def fetch_directory_structure_from_tree(owner, repo, path='', access_token=None, ref='HEAD'):
+    # Fetches the whole tree in one recursive Git Trees API call instead of one request per directory
+    listings = fetch_directory_listings(owner, repo, path, access_token, ref)
+    return render_directory_structure(listings, path)
+
+def fetch_directory_structure_from_local(repo_path, path='', ref=None):
+    # Renders a checkout or bare repository on disk exactly as the GitHub fetch would, without the network
+    listings = directory_listings(repo_path, path, ref)
+    return render_directory_structure(listings, path)
+
 def write_directory_structure_to_file(structure, output_file):
-    with open(output_file, 'w', encoding='utf-8') as file:
-        file.write("\n".join(structure))
+    # structure may be a generator; lines are flushed to disk as they are produced
+    write_lines(structure, output_file)
 
 # Example usage
 if __name__ == "__main__":
+    import requests
+    # Set REPO_ANALYZER_PROFILE=report.json (and REPO_ANALYZER_CPROFILE=run.prof) to profile the run
+    profiling.enable_from_environment()
     # Prompt user for GitHub repository URL
     repo_url = input("Enter GitHub repository URL (e.g., https://github.com/owner/repo): ").strip()
 
@@ -62,7 +97,7 @@ if __name__ == "__main__":
         output_file = f"{github_repo}_directory_structure.txt"
 
         # Fetch directory structure from GitHub
-        structure = fetch_directory_structure_from_github(github_owner, github_repo, github_path, access_token)
+        structure = iter_directory_structure_from_github(github_owner, github_repo, github_path, access_token)
         
         # Write directory structure to file
         write_directory_structure_to_file(structure, output_file)
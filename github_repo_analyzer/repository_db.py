@@ -1,9 +1,32 @@
+import hashlib
 import sqlite3
-from typing import List, Dict
+import threading
+import time
+from collections import defaultdict
+from typing import List, Dict, Iterable, NamedTuple, Optional, Tuple, Union
+import profiling
+from symbol_table import Symbol
 
 # SQLite database file path
 DB_FILE = 'repository_analysis.db'
 
+# Symbol kind stored for each key of an analysis result; other keys are stored as categories without a kind
+KIND_BY_CATEGORY = {
+    'classes': 'class',
+    'functions': 'function',
+    'endpoints': 'endpoint',
+    'Endpoints': 'endpoint',
+}
+
+# Legacy column each symbol kind is reported under by query_analysis_results
+LEGACY_COLUMNS = {'class': 'class_name', 'function': 'function_name', 'endpoint': 'endpoint'}
+
+# What diff_runs reports for each category, in output order
+CHANGES = ('added', 'removed', 'moved')
+
+# Connections are kept open per thread and database file, and reused across calls
+_connections = threading.local()
+
 def create_connection(db_file: str) -> sqlite3.Connection:
     """
     Create a database connection to the SQLite database specified by db_file
@@ -11,87 +34,353 @@ def create_connection(db_file: str) -> sqlite3.Connection:
     conn = None
     try:
         conn = sqlite3.connect(db_file)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
         return conn
     except sqlite3.Error as e:
         raise ValueError(f"Error connecting to database: {e}")
 
+def get_connection(db_file: str = None) -> sqlite3.Connection:
+    """
+    Return this thread's open connection to db_file, creating it and its tables on first use
+    """
+    db_file = db_file or DB_FILE
+    cache = getattr(_connections, 'cache', None)
+    if cache is None:
+        cache = _connections.cache = {}
+    if db_file not in cache:
+        conn = create_connection(db_file)
+        create_tables(conn)
+        cache[db_file] = conn
+    return cache[db_file]
+
+def close_connections() -> None:
+    """
+    Close every connection opened by this thread
+    """
+    for conn in getattr(_connections, 'cache', {}).values():
+        conn.close()
+    _connections.cache = {}
+
 def create_tables(conn: sqlite3.Connection) -> None:
     """
     Create necessary tables in the database if they don't exist
     """
     try:
-        cursor = conn.cursor()
-
-        # Create analysis_results table if not exists
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS analysis_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                repository_url TEXT NOT NULL,
-                class_name TEXT,
-                function_name TEXT,
-                endpoint TEXT
-            )
-        """)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS repositories (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE
+            );
 
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                repository_id INTEGER NOT NULL REFERENCES repositories (id),
+                commit_sha TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_repository ON runs (repository_id, id);
+
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                path TEXT NOT NULL,
+                digest BLOB,
+                UNIQUE (run_id, path)
+            );
+
+            CREATE TABLE IF NOT EXISTS symbols (
+                id INTEGER PRIMARY KEY,
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                file_id INTEGER REFERENCES files (id),
+                category TEXT NOT NULL,
+                kind TEXT,
+                name TEXT NOT NULL,
+                qualname TEXT,
+                line INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_symbols_name ON symbols (name, kind);
+        """)
+        # Databases created before files had digests get the column; their runs are diffed symbol by symbol
+        if 'digest' not in [column[1] for column in conn.execute("PRAGMA table_info(files)")]:
+            conn.execute("ALTER TABLE files ADD COLUMN digest BLOB")
+        # Symbols stored before qualified names were kept are qualified by their name alone
+        if 'qualname' not in [column[1] for column in conn.execute("PRAGMA table_info(symbols)")]:
+            conn.execute("ALTER TABLE symbols ADD COLUMN qualname TEXT")
+            conn.execute("ALTER TABLE symbols ADD COLUMN line INTEGER")
+            conn.execute("UPDATE symbols SET qualname = name")
+        conn.executescript("""
+            -- Covers the symbols of a run and of each of its files, so diffs never touch the table
+            DROP INDEX IF EXISTS idx_symbols_run;
+            DROP INDEX IF EXISTS idx_symbols_run_file;
+            CREATE INDEX IF NOT EXISTS idx_symbols_diff ON symbols (run_id, file_id, category, kind, qualname, name);
+        """)
         conn.commit()
+        _migrate_legacy_results(conn)
     except sqlite3.Error as e:
         raise ValueError(f"Error creating tables: {e}")
 
-def store_analysis_result(repo_url: str, analysis_result: Dict[str, List[str]]) -> None:
+def _migrate_legacy_results(conn: sqlite3.Connection) -> None:
     """
-    Store the analysis results (classes, functions, endpoints) in the database
+    Copy the rows of the analysis_results table of older databases into the normalized tables, once
+
+    Every row of a repository becomes a symbol of one run, in the original row
+    order, so query_analysis_results returns what it returned before. The old
+    table is renamed to analysis_results_migrated in the same transaction.
     """
-    try:
-        conn = create_connection(DB_FILE)
-        create_tables(conn)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='analysis_results'").fetchone() is None:
+        return
+    with conn:
+        urls = [row[0] for row in conn.execute(
+            "SELECT repository_url FROM analysis_results GROUP BY repository_url ORDER BY MIN(id)")]
+        for url in urls:
+            conn.execute("INSERT OR IGNORE INTO repositories (url) VALUES (?)", (url,))
+            repository_id = conn.execute("SELECT id FROM repositories WHERE url=?", (url,)).fetchone()[0]
+            run_id = conn.execute("INSERT INTO runs (repository_id, commit_sha, created_at) VALUES (?, NULL, ?)",
+                                  (repository_id, time.time())).lastrowid
+            conn.execute("""
+                INSERT INTO symbols (run_id, category, kind, name, qualname)
+                SELECT ?1,
+                       CASE WHEN class_name IS NOT NULL THEN 'classes'
+                            WHEN function_name IS NOT NULL THEN 'functions' ELSE 'endpoints' END,
+                       CASE WHEN class_name IS NOT NULL THEN 'class'
+                            WHEN function_name IS NOT NULL THEN 'function' ELSE 'endpoint' END,
+                       COALESCE(class_name, function_name, endpoint), COALESCE(class_name, function_name, endpoint)
+                FROM analysis_results
+                WHERE repository_url = ?2 AND COALESCE(class_name, function_name, endpoint) IS NOT NULL
+                ORDER BY id
+            """, (run_id, url))
+        conn.execute("ALTER TABLE analysis_results RENAME TO analysis_results_migrated")
 
-        cursor = conn.cursor()
+def _symbol_rows(run_id: int, analysis_result: Dict[str, List[str]]) -> Iterable[Tuple]:
+    # Plain names are their own qualified names, and have no file or line
+    for category, items in analysis_result.items():
+        kind = KIND_BY_CATEGORY.get(category)
+        for name in items:
+            yield (run_id, category, kind, str(name), str(name), None, None)
 
-        for class_name in analysis_result.get('classes', []):
-            cursor.execute("INSERT INTO analysis_results (repository_url, class_name) VALUES (?, ?)",
-                           (repo_url, class_name))
+def _digest(rows: List[Tuple]) -> bytes:
+    return hashlib.blake2b('\0'.join('\1'.join(map(str, row)) for row in sorted(rows, key=str)).encode('utf-8'),
+                           digest_size=16).digest()
 
-        for function_name in analysis_result.get('functions', []):
-            cursor.execute("INSERT INTO analysis_results (repository_url, function_name) VALUES (?, ?)",
-                           (repo_url, function_name))
+def _table_rows(conn: sqlite3.Connection, run_id: int, symbols: Iterable[Symbol]) -> Iterable[Tuple]:
+    # Kinds follow the category as for dict results, so runs stored either way compare equal.
+    # A file's digest covers what diff_runs compares, so moving a symbol within its file changes nothing
+    by_path = defaultdict(list)
+    for symbol in symbols:
+        by_path[symbol.path].append((symbol.category, KIND_BY_CATEGORY.get(symbol.category), str(symbol.name),
+                                     str(symbol.qualname), symbol.line))
+    conn.executemany("INSERT INTO files (run_id, path, digest) VALUES (?, ?, ?)",
+                     ((run_id, path, _digest([row[:4] for row in rows])) for path, rows in by_path.items()))
+    for path, file_id in conn.execute("SELECT path, id FROM files WHERE run_id=?", (run_id,)).fetchall():
+        for row in by_path[path]:
+            yield (run_id,) + row + (file_id,)
 
-        for endpoint in analysis_result.get('endpoints', []):
-            cursor.execute("INSERT INTO analysis_results (repository_url, endpoint) VALUES (?, ?)",
-                           (repo_url, endpoint))
+def store_analysis_run(repo_url: str, analysis_result: Union[Dict[str, List[str]], Iterable[Symbol]],
+                       commit_sha: str = None, db_file: str = None) -> int:
+    """
+    Store every category of an analysis result as one run, in a single transaction
 
-        conn.commit()
+    analysis_result is a dict of lists, or a symbol_table.SymbolTable whose
+    symbols are stored with the file they were found in, so diff_runs can tell
+    moved symbols apart. Symbols are written with executemany, so a run costs
+    one commit however many symbols it holds. Returns the id of the new run.
+    """
+    conn = get_connection(db_file)
+    try:
+        with profiling.stage('sqlite'), conn:
+            conn.execute("INSERT OR IGNORE INTO repositories (url) VALUES (?)", (repo_url,))
+            repository_id = conn.execute("SELECT id FROM repositories WHERE url=?", (repo_url,)).fetchone()[0]
+            run_id = conn.execute("INSERT INTO runs (repository_id, commit_sha, created_at) VALUES (?, ?, ?)",
+                                  (repository_id, commit_sha, time.time())).lastrowid
+            rows = (_symbol_rows(run_id, analysis_result) if isinstance(analysis_result, dict)
+                    else _table_rows(conn, run_id, analysis_result))
+            conn.executemany("INSERT INTO symbols (run_id, category, kind, name, qualname, line, file_id) "
+                             "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return run_id
     except sqlite3.Error as e:
         raise ValueError(f"Error storing analysis result in database: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+def store_analysis_result(repo_url: str, analysis_result: Dict[str, List[str]]) -> None:
+    """
+    Store the analysis results (classes, functions, endpoints) in the database
+    """
+    store_analysis_run(repo_url, {key: analysis_result.get(key, []) for key in ('classes', 'functions', 'endpoints')})
 
 def query_analysis_results(repo_url: str) -> List[Dict[str, str]]:
     """
     Query analysis results from the database for a given repository URL
     """
+    conn = get_connection()
     try:
-        conn = create_connection(DB_FILE)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT * FROM analysis_results WHERE repository_url=?", (repo_url,))
-        rows = cursor.fetchall()
+        cursor = conn.execute("""
+            SELECT s.kind, s.name FROM symbols s
+            JOIN runs r ON r.id = s.run_id
+            JOIN repositories repo ON repo.id = r.repository_id
+            WHERE repo.url=? AND s.kind IN ('class', 'function', 'endpoint')
+            ORDER BY s.id
+        """, (repo_url,))
 
         results = []
-        for row in rows:
+        for kind, name in cursor:
             result = {
-                'class_name': row[2],
-                'function_name': row[3],
-                'endpoint': row[4]
+                'class_name': None,
+                'function_name': None,
+                'endpoint': None
             }
+            result[LEGACY_COLUMNS[kind]] = name
             results.append(result)
 
         return results
     except sqlite3.Error as e:
         raise ValueError(f"Error querying analysis results from database: {e}")
-    finally:
-        if conn:
-            conn.close()
+
+def latest_run_id(repo_url: str, db_file: str = None, commit_sha: str = None) -> int:
+    """
+    Return the id of the most recent run stored for repo_url, or of commit_sha if given, or None
+    """
+    conn = get_connection(db_file)
+    query = "SELECT MAX(r.id) FROM runs r JOIN repositories repo ON repo.id = r.repository_id WHERE repo.url=?"
+    params = [repo_url]
+    if commit_sha:
+        query += " AND r.commit_sha=?"
+        params.append(commit_sha)
+    return conn.execute(query, params).fetchone()[0]
+
+def previous_run_id(run_id: int, db_file: str = None) -> int:
+    """
+    Return the id of the run stored for the same repository just before run_id, or None
+    """
+    conn = get_connection(db_file)
+    row = conn.execute("""
+        SELECT MAX(r.id) FROM runs r JOIN runs this ON this.repository_id = r.repository_id
+        WHERE this.id=? AND r.id < this.id
+    """, (run_id,)).fetchone()
+    return row[0]
+
+class SymbolChange(NamedTuple):
+    kind: Optional[str]
+    name: str
+    qualname: str
+    old_path: Optional[str]
+    new_path: Optional[str]
+
+# Every symbol of two runs counted per (category, kind, qualname, name), with the path NULL: +1 for each
+# occurrence in the new run and -1 in the old, so a symbol defined twice and then once is one removal
+_DIFF_SYMBOLS = """
+    SELECT category, kind, qualname, name, NULL, SUM((run_id IS ?2) - (run_id IS ?1)) AS delta
+    FROM symbols WHERE run_id IN (?1, ?2)
+    GROUP BY category, kind, qualname, name HAVING delta != 0
+    ORDER BY 1, 2, 3, 4
+"""
+
+# Only the symbols of files whose digest differs, or that exist in one run only, are counted per path;
+# CROSS JOIN keeps files as the outer loop, so symbols are read file by file from the index
+_DIFF_FILES = """
+    WITH changed (path) AS (
+             SELECT path FROM (SELECT path, digest FROM files WHERE run_id = ?1
+                               EXCEPT SELECT path, digest FROM files WHERE run_id = ?2)
+             UNION
+             SELECT path FROM (SELECT path, digest FROM files WHERE run_id = ?2
+                               EXCEPT SELECT path, digest FROM files WHERE run_id = ?1)
+         )
+    SELECT s.category, s.kind, s.qualname, s.name, f.path, SUM((f.run_id IS ?2) - (f.run_id IS ?1)) AS delta
+    FROM files f CROSS JOIN symbols s ON s.run_id = f.run_id AND s.file_id = f.id
+    WHERE f.run_id IN (?1, ?2) AND f.path IN changed
+    GROUP BY 1, 2, 3, 4, 5 HAVING delta != 0
+    ORDER BY 1, 2, 3, 4, 5
+"""
+
+def _has_digests(conn: sqlite3.Connection, run_id: int) -> bool:
+    row = conn.execute("SELECT COUNT(*), COUNT(digest) FROM files WHERE run_id=?", (run_id,)).fetchone()
+    return row[0] > 0 and row[0] == row[1]
+
+def diff_runs(old_run_id: Optional[int], new_run_id: int,
+              db_file: str = None) -> Dict[str, Dict[str, List[SymbolChange]]]:
+    """
+    Return the symbols added, removed or moved between two runs, by category
+
+    The runs may belong to different repositories; with old_run_id None every
+    symbol of the new run is added. Symbols are compared by qualified name, so
+    A.run and B.run are told apart, and counted, so a second definition of the
+    same name is an addition too. SQLite sums the counts over covering index
+    entries, so only changed symbols reach Python.
+    When both runs were stored from symbol tables, files are compared by the
+    digest of their symbols first and only the files that differ are read, so
+    a push that touches a few files costs a few files' symbols. A symbol
+    removed from one file and added in another of the same category is then
+    reported as moved. Categories without changes are left out.
+    """
+    conn = get_connection(db_file)
+    with_paths = _has_digests(conn, new_run_id) and (old_run_id is None or _has_digests(conn, old_run_id))
+    try:
+        with profiling.stage('sqlite'):
+            rows = conn.execute(_DIFF_FILES if with_paths else _DIFF_SYMBOLS, (old_run_id, new_run_id)).fetchall()
+    except sqlite3.Error as e:
+        raise ValueError(f"Error comparing runs in database: {e}")
+
+    # Pair each category's removals and additions of the same symbol, in path order, as moves
+    candidates = defaultdict(lambda: {'removed': [], 'added': []})
+    for category, kind, qualname, name, path, delta in rows:
+        candidates[(category, kind, qualname, name)]['added' if delta > 0 else 'removed'].extend([path] * abs(delta))
+    diff: Dict[str, Dict[str, List[SymbolChange]]] = {}
+    for (category, kind, qualname, name), paths in candidates.items():
+        removed, added = paths['removed'], paths['added']
+        moves = min(len(removed), len(added)) if with_paths else 0
+        changes = diff.setdefault(category, {change: [] for change in CHANGES})
+        changes['moved'] += [SymbolChange(kind, name, qualname, old, new)
+                             for old, new in zip(removed, added)][:moves]
+        changes['removed'] += [SymbolChange(kind, name, qualname, path, None) for path in removed[moves:]]
+        changes['added'] += [SymbolChange(kind, name, qualname, None, path) for path in added[moves:]]
+    return diff
+
+def diff_latest_runs(repo_url: str, db_file: str = None) -> Dict[str, Dict[str, List[SymbolChange]]]:
+    """
+    Return what changed between the two most recent runs of repo_url, as diff_runs does
+    """
+    run_id = latest_run_id(repo_url, db_file)
+    if run_id is None:
+        raise ValueError(f"No analysis runs stored for {repo_url}")
+    return diff_runs(previous_run_id(run_id, db_file), run_id, db_file)
+
+def format_diff(diff: Dict[str, Dict[str, List[SymbolChange]]]) -> List[str]:
+    """
+    Return one line per category with its counts, followed by a '+', '-' or '~' line per changed symbol
+    """
+    lines = []
+    for category, changes in diff.items():
+        lines.append(f"{category}: {len(changes['added'])} added, {len(changes['removed'])} removed, "
+                     f"{len(changes['moved'])} moved")
+        lines += [f"  + {c.qualname}" + (f"  ({c.new_path})" if c.new_path else '') for c in changes['added']]
+        lines += [f"  - {c.qualname}" + (f"  ({c.old_path})" if c.old_path else '') for c in changes['removed']]
+        lines += [f"  ~ {c.qualname}  ({c.old_path} -> {c.new_path})" for c in changes['moved']]
+    return lines
+
+def find_symbols(name: str, kind: str = None, latest_only: bool = True, db_file: str = None) -> List[Dict[str, str]]:
+    """
+    Find repositories defining a symbol with the given name, using the name index
+
+    By default only each repository's most recent run is searched.
+    """
+    conn = get_connection(db_file)
+    query = """
+        SELECT repo.url, r.id, s.category, s.kind, s.name FROM symbols s
+        JOIN runs r ON r.id = s.run_id
+        JOIN repositories repo ON repo.id = r.repository_id
+        WHERE s.name=?
+    """
+    params = [name]
+    if kind:
+        query += " AND s.kind=?"
+        params.append(kind)
+    if latest_only:
+        query += " AND r.id = (SELECT MAX(id) FROM runs WHERE repository_id = repo.id)"
+    try:
+        return [{'repository_url': row[0], 'run_id': row[1], 'category': row[2], 'kind': row[3], 'name': row[4]}
+                for row in conn.execute(query + " ORDER BY s.id", params)]
+    except sqlite3.Error as e:
+        raise ValueError(f"Error querying symbols from database: {e}")
 
 # Example usage
 if __name__ == "__main__":
@@ -115,6 +404,6 @@ if __name__ == "__main__":
         print("Query results from the database:")
         for result in query_results:
             print(result)
-    
+
     except Exception as e:
         print(f"Error: An unexpected error occurred - {e}")
@@ -0,0 +1,495 @@
+import ast
+import os
+import re
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from ast_visitor import dotted_name
+import file_ingest
+from file_index import FileIndex, scan_files
+from incremental import IncrementalRun
+from local_repo import iter_sources, uses_git_objects
+from parallel import analyze_files
+import parse_cache
+import profiling
+
+# Bump whenever route_facts returns something different, so cached and stored facts are not reused
+ROUTES_VERSION = '1'
+
+# A file that matches none of these declares no routes and is not parsed at all
+ROUTE_MARKERS = re.compile(r'urlpatterns|ROOT_URLCONF|Router|Blueprint|FastAPI|include_router|register_blueprint'
+                           r'|add_url_rule|@\w+\.(?:route|get|post|put|patch|delete|head|options|api_route|websocket)\(')
+
+# Django URL functions, DRF routers, and the Flask/FastAPI objects routes hang off, with their prefix keyword
+URL_FUNCTIONS = {'path', 're_path', 'url'}
+ROUTER_CLASSES = {'DefaultRouter', 'SimpleRouter', 'ExtendedDefaultRouter', 'ExtendedSimpleRouter', 'NestedSimpleRouter'}
+APP_CLASSES = {'Flask': ('flask', None), 'Blueprint': ('flask', 'url_prefix'),
+               'FastAPI': ('fastapi', None), 'APIRouter': ('fastapi', 'prefix')}
+ROUTE_DECORATORS = {'route', 'get', 'post', 'put', 'patch', 'delete', 'head', 'options', 'api_route', 'websocket'}
+MOUNT_METHODS = {'register_blueprint': 'url_prefix', 'include_router': 'prefix'}
+
+# Nesting allowed when following include() chains, imports and mounts; deeper chains are cycles in practice
+MAX_DEPTH = 32
+
+class Route(NamedTuple):
+    path: str
+    # Empty when the framework does not say (Django views, DRF viewsets)
+    methods: Tuple[str, ...]
+    view: Optional[str]
+    framework: str
+    file: str
+    line: int
+
+def empty_facts() -> Dict[str, Any]:
+    return {'imports': {}, 'urlconf': [], 'patterns': {}, 'routers': {}, 'apps': {}, 'decorated': [], 'mounts': []}
+
+def _string(node: Optional[ast.AST]) -> Optional[str]:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+def _keyword(call: ast.Call, *names: str) -> Optional[ast.AST]:
+    for keyword in call.keywords:
+        if keyword.arg in names:
+            return keyword.value
+    return None
+
+def _call_name(node: ast.AST) -> Optional[str]:
+    # 'path' for path(...), django.urls.path(...) and the like
+    if isinstance(node, ast.Call):
+        name = dotted_name(node.func)
+        return name.rsplit('.', 1)[-1] if name else None
+    return None
+
+def _include_target(node: ast.AST) -> Optional[List]:
+    """
+    Returns what an include() argument points at: ['module', dotted], ['name', local], ['router', local] or ['inline', entries].
+    """
+    if isinstance(node, (ast.Tuple, ast.List)) and node.elts:
+        # include((patterns, app_name)) and include([path(...), ...])
+        if isinstance(node, ast.List) and any(_call_name(element) in URL_FUNCTIONS for element in node.elts):
+            return ['inline', _pattern_list(node)]
+        return _include_target(node.elts[0])
+    if _string(node) is not None:
+        return ['module', node.value]
+    if isinstance(node, ast.Attribute) and node.attr == 'urls' and isinstance(node.value, ast.Name):
+        return ['router', node.value.id]
+    name = dotted_name(node)
+    return ['name', name] if name else None
+
+def _pattern_entry(node: ast.AST) -> Optional[List]:
+    """
+    Returns [kind, pattern, target, line] for a path()/re_path()/url() call: a 'view' with its dotted name, or an 'include'.
+    """
+    if _call_name(node) not in URL_FUNCTIONS or not node.args:
+        return None
+    pattern = _string(node.args[0])
+    if pattern is None:
+        return None
+    view = node.args[1] if len(node.args) > 1 else _keyword(node, 'view')
+    if _call_name(view) == 'include':
+        target = _include_target(view.args[0]) if view.args else None
+        return ['include', pattern, target, node.lineno] if target else None
+    return ['view', pattern, dotted_name(view) if view is not None else None, node.lineno]
+
+def _pattern_list(node: ast.AST, current: List = (), own: str = None) -> List[List]:
+    """
+    Returns the entries of a urlpatterns expression: list literals, `+` of lists, router.urls and other lists by name.
+    """
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [entry for entry in map(_pattern_entry, node.elts) if entry]
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return _pattern_list(node.left, current, own) + _pattern_list(node.right, current, own)
+    if isinstance(node, ast.Attribute) and node.attr == 'urls' and isinstance(node.value, ast.Name):
+        return [['include', '', ['router', node.value.id], node.lineno]]
+    if isinstance(node, ast.Name):
+        # `urlpatterns = urlpatterns + [...]` keeps what was there; another list is included where it stands
+        return list(current) if node.id == own else [['include', '', ['name', node.id], node.lineno]]
+    if isinstance(node, ast.Call) and _call_name(node) == 'format_suffix_patterns' and node.args:
+        return _pattern_list(node.args[0], current, own)
+    return []
+
+def _route_methods(decorator: str, call: ast.Call) -> List[str]:
+    if decorator in ('route', 'api_route'):
+        methods = _keyword(call, 'methods')
+        if isinstance(methods, (ast.List, ast.Tuple, ast.Set)):
+            return [method.upper() for method in map(_string, methods.elts) if method]
+        return ['GET']
+    return ['WEBSOCKET'] if decorator == 'websocket' else [decorator.upper()]
+
+def _collect(statements: List[ast.stmt], facts: Dict[str, Any]) -> None:
+    patterns, routers, apps = facts['patterns'], facts['routers'], facts['apps']
+    for node in statements:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    facts['imports'][alias.asname] = [0, alias.name, None]
+                else:
+                    top = alias.name.split('.')[0]
+                    facts['imports'][top] = [0, top, None]
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                facts['imports'][alias.asname or alias.name] = [node.level, node.module or '', alias.name]
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                if not isinstance(target, ast.Name):
+                    continue
+                name, value = target.id, node.value
+                kind = _call_name(value)
+                if kind in ROUTER_CLASSES:
+                    routers[name] = []
+                elif kind in APP_CLASSES:
+                    framework, prefix_keyword = APP_CLASSES[kind]
+                    prefix = _string(_keyword(value, prefix_keyword)) if prefix_keyword else None
+                    apps[name] = [framework, kind, prefix or '']
+                elif name == 'ROOT_URLCONF' and _string(value) is not None:
+                    facts['urlconf'].append(value.value)
+                elif name == 'urlpatterns' or name in patterns:
+                    patterns[name] = _pattern_list(value, patterns.get(name, []), name)
+                else:
+                    entries = _pattern_list(value) if isinstance(value, (ast.List, ast.Tuple, ast.BinOp)) else []
+                    if any(entry[0] == 'view' or entry[2][0] != 'name' for entry in entries):
+                        patterns[name] = entries
+        elif isinstance(node, ast.AugAssign) and isinstance(node.op, ast.Add) and isinstance(node.target, ast.Name):
+            if node.target.id == 'urlpatterns' or node.target.id in patterns:
+                patterns[node.target.id] = patterns.get(node.target.id, []) + _pattern_list(node.value)
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call) \
+                and isinstance(node.value.func, ast.Attribute) and isinstance(node.value.func.value, ast.Name):
+            call, method, owner = node.value, node.value.func.attr, node.value.func.value.id
+            if method in ('append', 'extend') and (owner == 'urlpatterns' or owner in patterns) and call.args:
+                added = [_pattern_entry(call.args[0])] if method == 'append' else _pattern_list(call.args[0])
+                patterns[owner] = patterns.get(owner, []) + [entry for entry in added if entry]
+            elif method == 'register' and owner in routers and len(call.args) >= 2 and _string(call.args[0]) is not None:
+                routers[owner].append([call.args[0].value, dotted_name(call.args[1]), node.lineno])
+            elif method in MOUNT_METHODS and call.args and dotted_name(call.args[0]):
+                prefix = _string(_keyword(call, MOUNT_METHODS[method]))
+                facts['mounts'].append([owner, dotted_name(call.args[0]), prefix, node.lineno])
+            elif method == 'add_url_rule' and call.args and _string(call.args[0]) is not None:
+                view = _keyword(call, 'view_func') or (call.args[2] if len(call.args) > 2 else None)
+                facts['decorated'].append([owner, call.args[0].value, _route_methods('route', call),
+                                           dotted_name(view) if view is not None else None, 'flask', node.lineno])
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in node.decorator_list:
+                if isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute) \
+                        and decorator.func.attr in ROUTE_DECORATORS and isinstance(decorator.func.value, ast.Name):
+                    route = _string(decorator.args[0]) if decorator.args else _string(_keyword(decorator, 'path', 'rule'))
+                    if route is not None:
+                        attr = decorator.func.attr
+                        facts['decorated'].append([decorator.func.value.id, route, _route_methods(attr, decorator),
+                                                   node.name, 'flask' if attr == 'route' else 'fastapi',
+                                                   decorator.lineno])
+        elif isinstance(node, ast.If):
+            _collect(node.body + node.orelse, facts)
+        elif isinstance(node, ast.Try):
+            _collect(node.body + [s for handler in node.handlers for s in handler.body] + node.orelse + node.finalbody,
+                     facts)
+
+def collect_route_facts(tree: ast.Module) -> Dict[str, Any]:
+    """
+    Collects what a module declares about routes, without resolving anything outside it.
+
+    The facts are its imports, ROOT_URLCONF settings, module-level URL pattern
+    lists (including `urlpatterns +=`, `.append` and `.extend`), DRF router
+    registrations, Flask/FastAPI app, blueprint and router objects, decorated
+    view functions and add_url_rule calls, and register_blueprint/include_router
+    mounts. They only hold lists, dicts, strings and numbers, so they can be
+    cached and stored as JSON.
+    """
+    facts = empty_facts()
+    _collect(tree.body, facts)
+    return facts
+
+def _parse_and_collect(content: str, filename: str) -> Dict[str, Any]:
+    with profiling.stage('ast.parse', len(content), None if filename == '<unknown>' else filename):
+        return collect_route_facts(ast.parse(content, filename=filename))
+
+def route_facts(content: str, filename: str = '<unknown>') -> Dict[str, Any]:
+    """
+    Returns a module's route facts; files that mention no routing at all are not parsed.
+
+    When a parse_cache.ParseCache is configured, content seen before is answered from it.
+    """
+    if not ROUTE_MARKERS.search(content):
+        return empty_facts()
+    return parse_cache.cached('routes', ROUTES_VERSION, content, lambda: _parse_and_collect(content, filename))
+
+def route_facts_for_file(file_path: str) -> Dict[str, Any]:
+    content = file_ingest.read_source(file_path)
+    return empty_facts() if content is None else route_facts(content, file_path)
+
+def module_name(path: str) -> str:
+    """
+    Returns the dotted module name of a repository-relative .py path: 'shop/urls.py' -> 'shop.urls'.
+    """
+    name = path.replace(os.sep, '/')[:-len('.py')]
+    if name.endswith('/__init__') or name == '__init__':
+        name = name[:-len('__init__')].rstrip('/')
+    return name.replace('/', '.')
+
+def join_pattern(prefix: str, pattern: str) -> str:
+    # Django joins include() prefixes and patterns as strings; a nested regex's ^ is dropped as Django does
+    if prefix and pattern.startswith('^'):
+        pattern = pattern[1:]
+    return prefix + pattern
+
+def join_url(prefix: str, path: str) -> str:
+    if not prefix:
+        return path
+    if not path:
+        return prefix
+    return prefix.rstrip('/') + '/' + path.lstrip('/')
+
+class RouteTable:
+    """
+    The resolved routes of a repository, built from each file's route facts.
+
+    Django include() chains are followed from the ROOT_URLCONF module (or from
+    every URL module nothing includes), joining prefixes along the way. DRF
+    router registrations give a list and a detail route each, and Flask and
+    FastAPI routes get the prefixes of their blueprint or router and of every
+    register_blueprint/include_router mount above it. Imports are resolved
+    between the repository's own modules only.
+
+    Files are added, replaced and removed one at a time with set_facts, update
+    and remove; the routes are resolved again only when next read, so changing
+    one file re-parses that file alone.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self._routes: Optional[List[Route]] = None
+        self._modules: Dict[str, str] = {}
+
+    def set_facts(self, path: str, facts: Dict[str, Any]) -> None:
+        self.files[path.replace(os.sep, '/')] = facts
+        self._routes = None
+
+    def update(self, path: str, content: str) -> None:
+        self.set_facts(path, route_facts(content, path))
+
+    def remove(self, path: str) -> None:
+        if self.files.pop(path.replace(os.sep, '/'), None) is not None:
+            self._routes = None
+
+    def routes(self) -> List[Route]:
+        if self._routes is None:
+            self._routes = self._resolve()
+        return self._routes
+
+    def __iter__(self) -> Iterator[Route]:
+        return iter(self.routes())
+
+    def __len__(self) -> int:
+        return len(self.routes())
+
+    def paths(self) -> List[str]:
+        return [route.path for route in self.routes()]
+
+    def find_module(self, dotted: str) -> Optional[str]:
+        """
+        Returns the file of a dotted module name; repositories with a src/ layout or a project directory match by suffix.
+        """
+        return self._modules.get(dotted)
+
+    def _index_modules(self) -> None:
+        self._modules = {}
+        # Shorter paths win when two modules share a suffix
+        for path in sorted(self.files, key=lambda p: (p.count('/'), p)):
+            parts = module_name(path).split('.')
+            for start in range(len(parts)):
+                self._modules.setdefault('.'.join(parts[start:]), path)
+
+    def _absolute_module(self, path: str, level: int, module: str) -> str:
+        if not level:
+            return module
+        package = module_name(path).split('.')
+        if not path.endswith('__init__.py'):
+            package = package[:-1]
+        package = package[:len(package) - (level - 1)] if level > 1 else package
+        return '.'.join(part for part in package + [module] if part)
+
+    def resolve(self, path: str, name: str, depth: int = 0) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Resolves a (possibly dotted) name used in path to (file, None) for a module or (file, name) for an object in it.
+        """
+        if depth > MAX_DEPTH:
+            return None
+        facts = self.files.get(path)
+        if facts is None:
+            return None
+        head, _, rest = name.partition('.')
+        if head not in facts['imports']:
+            return None if rest else (path, name)
+        level, module, imported = facts['imports'][head]
+        base = self._absolute_module(path, level, module)
+        if imported is not None:
+            if self.find_module(f"{base}.{imported}" if base else imported) is None:
+                # `from module import name`: an object defined in, or imported into, that module
+                target = self.find_module(base)
+                resolved = self.resolve(target, imported, depth + 1) if target is not None else None
+                if resolved is None or not rest:
+                    return resolved
+                return self.resolve(resolved[0], rest, depth + 1) if resolved[1] is None else None
+            base = f"{base}.{imported}" if base else imported
+        target = self.find_module(f"{base}.{rest}" if rest else base)
+        if target is not None:
+            return target, None
+        target = self.find_module(base)
+        if target is None or not rest:
+            return None
+        return self.resolve(target, rest, depth + 1)
+
+    def _resolve(self) -> List[Route]:
+        self._index_modules()
+        routes = self._django_routes()
+        routes += self._decorated_routes()
+        return routes
+
+    def _include_module(self, path: str, target: List) -> Optional[str]:
+        kind, value = target
+        if kind == 'module':
+            return self.find_module(value)
+        if kind == 'name':
+            resolved = self.resolve(path, value)
+            if resolved is not None and resolved[1] is None:
+                return resolved[0]
+        return None
+
+    def _included_modules(self, path: str, entries: List) -> Iterator[str]:
+        for kind, _, target, _ in entries:
+            if kind != 'include':
+                continue
+            if target[0] == 'inline':
+                yield from self._included_modules(path, target[1])
+            else:
+                module = self._include_module(path, target)
+                if module is not None:
+                    yield module
+
+    def _django_routes(self) -> List[Route]:
+        roots = [self.find_module(urlconf) for facts in self.files.values() for urlconf in facts['urlconf']]
+        roots = sorted({root for root in roots if root and 'urlpatterns' in self.files[root]['patterns']})
+        if not roots:
+            included = {module for path, facts in self.files.items()
+                        for entries in facts['patterns'].values() for module in self._included_modules(path, entries)}
+            roots = sorted(path for path, facts in self.files.items()
+                           if 'urlpatterns' in facts['patterns'] and path not in included)
+        routes = []
+        for root in roots:
+            self._walk_patterns(root, self.files[root]['patterns']['urlpatterns'], '', (root,), routes)
+        return routes
+
+    def _walk_patterns(self, path: str, entries: List, prefix: str, stack: Tuple[str, ...], routes: List[Route]) -> None:
+        if len(stack) > MAX_DEPTH:
+            return
+        for kind, pattern, target, line in entries:
+            joined = join_pattern(prefix, pattern)
+            if kind == 'view':
+                routes.append(Route(joined, (), target, 'django', path, line))
+            elif target[0] == 'inline':
+                self._walk_patterns(path, target[1], joined, stack, routes)
+            elif target[0] == 'router':
+                self._router_routes(path, target[1], joined, routes)
+            else:
+                module = self._include_module(path, target)
+                if module is not None:
+                    if module not in stack:
+                        self._walk_patterns(module, self.files[module]['patterns'].get('urlpatterns', []), joined,
+                                            stack + (module,), routes)
+                elif target[0] == 'name':
+                    # A pattern list defined in this module or imported from another
+                    resolved = self.resolve(path, target[1])
+                    if resolved is not None and resolved[1] in self.files[resolved[0]]['patterns'] \
+                            and (resolved[0], resolved[1]) != (path, 'urlpatterns'):
+                        self._walk_patterns(resolved[0], self.files[resolved[0]]['patterns'][resolved[1]], joined,
+                                            stack + (resolved[0],), routes)
+
+    def _router_routes(self, path: str, name: str, prefix: str, routes: List[Route]) -> None:
+        resolved = self.resolve(path, name)
+        if resolved is None or resolved[1] not in self.files[resolved[0]]['routers']:
+            return
+        router_path = resolved[0]
+        for registration, view, line in self.files[router_path]['routers'][resolved[1]]:
+            base = join_pattern(prefix, registration.strip('^$/'))
+            base = base + '/' if registration.strip('^$/') else base
+            routes.append(Route(base, (), view, 'drf', router_path, line))
+            routes.append(Route(base + '<pk>/', (), view, 'drf', router_path, line))
+
+    def _decorated_routes(self) -> List[Route]:
+        parents: Dict[Tuple[str, str], List[Tuple[Tuple[str, str], Optional[str]]]] = {}
+        for path, facts in self.files.items():
+            for parent, child, prefix, _ in facts['mounts']:
+                parent_key, child_key = self.resolve(path, parent), self.resolve(path, child)
+                if parent_key is not None and child_key is not None and child_key[1] is not None:
+                    parents.setdefault(child_key, []).append((parent_key, prefix))
+
+        def app(key: Tuple[str, str]) -> Optional[List]:
+            facts = self.files.get(key[0])
+            return facts['apps'].get(key[1]) if facts and key[1] else None
+
+        def prefixes(key: Tuple[str, str], depth: int = 0) -> List[str]:
+            own = app(key)[2] if app(key) else ''
+            if key not in parents or depth > MAX_DEPTH:
+                return [own]
+            result = []
+            for parent, mount_prefix in parents[key]:
+                for outer in prefixes(parent, depth + 1):
+                    # register_blueprint's url_prefix replaces the blueprint's own; include_router's is added to it
+                    if mount_prefix is not None and app(key) and app(key)[1] == 'Blueprint':
+                        result.append(join_url(outer, mount_prefix))
+                    else:
+                        result.append(join_url(join_url(outer, mount_prefix or ''), own))
+            return result
+
+        routes = []
+        for path, facts in self.files.items():
+            for owner, route, methods, view, framework, line in facts['decorated']:
+                key = self.resolve(path, owner) or (path, owner)
+                if app(key):
+                    framework = app(key)[0]
+                for prefix in prefixes(key):
+                    routes.append(Route(join_url(prefix, route), tuple(methods), view, framework, path, line))
+        return routes
+
+def build_route_table(base_path: str, incremental: IncrementalRun = None, workers: int = None,
+                      index: FileIndex = None) -> RouteTable:
+    """
+    Collects every Python file's route facts in one pass over the repository and returns the resolved RouteTable.
+
+    With an IncrementalRun, the facts of files whose blob is unchanged since the
+    last run are reused; with workers set, files are parsed in that many processes.
+    """
+    if index is None:
+        index = scan_files(base_path)
+    entries = index.with_extension('.py')
+    table = RouteTable()
+    results = analyze_files(route_facts_for_file, [(entry.path,) for entry in entries], base_path, incremental, workers)
+    for entry, facts in zip(entries, results):
+        table.set_facts(entry.relpath, facts)
+    return table
+
+def local_route_table(repo_path: str, ref: str = None, workers: int = None) -> RouteTable:
+    """
+    Builds the RouteTable of a checkout in place, or of a bare repository or ref from git objects.
+    """
+    if not uses_git_objects(repo_path, ref):
+        return build_route_table(repo_path, workers=workers)
+    table = RouteTable()
+    for path, content in iter_sources(repo_path, '.py', ref or 'HEAD'):
+        table.update(path, content)
+    return table
+
+def declared_patterns(content: str) -> List[str]:
+    """
+    Returns the URL patterns a single urls.py declares in urlpatterns, include() prefixes included, without resolving them.
+    """
+    patterns = []
+
+    def walk(entries: List, prefix: str) -> None:
+        for kind, pattern, target, _ in entries:
+            patterns.append(join_pattern(prefix, pattern))
+            if kind == 'include' and target[0] == 'inline':
+                walk(target[1], join_pattern(prefix, pattern))
+
+    walk(route_facts(content)['patterns'].get('urlpatterns', []), '')
+    return patterns
+
+def format_route(route: Route) -> str:
+    methods = ','.join(route.methods) or 'ANY'
+    return f"{methods:<8} {route.path or '/'}  {route.view or '-'}  ({route.file}:{route.line})"
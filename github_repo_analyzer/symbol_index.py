@@ -0,0 +1,361 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+from repository_db import KIND_BY_CATEGORY, get_connection
+
+# File signature and format version; bump FORMAT_VERSION whenever the layout changes
+MAGIC = b'RSYMIDX\0'
+FORMAT_VERSION = 1
+
+# Sections start on 8-byte boundaries so every array can be cast in place from the mapping
+ALIGNMENT = 8
+
+# Array sections and their element types, in file order
+SECTIONS = [
+    ('name_offsets', 'Q'),      # n_names + 1 byte offsets into name_data
+    ('name_data', 'B'),         # UTF-8 names, sorted, concatenated
+    ('posting_starts', 'Q'),    # n_names + 1 offsets into the posting arrays
+    ('posting_repos', 'I'),     # repository id of each posting
+    ('posting_categories', 'H'),  # category id of each posting
+    ('repo_offsets', 'Q'),      # n_repos + 1 byte offsets into repo_data
+    ('repo_data', 'B'),         # UTF-8 repository URLs, in id order
+]
+
+def _pad(length: int) -> int:
+    return -length % ALIGNMENT
+
+class SymbolIndexBuilder:
+    """
+    Collects analysis results and writes them out as a symbol index file.
+
+    Names, repositories and categories are interned as they are added; each
+    (name, repository, category) triple is kept once, however often it occurs.
+    """
+
+    def __init__(self):
+        self.names: Dict[str, int] = {}
+        self.repositories: Dict[str, int] = {}
+        self.categories: Dict[str, int] = {}
+        self.postings = set()
+
+    def add(self, repo_url: str, analysis_result: Dict[str, List[str]]) -> None:
+        """
+        Adds a categorize_items or parse_files result for one repository.
+        """
+        repo_id = self.repositories.setdefault(repo_url, len(self.repositories))
+        names, postings = self.names, self.postings
+        for category, items in analysis_result.items():
+            category_id = self.categories.setdefault(category, len(self.categories))
+            for name in items:
+                name_id = names.setdefault(str(name), len(names))
+                postings.add((name_id, repo_id, category_id))
+
+    def add_from_database(self, db_file: str = None, latest_only: bool = True) -> None:
+        """
+        Adds the runs stored by repository_db: each repository's latest run, or every run.
+        """
+        query = """
+            SELECT repo.url, s.category, s.name FROM symbols s
+            JOIN runs r ON r.id = s.run_id
+            JOIN repositories repo ON repo.id = r.repository_id
+        """
+        if latest_only:
+            query += " WHERE r.id = (SELECT MAX(id) FROM runs WHERE repository_id = repo.id)"
+        current, result = None, {}
+        for url, category, name in get_connection(db_file).execute(query + " ORDER BY repo.id, s.id"):
+            if url != current:
+                if current is not None:
+                    self.add(current, result)
+                current, result = url, {}
+            result.setdefault(category, []).append(name)
+        if current is not None:
+            self.add(current, result)
+
+    def write(self, path: str) -> None:
+        """
+        Writes the index to path atomically, replacing any previous index there.
+        """
+        # Byte order of UTF-8 is code point order, so the sorted names can be searched as bytes
+        encoded = sorted((name.encode('utf-8', 'surrogatepass'), name_id) for name, name_id in self.names.items())
+        new_ids = array('Q', bytes(8 * len(encoded)))
+        name_offsets, name_data = array('Q', [0]), bytearray()
+        for new_id, (data, old_id) in enumerate(encoded):
+            new_ids[old_id] = new_id
+            name_data += data
+            name_offsets.append(len(name_data))
+
+        postings = sorted((new_ids[name_id], repo_id, category_id) for name_id, repo_id, category_id in self.postings)
+        posting_starts = array('Q', bytes(8 * (len(encoded) + 1)))
+        for name_id, _, _ in postings:
+            posting_starts[name_id + 1] += 1
+        for i in range(len(encoded)):
+            posting_starts[i + 1] += posting_starts[i]
+
+        repo_offsets, repo_data = array('Q', [0]), bytearray()
+        for url in self.repositories:
+            repo_data += url.encode('utf-8', 'surrogatepass')
+            repo_offsets.append(len(repo_data))
+
+        arrays = {
+            'name_offsets': name_offsets,
+            'name_data': name_data,
+            'posting_starts': posting_starts,
+            'posting_repos': array('I', (repo_id for _, repo_id, _ in postings)),
+            'posting_categories': array('H', (category_id for _, _, category_id in postings)),
+            'repo_offsets': repo_offsets,
+            'repo_data': repo_data,
+        }
+        if len(self.categories) > 0xFFFF:
+            raise ValueError(f"Failed to write symbol index: {len(self.categories)} categories (at most 65535)")
+        header = {'version': FORMAT_VERSION, 'byteorder': sys.byteorder, 'categories': list(self.categories),
+                  'names': len(encoded), 'postings': len(postings), 'repositories': len(self.repositories)}
+        # The header records where each section starts; its own length depends on those numbers, so size it first
+        header['sections'] = {name: [0, 0] for name, _ in SECTIONS}
+        header_size = 12 + len(json.dumps(header)) + 48 * len(SECTIONS)
+        header_size += _pad(header_size)
+        position = header_size
+        for name, _ in SECTIONS:
+            data = arrays[name]
+            length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+            header['sections'][name] = [position, length]
+            position += length + _pad(length)
+        header_bytes = json.dumps(header).encode('utf-8')
+        if 12 + len(header_bytes) > header_size:
+            raise ValueError("Failed to write symbol index: header does not fit")
+
+        temp_path = f"{path}.tmp{os.getpid()}"
+        with open(temp_path, 'wb') as file:
+            file.write(MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes)
+            file.write(bytes(header_size - 12 - len(header_bytes)))
+            for name, _ in SECTIONS:
+                data = arrays[name]
+                file.write(data.tobytes() if isinstance(data, array) else data)
+                file.write(bytes(_pad(header['sections'][name][1])))
+        os.replace(temp_path, path)
+
+class SymbolIndex:
+    """
+    Read-only view of a symbol index file, memory-mapped so opening it costs nothing up front.
+
+    Names are kept sorted, so exact and prefix lookups are binary searches over
+    the mapping; only the names compared along the way are copied out of it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Failed to open symbol index {path}: file is empty")
+        self._views = []
+        try:
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"Failed to open symbol index {path}: not a symbol index")
+            header_length, = struct.unpack_from('<I', self._map, len(MAGIC))
+            self.header = json.loads(self._map[12:12 + header_length])
+            if self.header['version'] != FORMAT_VERSION:
+                raise ValueError(f"Failed to open symbol index {path}: format version {self.header['version']}")
+        except Exception:
+            self.close()
+            raise
+        self.categories: List[str] = self.header['categories']
+        self._kinds = [KIND_BY_CATEGORY.get(category) for category in self.categories]
+        self._name_data = self.header['sections']['name_data'][0]
+        self._repo_data = self.header['sections']['repo_data'][0]
+        self._name_offsets = self._section('name_offsets', 'Q')
+        self._posting_starts = self._section('posting_starts', 'Q')
+        self._posting_repos = self._section('posting_repos', 'I')
+        self._posting_categories = self._section('posting_categories', 'H')
+        self._repo_offsets = self._section('repo_offsets', 'Q')
+        self._repo_cache: Dict[int, str] = {}
+
+    def _section(self, name: str, typecode: str):
+        start, length = self.header['sections'][name]
+        if self.header['byteorder'] != sys.byteorder:
+            # Written on a machine of the other byte order: fall back to a swapped copy
+            data = array(typecode, self._map[start:start + length])
+            data.byteswap()
+            return data
+        view = memoryview(self._map)[start:start + length].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def close(self) -> None:
+        for view in self._views:
+            view.release()
+        self._views = []
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'SymbolIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.header['names']
+
+    def name(self, name_id: int) -> str:
+        return self._name_bytes(name_id).decode('utf-8', 'surrogatepass')
+
+    def _name_bytes(self, name_id: int) -> bytes:
+        base = self._name_data
+        return self._map[base + self._name_offsets[name_id]:base + self._name_offsets[name_id + 1]]
+
+    def repository(self, repo_id: int) -> str:
+        url = self._repo_cache.get(repo_id)
+        if url is None:
+            base = self._repo_data
+            data = self._map[base + self._repo_offsets[repo_id]:base + self._repo_offsets[repo_id + 1]]
+            url = self._repo_cache[repo_id] = data.decode('utf-8', 'surrogatepass')
+        return url
+
+    def _lower_bound(self, key: bytes) -> int:
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_bytes(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _prefix_end(self, prefix: bytes, low: int) -> int:
+        # First name at or after low that no longer starts with prefix
+        high, size = len(self), len(prefix)
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_bytes(middle)[:size] <= prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find_name(self, name: str) -> int:
+        """
+        Returns the id of name, or -1 if no repository defines it.
+        """
+        key = name.encode('utf-8', 'surrogatepass')
+        name_id = self._lower_bound(key)
+        if name_id < len(self) and self._name_bytes(name_id) == key:
+            return name_id
+        return -1
+
+    def name_range(self, prefix: str) -> range:
+        """
+        Returns the ids of every name starting with prefix; they are consecutive because names are sorted.
+        """
+        key = prefix.encode('utf-8', 'surrogatepass')
+        start = self._lower_bound(key)
+        return range(start, self._prefix_end(key, start))
+
+    def _postings(self, name_id: int, kind: str = None, category: str = None) -> Iterator[Tuple[int, int]]:
+        for position in range(self._posting_starts[name_id], self._posting_starts[name_id + 1]):
+            category_id = self._posting_categories[position]
+            if kind is not None and self._kinds[category_id] != kind:
+                continue
+            if category is not None and self.categories[category_id] != category:
+                continue
+            yield self._posting_repos[position], category_id
+
+    def _records(self, name_id: int, name: str, kind: str = None, category: str = None) -> Iterator[Dict[str, str]]:
+        for repo_id, category_id in self._postings(name_id, kind, category):
+            yield {'repository_url': self.repository(repo_id), 'category': self.categories[category_id],
+                   'kind': self._kinds[category_id], 'name': name}
+
+    def lookup(self, name: str, kind: str = None, category: str = None) -> List[Dict[str, str]]:
+        """
+        Returns every repository and category defining exactly name, optionally of one kind or category.
+        """
+        name_id = self.find_name(name)
+        if name_id < 0:
+            return []
+        return list(self._records(name_id, name, kind, category))
+
+    def repositories_defining(self, name: str, kind: str = None, category: str = None) -> List[str]:
+        """
+        Returns the repositories defining name, each once, in the order they were added to the index.
+        """
+        name_id = self.find_name(name)
+        if name_id < 0:
+            return []
+        repo_ids = sorted({repo_id for repo_id, _ in self._postings(name_id, kind, category)})
+        return [self.repository(repo_id) for repo_id in repo_ids]
+
+    def names_with_prefix(self, prefix: str, limit: int = None) -> List[str]:
+        """
+        Returns the distinct names starting with prefix, in sorted order.
+        """
+        ids = self.name_range(prefix)
+        if limit is not None:
+            ids = ids[:limit]
+        return [self.name(name_id) for name_id in ids]
+
+    def search_prefix(self, prefix: str, kind: str = None, category: str = None,
+                      limit: int = None) -> Iterator[Dict[str, str]]:
+        """
+        Yields a record for every definition of a name starting with prefix, in name order.
+        """
+        produced = 0
+        for name_id in self.name_range(prefix):
+            for record in self._records(name_id, self.name(name_id), kind, category):
+                if limit is not None and produced >= limit:
+                    return
+                produced += 1
+                yield record
+
+def build_index(results: Iterable[Tuple[str, Dict[str, List[str]]]], path: str) -> None:
+    """
+    Writes an index of (repository URL, analysis result) pairs to path.
+    """
+    builder = SymbolIndexBuilder()
+    for repo_url, analysis_result in results:
+        builder.add(repo_url, analysis_result)
+    builder.write(path)
+
+def build_index_from_database(path: str, db_file: str = None, latest_only: bool = True) -> None:
+    """
+    Writes an index of the runs stored by repository_db to path.
+    """
+    builder = SymbolIndexBuilder()
+    builder.add_from_database(db_file, latest_only)
+    builder.write(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query a symbol index of analyzed repositories.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="index the runs stored in the database")
+    build.add_argument('index', help="index file to write")
+    build.add_argument('--db', help="SQLite database file (default: repository_db.DB_FILE)")
+    build.add_argument('--all-runs', action='store_true', help="index every run, not just each repository's latest")
+    query = subparsers.add_parser('query', help="look up a name, or every name starting with a prefix")
+    query.add_argument('index', help="index file to read")
+    query.add_argument('name')
+    query.add_argument('--prefix', action='store_true', help="match every name starting with NAME")
+    query.add_argument('--kind', choices=sorted(set(KIND_BY_CATEGORY.values())))
+    query.add_argument('--category')
+    query.add_argument('--limit', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_index_from_database(args.index, args.db, not args.all_runs)
+        with SymbolIndex(args.index) as index:
+            print(f"Indexed {index.header['names']} names, {index.header['postings']} definitions "
+                  f"in {index.header['repositories']} repositories")
+    else:
+        with SymbolIndex(args.index) as index:
+            if args.prefix:
+                records = index.search_prefix(args.name, args.kind, args.category, args.limit)
+            else:
+                records = index.lookup(args.name, args.kind, args.category)[:args.limit]
+            for record in records:
+                print(f"{record['name']}\t{record['category']}\t{record['repository_url']}")
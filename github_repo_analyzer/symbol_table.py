@@ -0,0 +1,128 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+class Symbol(NamedTuple):
+    path: str
+    line: int
+    kind: str
+    name: Any
+    qualname: Any
+    category: str
+
+class CategoryView(Sequence):
+    """
+    The symbols of one category, read straight from the table's columns without copying them.
+    """
+
+    __slots__ = ('table', 'rows')
+
+    def __init__(self, table: 'SymbolTable', rows: array):
+        self.table = table
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.table[row] for row in self.rows[index]]
+        return self.table[self.rows[index]]
+
+    def __iter__(self) -> Iterator[Symbol]:
+        table = self.table
+        return (table[row] for row in self.rows)
+
+    def names(self) -> List[Any]:
+        values, names = self.table.values, self.table.names
+        return [values[names[row]] for row in self.rows]
+
+class SymbolTable:
+    """
+    Extracted symbols stored column by column, with every path, kind, name and category interned once.
+
+    A symbol costs six array slots (about 24 bytes) instead of a Python object
+    per field; Symbol records are only built when a row is read. Rows keep the
+    order they were added in, and each category keeps the list of its rows, so
+    category views and the dict-of-lists result are derived without copying
+    symbols around.
+    """
+
+    __slots__ = ('values', '_ids', 'paths', 'lines', 'kinds', 'names', 'qualnames', 'category_ids', '_rows')
+
+    def __init__(self, categories: Iterable[str] = ()):
+        self.values: List[Any] = []
+        self._ids: Dict[Tuple[type, Any], int] = {}
+        self.paths = array('I')
+        self.lines = array('I')
+        self.kinds = array('I')
+        self.names = array('I')
+        self.qualnames = array('I')
+        self.category_ids = array('I')
+        self._rows: Dict[str, array] = {}
+        for category in categories:
+            self.add_category(category)
+
+    def intern(self, value: Any) -> int:
+        # Keyed by type as well, so 1, 1.0 and True in URL patterns stay distinct values
+        key = (type(value), value)
+        value_id = self._ids.get(key)
+        if value_id is None:
+            value_id = self._ids[key] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def add_category(self, category: str) -> array:
+        rows = self._rows.get(category)
+        if rows is None:
+            rows = self._rows[category] = array('I')
+            self.intern(category)
+        return rows
+
+    def add(self, path: str, line: int, kind: str, name: Any, qualname: Any, category: str) -> None:
+        self.add_file(path, category, [(kind, name, qualname, line)])
+
+    def add_file(self, path: str, category: str, symbols: Iterable[Sequence]) -> None:
+        """
+        Adds (kind, name, qualname, line) entries found in one file, all of them in one category.
+        """
+        rows = self.add_category(category)
+        intern = self.intern
+        path_id, category_id = intern(path), intern(category)
+        for kind, name, qualname, line in symbols:
+            rows.append(len(self.names))
+            self.paths.append(path_id)
+            self.lines.append(line or 0)
+            self.kinds.append(intern(kind))
+            self.names.append(intern(name))
+            self.qualnames.append(intern(qualname))
+            self.category_ids.append(category_id)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, row: int) -> Symbol:
+        values = self.values
+        return Symbol(values[self.paths[row]], self.lines[row], values[self.kinds[row]], values[self.names[row]],
+                      values[self.qualnames[row]], values[self.category_ids[row]])
+
+    def __iter__(self) -> Iterator[Symbol]:
+        return (self[row] for row in range(len(self)))
+
+    def categories(self) -> List[str]:
+        return list(self._rows)
+
+    def category(self, category: str) -> CategoryView:
+        return CategoryView(self, self._rows.get(category, array('I')))
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        """
+        Returns the names in each category, in the dict-of-lists shape categorize_items and parse_files return.
+        """
+        return {category: self.category(category).names() for category in self._rows}
+
+    def nbytes(self) -> int:
+        """
+        Bytes held by the columns and row lists, not counting the interned values themselves.
+        """
+        columns = (self.paths, self.lines, self.kinds, self.names, self.qualnames, self.category_ids)
+        return sum(column.itemsize * len(column) for column in columns + tuple(self._rows.values()))
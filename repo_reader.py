@@ -1,7 +1,20 @@
 import os
+import shutil
+import sys
+import tempfile
 import requests
-import ast
-import re
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'github_repo_analyzer'))
+import http_client
+from ast_visitor import analyze_source
+from git_trees import fetch_directory_listings
+from output_writer import DEFAULT_BUFFER_SIZE, write_lines
+import parse_cache
+from async_crawler import DEFAULT_CONCURRENCY, crawl_directory_listings, fetch_files_concurrently
+from local_repo import directory_listings, read_files
+from pipeline import DEFAULT_CAPACITY, DEFAULT_FETCH_WORKERS, Pipeline
+import profiling
+from routes import declared_patterns
 
 # GitHub API endpoint for repository contents
 github_api_url = "https://api.github.com/repos/{owner}/{repo}/contents/{path}"
@@ -13,31 +26,61 @@ def extract_github_details(repo_url):
     path = '/'.join(parts[6:]) if len(parts) > 6 else ''
     return owner, repo, path
 
-def fetch_directory_structure_from_github(owner, repo, path='', access_token=None):
+def iter_directory_structure_from_github(owner, repo, path='', access_token=None):
+    # Yields structure lines as each directory listing arrives instead of building the whole list first
     headers = {}
     if access_token:
         headers['Authorization'] = f"token {access_token}"
 
     url = github_api_url.format(owner=owner, repo=repo, path=path)
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
 
     if response.status_code == 200:
         contents = response.json()
-        structure = []
         contents.sort(key=lambda x: (x['type'], x['name']))
         for item in contents:
             if item['type'] == 'dir':
-                structure.append(f"├── {item['name']}/")
-                structure.extend(fetch_directory_structure_from_github(owner, repo, item['path'], access_token))
+                yield f"├── {item['name']}/"
+                yield from iter_directory_structure_from_github(owner, repo, item['path'], access_token)
             elif item['type'] == 'file':
-                structure.append(f"├── {item['name']}")
-        return structure
+                yield f"├── {item['name']}"
     else:
         raise ValueError(f"Failed to fetch directory structure: {response.status_code} - {response.json()['message']}")
 
+def fetch_directory_structure_from_github(owner, repo, path='', access_token=None):
+    return list(iter_directory_structure_from_github(owner, repo, path, access_token))
+
+def iter_render_directory_structure(listings, path=''):
+    # Renders the same structure as fetch_directory_structure_from_github from listings already in memory
+    contents = sorted(listings[path.strip('/')], key=lambda x: (x['type'], x['name']))
+    for item in contents:
+        if item['type'] == 'dir':
+            yield f"├── {item['name']}/"
+            yield from iter_render_directory_structure(listings, item['path'])
+        elif item['type'] == 'file':
+            yield f"├── {item['name']}"
+
+def render_directory_structure(listings, path=''):
+    return list(iter_render_directory_structure(listings, path))
+
+def fetch_directory_structure_from_tree(owner, repo, path='', access_token=None, ref='HEAD'):
+    # Fetches the whole tree in one recursive Git Trees API call instead of one request per directory
+    listings = fetch_directory_listings(owner, repo, path, access_token, ref)
+    return render_directory_structure(listings, path)
+
+def fetch_directory_structure_concurrently(owner, repo, path='', access_token=None, concurrency=DEFAULT_CONCURRENCY):
+    # Crawls directories breadth-first with up to `concurrency` requests in flight
+    listings = crawl_directory_listings(owner, repo, path, access_token, concurrency)
+    return render_directory_structure(listings, path)
+
+def fetch_directory_structure_from_local(repo_path, path='', ref=None):
+    # Renders a checkout or bare repository on disk exactly as the GitHub fetch would, without the network
+    listings = directory_listings(repo_path, path, ref)
+    return render_directory_structure(listings, path)
+
 def write_directory_structure_to_file(structure, output_file):
-    with open(output_file, 'w', encoding='utf-8') as file:
-        file.write("\n".join(structure))
+    # structure may be a generator; lines are flushed to disk as they are produced
+    write_lines(structure, output_file)
 
 def fetch_file_content_from_github(owner, repo, path, access_token=None):
     headers = {}
@@ -45,72 +88,186 @@ def fetch_file_content_from_github(owner, repo, path, access_token=None):
         headers['Authorization'] = f"token {access_token}"
 
     url = github_api_url.format(owner=owner, repo=repo, path=path)
-    response = requests.get(url, headers=headers)
+    response = http_client.get(url, headers=headers)
 
     if response.status_code == 200:
         file_content = response.json()
         if file_content['type'] == 'file':
-            return requests.get(file_content['download_url']).text
+            return http_client.get(file_content['download_url']).text
     else:
         raise ValueError(f"Failed to fetch file content: {response.status_code} - {response.json()['message']}")
 
 def extract_details_from_python_file(content):
-    tree = ast.parse(content)
-    classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
-    functions = [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+    # One traversal for both lists, in the same order ast.walk would give them
+    symbols = analyze_source(content)
+    classes = [c['name'] for c in symbols['classes']]
+    functions = [f['name'] for f in symbols['functions'] if not f['is_async']]
     return classes, functions
 
 def extract_endpoints_from_urls_file(content):
-    endpoints = re.findall(r'path\([\'"](.+?)[\'"]', content)
-    return endpoints
+    # The patterns urlpatterns declares, through the same route facts as routes.RouteTable: re_path/url,
+    # `urlpatterns +=` and include() prefixes count, and nothing outside urlpatterns does
+    return declared_patterns(content)
 
-def generate_detailed_report(owner, repo, important_files, access_token):
-    details = []
+def fetch_important_files(owner, repo, important_files, access_token, concurrency=None):
+    # Yields each file's content, or the ValueError raised fetching it, in input order
+    if concurrency:
+        yield from fetch_files_concurrently(owner, repo, important_files, access_token, concurrency)
+        return
     for file in important_files:
         try:
-            content = fetch_file_content_from_github(owner, repo, file, access_token)
-            if file.endswith('.py'):
-                classes, functions = extract_details_from_python_file(content)
-                details.append(f"\nDetails from {file}:\nClasses: {classes}\nFunctions: {functions}\n")
-                if file.endswith('urls.py'):
-                    endpoints = extract_endpoints_from_urls_file(content)
-                    details.append(f"\nEndpoints from {file}:\n{endpoints}\n")
-            elif file.endswith('README.md'):
-                details.append(f"\nREADME Content:\n{content}\n")
+            yield fetch_file_content_from_github(owner, repo, file, access_token)
         except ValueError as ve:
-            details.append(f"\nFailed to fetch details from {file}: {ve}\n")
-    return details
+            yield ve
+
+def report_sections(file, content):
+    # The report sections for one file, given its content or the ValueError raised fetching it
+    try:
+        if isinstance(content, ValueError):
+            raise content
+        if file.endswith('.py'):
+            classes, functions = extract_details_from_python_file(content)
+            sections = [f"\nDetails from {file}:\nClasses: {classes}\nFunctions: {functions}\n"]
+            if file.endswith('urls.py'):
+                endpoints = extract_endpoints_from_urls_file(content)
+                sections.append(f"\nEndpoints from {file}:\n{endpoints}\n")
+            return sections
+        elif file.endswith('README.md'):
+            return [f"\nREADME Content:\n{content}\n"]
+    except ValueError as ve:
+        return [f"\nFailed to fetch details from {file}: {ve}\n"]
+    return []
+
+def iter_report_sections(important_files, contents):
+    # Yields report sections one file at a time so they can be written out as they are produced
+    for file, content in zip(important_files, contents):
+        yield from report_sections(file, content)
+
+def iter_detailed_report(owner, repo, important_files, access_token, concurrency=None):
+    contents = fetch_important_files(owner, repo, important_files, access_token, concurrency)
+    return iter_report_sections(important_files, contents)
+
+def iter_local_detailed_report(repo_path, important_files, ref=None):
+    # Same sections as iter_detailed_report, read from disk or git objects instead of the API
+    contents = read_files(repo_path, important_files, ref)
+    try:
+        yield from iter_report_sections(important_files, contents)
+    finally:
+        # zip stops before exhausting contents; close it now so its cat-file process exits with the report
+        contents.close()
+
+def generate_detailed_report(owner, repo, important_files, access_token, concurrency=None):
+    return list(iter_detailed_report(owner, repo, important_files, access_token, concurrency))
 
 def append_details_to_output_file(details, output_file):
-    with open(output_file, 'a', encoding='utf-8') as file:
-        file.write("\n".join(details))
+    # details may be a generator; sections are flushed to disk as they are produced
+    write_lines(details, output_file, mode='a')
+
+def is_important_line(line):
+    return line.strip().endswith('.py') or line.strip().endswith('README.md')
+
+def important_file_name(line):
+    return line.strip().lstrip('├── ')
 
 def identify_important_files(structure):
     important_files = []
     for line in structure:
-        if line.strip().endswith('.py') or line.strip().endswith('README.md'):
-            important_files.append(line.strip().lstrip('├── '))
+        if is_important_line(line):
+            important_files.append(important_file_name(line))
     return important_files
 
-# Example usage
-if __name__ == "__main__":
-    repo_url = input("Enter GitHub repository URL: ").strip()
-    try:
+def track_important_files(structure, important_files):
+    # Passes structure lines through unchanged, noting important files on the way
+    for line in structure:
+        if is_important_line(line):
+            important_files.append(important_file_name(line))
+        yield line
+
+def iter_important_files_while_writing(structure, output_file, path_prefix=''):
+    # Writes structure lines exactly as write_directory_structure_to_file would, yielding each important
+    # file (with the path prefix) as soon as its line is written, so its download can start mid-crawl
+    with open(output_file, 'w', encoding='utf-8', buffering=DEFAULT_BUFFER_SIZE) as file:
+        for count, line in enumerate(structure):
+            if count:
+                file.write("\n")
+            file.write(line)
+            if is_important_line(line):
+                name = important_file_name(line)
+                yield f"{path_prefix}/{name}" if path_prefix else name
+        if profiling.enabled():
+            profiling.add('write', nbytes=file.tell())
+
+def write_report_pipelined(owner, repo, path, access_token, output_file, fetch_workers=DEFAULT_FETCH_WORKERS,
+                           capacity=DEFAULT_CAPACITY):
+    # Crawls the structure, downloads important files and renders their sections all at once. Sections wait
+    # in a spool file until the structure is complete, so the report is byte for byte write_report's
+    def fetch(file):
+        try:
+            return fetch_file_content_from_github(owner, repo, file, access_token)
+        except ValueError as ve:
+            return ve
+
+    structure = iter_directory_structure_from_github(owner, repo, path, access_token)
+    important_files = iter_important_files_while_writing(structure, output_file, path)
+    pipeline = Pipeline(fetch, report_sections, fetch_workers, 1, capacity)
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+        count = 0
+        for _, sections in pipeline.run(important_files):
+            for section in sections:
+                if count:
+                    spool.write("\n")
+                spool.write(section)
+                count += 1
+        spool.seek(0)
+        with open(output_file, 'a', encoding='utf-8') as file:
+            shutil.copyfileobj(spool, file)
+
+def default_output_file(repo_url):
+    if os.path.isdir(repo_url):
+        return f"{os.path.basename(os.path.abspath(repo_url))}_directory_structure.txt"
+    return f"{extract_github_details(repo_url)[1]}_directory_structure.txt"
+
+def write_report(repo_url, access_token=None, output_file=None, ref=None, concurrency=None, pipelined=False):
+    # Writes the directory structure followed by the details of its important files; returns the output file.
+    # pipelined overlaps the GitHub crawl with the downloads (concurrency of them at a time); local reads are direct
+    output_file = output_file or default_output_file(repo_url)
+    if pipelined and not os.path.isdir(repo_url):
         github_owner, github_repo, github_path = extract_github_details(repo_url)
-        access_token = input("Enter GitHub access token (optional, press Enter to skip): ").strip()
-        output_file = f"{github_repo}_directory_structure.txt"
-        
-        structure = fetch_directory_structure_from_github(github_owner, github_repo, github_path, access_token)
-        write_directory_structure_to_file(structure, output_file)
-        
-        important_files = identify_important_files(structure)
+        write_report_pipelined(github_owner, github_repo, github_path, access_token, output_file,
+                               concurrency or DEFAULT_FETCH_WORKERS)
+        return output_file
+    important_files = []
+    if os.path.isdir(repo_url):
+        # Local checkout or bare repository: no clone, no API calls
+        structure = fetch_directory_structure_from_local(repo_url, ref=ref)
+        write_directory_structure_to_file(track_important_files(structure, important_files), output_file)
+
+        details = iter_local_detailed_report(repo_url, important_files, ref)
+    else:
+        github_owner, github_repo, github_path = extract_github_details(repo_url)
+        structure = iter_directory_structure_from_github(github_owner, github_repo, github_path, access_token)
+        write_directory_structure_to_file(track_important_files(structure, important_files), output_file)
+
         important_files = [f"{github_path}/{file}" if github_path else file for file in important_files]  # Add path prefix if needed
 
-        details = generate_detailed_report(github_owner, github_repo, important_files, access_token)
-        append_details_to_output_file(details, output_file)
+        details = iter_detailed_report(github_owner, github_repo, important_files, access_token, concurrency)
+    append_details_to_output_file(details, output_file)
+    return output_file
+
+# Example usage
+if __name__ == "__main__":
+    # Set REPO_ANALYZER_PROFILE=report.json (and REPO_ANALYZER_CPROFILE=run.prof) to profile the run,
+    # and REPO_ANALYZER_PARSE_CACHE=DIR to reuse parse results across runs
+    profiling.enable_from_environment()
+    parse_cache.configure_from_environment()
+    repo_url = input("Enter GitHub repository URL or local path: ").strip()
+    try:
+        access_token = None
+        if not os.path.isdir(repo_url):
+            access_token = input("Enter GitHub access token (optional, press Enter to skip): ").strip()
+        output_file = write_report(repo_url, access_token)
 
         print(f"Directory structure and details written to {output_file}")
-    
     except requests.exceptions.RequestException as e:
         print(f"Error: Failed to connect to GitHub API - {e}")
     except ValueError as ve:
@@ -0,0 +1,60 @@
+import os
+import sys
+
+# The analyzer modules import each other by bare name (``from github import ...``),
+# so expose both the repository root and the package directory on sys.path.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'github_repo_analyzer')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+import subprocess
+
+import pytest
+
+
+class GitRepo:
+    """A throwaway git working copy for tests that clone or inspect repositories."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.git('init', '-q', '-b', 'main')
+
+    def git(self, *args):
+        command = ['git', '-C', self.path, '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *args]
+        return subprocess.run(command, check=True, capture_output=True, text=True).stdout
+
+    def write(self, files):
+        for name, content in files.items():
+            path = os.path.join(self.path, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(content)
+
+    def commit(self, files=None, message='update'):
+        if files:
+            self.write(files)
+        self.git('add', '-A')
+        self.git('commit', '-q', '-m', message)
+        return self.git('rev-parse', 'HEAD').strip()
+
+
+DJANGO_FILES = {
+    'README.md': '# Shop\n',
+    'shop/models.py': 'class Product:\n    pass\n\n\ndef product_count():\n    return 0\n',
+    'shop/views.py': 'def index(request):\n    pass\n\n\nclass ProductView:\n    pass\n',
+    'shop/urls.py': "urlpatterns = [\n    path('products/', views.index),\n    path('cart/', views.index),\n]\n",
+    'shop/serializers.py': 'class ProductSerializer:\n    pass\n',
+    'shop/tests.py': 'class ProductTests:\n    def test_list(self):\n        pass\n',
+    'shop/api.py': "@app.route('/api/products')\ndef products():\n    pass\n",
+}
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """A committed Django-style repository."""
+    repo = GitRepo(tmp_path / 'origin')
+    repo.commit(DJANGO_FILES, 'initial')
+    return repo
@@ -0,0 +1,88 @@
+"""The single-pass visitor gives the same answers as the separate ast.walk passes it replaced."""
+import ast
+import textwrap
+
+import ast_visitor
+import main
+import repo_reader
+
+
+SOURCE = textwrap.dedent('''
+    import functools
+
+    @functools.lru_cache()
+    def top(a):
+        def inner():
+            class Local:
+                pass
+        return inner
+
+    async def fetch():
+        pass
+
+    class Outer(models.Model, Mixin):
+        class Meta:
+            ordering = ['id']
+
+        @property
+        def name(self):
+            return 'x'
+
+        async def load(self):
+            def helper():
+                pass
+
+    try:
+        import json
+    except ImportError:
+        def fallback():
+            pass
+    else:
+        class Fast:
+            pass
+
+    if True:
+        def conditional():
+            pass
+
+    urlpatterns = [
+        path('home/', views.home),
+        re_path(r'^items/(?P<pk>\\d+)/$', views.item),
+    ]
+    urlpatterns += [path('ignored/', views.other)]
+''')
+
+
+def walk_names(content, node_type):
+    tree = ast.parse(content)
+    return [node.name for node in ast.walk(tree) if isinstance(node, node_type)]
+
+
+def test_matches_ast_walk_order():
+    classes, functions = repo_reader.extract_details_from_python_file(SOURCE)
+    assert classes == walk_names(SOURCE, ast.ClassDef)
+    assert functions == walk_names(SOURCE, ast.FunctionDef)
+
+
+def test_module_level_symbols_and_url_patterns(tmp_path):
+    path = tmp_path / 'urls.py'
+    path.write_text(SOURCE)
+    tree = ast.parse(SOURCE)
+
+    assert main.parse_python_file(str(path)) == (
+        [n.name for n in tree.body if isinstance(n, ast.ClassDef)],
+        [n.name for n in tree.body if isinstance(n, ast.FunctionDef)],
+    )
+    assert main.extract_endpoints(str(path)) == ['home/', r'^items/(?P<pk>\d+)/$']
+
+
+def test_qualified_names_decorators_and_bases():
+    symbols = ast_visitor.analyze_source(SOURCE)
+    functions = {f['qualname']: f for f in symbols['functions']}
+    classes = {c['qualname']: c for c in symbols['classes']}
+
+    assert set(functions) >= {'top.<locals>.inner', 'Outer.name', 'Outer.load.<locals>.helper'}
+    assert functions['Outer.load']['is_async'] and functions['fetch']['top_level']
+    assert functions['top']['decorators'] == ['functools.lru_cache']
+    assert classes['Outer']['bases'] == ['models.Model', 'Mixin']
+    assert 'top.<locals>.inner.<locals>.Local' in classes
@@ -0,0 +1,45 @@
+"""The concurrent crawler produces exactly what the sequential code does, only sooner."""
+import time
+
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files
+
+import async_crawler
+import repo_reader
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with MockGitHubServer(generate_files(depth=2, dirs_per_level=3, files_per_dir=3), latency=0.02) as server:
+        monkeypatch.setattr(repo_reader, 'github_api_url', server.contents_url)
+        monkeypatch.setattr(async_crawler, 'github_api_url', server.contents_url)
+        yield server
+
+
+def test_concurrent_tree_matches_sequential(server):
+    expected = repo_reader.fetch_directory_structure_from_github(server.owner, server.repo)
+    assert repo_reader.fetch_directory_structure_concurrently(server.owner, server.repo, concurrency=8) == expected
+
+
+def test_concurrent_report_matches_sequential_including_failures(server):
+    files = sorted(server.files) + ['missing.py', 'pkg_0/module_1.py']
+
+    start = time.perf_counter()
+    expected = repo_reader.generate_detailed_report(server.owner, server.repo, files, None)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    details = repo_reader.generate_detailed_report(server.owner, server.repo, files, None, concurrency=8)
+    concurrent = time.perf_counter() - start
+
+    assert details == expected
+    assert any('missing.py' in line for line in details)
+    assert concurrent < sequential
+
+
+def test_per_host_limit_bounds_requests_in_flight(server):
+    files = sorted(server.files)
+    async_crawler.fetch_files_concurrently(server.owner, server.repo, files, concurrency=16, per_host_limit=3)
+    assert server.max_in_flight <= 3
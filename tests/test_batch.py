@@ -0,0 +1,106 @@
+"""The batch driver analyzes many repositories, isolates failures and resumes from its journal."""
+import json
+import subprocess
+import time
+
+import pytest
+
+import batch
+import parse_cache
+import repo_analyzer
+import repository_db
+from tests.conftest import DJANGO_FILES, GitRepo
+
+
+@pytest.fixture
+def remotes(tmp_path):
+    """Three bare repositories reachable through file:// URLs."""
+    urls = []
+    for index in range(3):
+        repo = GitRepo(tmp_path / f"src{index}")
+        repo.commit(dict(DJANGO_FILES, **{f"app{index}/models.py": f"class Model{index}:\n    pass\n"}))
+        bare = str(tmp_path / f"remote{index}.git")
+        subprocess.run(['git', 'clone', '--quiet', '--bare', repo.path, bare], check=True)
+        urls.append('file://' + bare)
+    return urls
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    yield str(tmp_path / 'batch.db')
+    repository_db.close_connections()
+
+
+def test_batch_stores_every_repository(remotes, git_repo, db_file, tmp_path):
+    journal = str(tmp_path / 'journal.jsonl')
+    summary = batch.run_batch(remotes + [git_repo.path], db_file, journal, clone_workers=2, parse_workers=2)
+    assert summary == {'done': 4, 'failed': 0, 'skipped': 0}
+
+    symbols = repository_db.find_symbols('Model1', db_file=db_file)
+    assert [s['repository_url'] for s in symbols] == [remotes[1]]
+    assert len(repository_db.find_symbols('ProductSerializer', db_file=db_file)) == 4
+
+    expected = repo_analyzer.parse_files(git_repo.path)
+    run_id = repository_db.latest_run_id(git_repo.path, db_file)
+    assert run_id is not None
+    conn = repository_db.get_connection(db_file)
+    stored = [row[0] for row in conn.execute("SELECT name FROM symbols WHERE run_id=? AND category='classes'", (run_id,))]
+    assert sorted(stored) == sorted(expected['classes'])
+
+
+def test_failures_are_isolated_and_resumed(remotes, db_file, tmp_path):
+    journal = str(tmp_path / 'journal.jsonl')
+    missing = 'file://' + str(tmp_path / 'missing.git')
+    summary = batch.run_batch([remotes[0], missing, remotes[1]], db_file, journal, clone_workers=2, parse_workers=1)
+    assert summary == {'done': 2, 'failed': 1, 'skipped': 0}
+
+    with open(journal, encoding='utf-8') as file:
+        entries = [json.loads(line) for line in file]
+    assert {e['repository']: e['status'] for e in entries} == {remotes[0]: 'done', missing: 'failed', remotes[1]: 'done'}
+
+    summary = batch.run_batch([remotes[0], missing, remotes[1], remotes[2]], db_file, journal, parse_workers=1)
+    assert summary == {'done': 1, 'failed': 1, 'skipped': 2}
+    summary = batch.run_batch([remotes[0], missing, remotes[2]], db_file, journal, retry_failed=False)
+    assert summary == {'done': 0, 'failed': 0, 'skipped': 3}
+
+
+def test_parse_timeout_kills_the_job(git_repo, monkeypatch):
+    monkeypatch.setattr(batch, '_process_context', lambda: batch.multiprocessing.get_context('fork'))
+    monkeypatch.setitem(batch.ANALYZERS, 'slow', lambda path: __import__('time').sleep(30))
+    with pytest.raises(batch.JobTimeout):
+        batch.analyze_in_process(git_repo.path, 'slow', timeout=0.5)
+
+
+def test_waiting_for_a_parse_slot_does_not_count_against_the_timeout(tmp_path, db_file, monkeypatch):
+    def analyze(repo_path, analyzer, timeout):
+        if timeout < 0.3:
+            raise batch.JobTimeout(f"timed out with {timeout:.2f}s left")
+        time.sleep(0.3)
+        return repo_analyzer.parse_local_symbols(repo_path), None
+
+    monkeypatch.setattr(batch, 'analyze_in_process', analyze)
+    paths = [GitRepo(tmp_path / f"repo{index}").path for index in range(4)]
+    # The last job queues for about 0.9s behind the others, longer than its whole timeout allows
+    summary = batch.run_batch(paths, db_file, parse_workers=1, timeout=1.0)
+    assert summary == {'done': 4, 'failed': 0, 'skipped': 0}
+
+
+def test_analysis_process_uses_the_parse_cache(git_repo, tmp_path):
+    # The analysis runs in a forkserver or spawned process, which must open the cache from the parent's settings
+    cache = parse_cache.ParseCache(str(tmp_path / 'cache'))
+    parse_cache.configure(cache)
+    try:
+        first, _ = batch.analyze_in_process(git_repo.path, 'categories')
+        second, _ = batch.analyze_in_process(git_repo.path, 'categories')
+        report = cache.report()
+    finally:
+        parse_cache.configure(None)
+        cache.close()
+    assert second.to_dict() == first.to_dict()
+    assert report['hits'] == report['misses'] == report['entries'] > 0
+
+
+def test_journal_ignores_truncated_lines(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text('{"repository": "a", "status": "done"}\n{"repository": "b", "sta', encoding='utf-8')
+    assert batch.ProgressJournal(str(path)).completed() == {'a'}
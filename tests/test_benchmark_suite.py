@@ -0,0 +1,41 @@
+"""The benchmark suite measures every stage and flags regressions against a baseline."""
+import json
+
+from benchmarks import suite
+
+import git_trees
+import repo_directory_structure
+
+
+def test_suite_measures_every_stage():
+    api_url = repo_directory_structure.github_api_url
+    results = suite.run_suite(depth=2, dirs=2, files=12, latency=0, repeat=2)
+
+    assert repo_directory_structure.github_api_url == api_url
+    assert git_trees.github_trees_url.startswith('https://api.github.com/')
+    assert list(results['benchmarks']) == ['tree_fetch', 'contents_fetch', 'categorize_items', 'parse_files',
+                                           'store', 'end_to_end']
+    benchmarks = results['benchmarks']
+    assert all(len(entry['runs']) == 2 for entry in benchmarks.values())
+    assert benchmarks['tree_fetch']['requests'] == 1
+    assert benchmarks['contents_fetch']['requests'] == 3
+    assert benchmarks['tree_fetch']['lines'] == benchmarks['contents_fetch']['lines']
+    assert benchmarks['parse_files']['symbols'] == benchmarks['store']['symbols'] > 0
+    assert results['parameters']['depth'] == 2
+    json.dumps(results)
+
+
+def test_compare_flags_slowdowns_above_threshold_and_noise_floor():
+    def results(**medians):
+        return {'benchmarks': {name: {'median_seconds': value} for name, value in medians.items()}}
+
+    baseline = results(fetch=1.0, parse=0.001, store=1.0, gone=1.0)
+    current = results(fetch=1.5, parse=0.002, store=1.05, new=1.0)
+    rows = {row['name']: row for row in suite.compare_results(baseline, current, threshold=0.1)}
+
+    assert set(rows) == {'fetch', 'parse', 'store'}
+    assert rows['fetch']['regression'] and rows['fetch']['ratio'] == 1.5
+    assert not rows['parse']['regression']
+    assert not rows['store']['regression']
+    assert suite.comparison_warnings(dict(baseline, parameters={'depth': 2}), current) == [
+        'parameters differs from the baseline; timings may not be comparable']
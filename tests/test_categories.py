@@ -0,0 +1,161 @@
+"""Category rules classify files by path in one match, classes by inheritance, and take per-project rules."""
+import json
+import subprocess
+
+import pytest
+
+import categories
+import cli
+import main
+from categories import CategoryMatcher, CategoryRule
+from incremental import IncrementalRun, state_file
+
+MIXED_SOURCE = '''from django.contrib import admin
+from django.db import models
+from rest_framework import serializers, viewsets
+
+
+class Product(models.Model):
+    pass
+
+
+class SpecialProduct(Product):
+    pass
+
+
+class ProductSerializer(serializers.ModelSerializer):
+    pass
+
+
+class ProductViewSet(viewsets.ModelViewSet):
+    pass
+
+
+class ProductAdmin(admin.ModelAdmin):
+    pass
+
+
+class Helper:
+    pass
+
+
+def format_price(value):
+    return value
+'''
+
+PROJECT_RULES = {'rules': [
+    {'category': 'Tasks', 'paths': ['tasks.py', '*_tasks.py'], 'bases': ['celery.Task']},
+    {'category': 'Models', 'bases': ['core.base.TimeStamped']},
+]}
+
+
+@pytest.mark.parametrize('path, category', [
+    ('shop/views.py', 'Views'),
+    ('shop/api/views.py', 'Views'),
+    ('shop/api/permissions.py', 'API Views'),
+    ('shop/api.py', 'API Views'),
+    ('rapid_models.py', 'Models'),
+    ('shop/models/product.py', 'Models'),
+    ('shop/querysets.py', 'Querysets'),
+    ('shop/query_builder.py', 'Queries'),
+    ('shop/tests.py', 'Tests'),
+    ('shop/tests/models.py', 'Tests'),
+    ('shop/test_views.py', 'Tests'),
+    ('shop/latest.py', 'Others'),
+    ('shop/contest_admin.py', 'Admin'),
+    ('shop/order_serializer.py', 'Serializers'),
+    ('shop/urls.py', 'Endpoints'),
+])
+def test_files_are_categorized_by_the_first_matching_rule(path, category):
+    assert main.categorize_file(path) == category
+
+
+def test_classes_are_categorized_by_inheritance():
+    assert main.categorize_source('shop/helpers.py', MIXED_SOURCE) == [
+        ('Others', [('class', 'Helper', 'Helper', 26), ('function', 'format_price', 'format_price', 30)]),
+        ('Models', [('class', 'Product', 'Product', 6), ('class', 'SpecialProduct', 'SpecialProduct', 10)]),
+        ('Serializers', [('class', 'ProductSerializer', 'ProductSerializer', 14)]),
+        ('API Views', [('class', 'ProductViewSet', 'ProductViewSet', 18)]),
+        ('Admin', [('class', 'ProductAdmin', 'ProductAdmin', 22)]),
+    ]
+    # URL configs list their endpoints, and still give away classes with a categorized base
+    source = ("class Feed(View):\n    pass\n\n\nclass Local:\n    pass\n\n\n"
+              "urlpatterns = [path('feed/', Feed.as_view())]\n")
+    assert main.categorize_source('shop/urls.py', source) == [
+        ('Endpoints', [('endpoint', 'feed/', 'feed/', 9)]), ('Views', [('class', 'Feed', 'Feed', 1)])]
+
+
+def test_matcher_and_rule_configuration():
+    matcher = CategoryMatcher(categories.parse_rules(json.dumps(PROJECT_RULES)))
+    assert matcher.categories[-2:] == ['Tasks', 'Others']
+    assert matcher.file_category('jobs/email_tasks.py') == 'Tasks'
+    assert matcher.class_category(['Task']) == 'Tasks'
+    assert matcher.class_category(['base.TimeStamped']) == 'Models'
+    assert matcher.class_category(['other.Model', None]) is None
+
+    replaced = CategoryMatcher(categories.parse_rules(json.dumps(dict(PROJECT_RULES, replace_defaults=True))))
+    assert replaced.file_category('shop/models.py') == 'Others'
+    with pytest.raises(ValueError, match='Failed to read category rules'):
+        categories.parse_rules('{"rules": [{"paths": ["x.py"]}]}')
+    with pytest.raises(ValueError, match='bases must be a list of strings'):
+        categories.parse_rules('{"rules": [{"category": "Tasks", "bases": "celery.Task"}]}')
+
+    # A glob with a slash is anchored at the repository root
+    anchored = CategoryMatcher([CategoryRule('Scripts', ('bin/*.py',))])
+    assert anchored.file_category('bin/run.py') == 'Scripts'
+    assert anchored.file_category('tools/bin/run.py') == 'Others'
+
+
+@pytest.fixture
+def configured_repo(git_repo):
+    git_repo.commit({
+        categories.CONFIG_FILE: json.dumps(PROJECT_RULES),
+        'shop/tasks.py': 'def send_mail():\n    pass\n',
+        'shop/jobs.py': 'class Cleanup(celery.Task):\n    pass\n',
+    }, 'project rules')
+    return git_repo
+
+
+def test_repository_rules_apply_to_every_path(configured_repo, tmp_path):
+    result = main.categorize_items(configured_repo.path)
+    assert list(result)[-2:] == ['Tasks', 'Others']
+    assert sorted(result['Tasks']) == ['Cleanup', 'send_mail']
+    assert result['Models'] == ['Product', 'product_count']
+
+    bare = str(tmp_path / 'bare.git')
+    subprocess.run(['git', 'clone', '-q', '--bare', configured_repo.path, bare], check=True)
+    assert main.categorize_local_repository(bare) == result
+    defaults = main.categorize_items(configured_repo.path, matcher=CategoryMatcher())
+    assert sorted(defaults['Others']) == ['Cleanup', 'send_mail']
+
+
+def test_malformed_repository_rules_fall_back_to_the_configured_ones(git_repo, capsys):
+    git_repo.commit({categories.CONFIG_FILE: '{"rules": [{"category": "Tasks", "paths": [1]}]}'}, 'bad rules')
+    assert categories.project_matcher(git_repo.path) is categories.get_matcher()
+    assert 'Ignoring .repo-categories.json: Failed to read category rules' in capsys.readouterr().err
+    assert main.categorize_items(git_repo.path) == main.categorize_items(git_repo.path, matcher=CategoryMatcher())
+
+    git_repo.commit({categories.CONFIG_FILE: '{"rules": '}, 'truncated rules')
+    assert main.categorize_items(git_repo.path)['Models'] == ['Product', 'product_count']
+
+
+def test_changing_rules_reparses_nothing(configured_repo, tmp_path):
+    path = state_file(str(tmp_path), configured_repo.path, 'categorize_items')
+    first = IncrementalRun(configured_repo.path, path, main.ANALYZER_VERSION)
+    main.categorize_items(configured_repo.path, first)
+    first.save()
+
+    second = IncrementalRun(configured_repo.path, path, main.ANALYZER_VERSION)
+    result = main.categorize_items(configured_repo.path, second, matcher=CategoryMatcher())
+    assert second.stats == {'reused': 8, 'parsed': 0}
+    assert 'Tasks' not in result
+
+
+def test_cli_categories_option(git_repo, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(categories, '_matcher', categories.get_matcher())
+    rules = tmp_path / 'rules.json'
+    rules.write_text(json.dumps({'rules': [{'category': 'Storefront', 'directories': ['shop']}]}))
+    assert cli.main(['analyze', git_repo.path, '--categories', str(rules)]) == 0
+    output = capsys.readouterr().out
+    assert 'Models:\nNo items found.\n' in output
+    assert output.index('Storefront:\n- ') > output.index('Querysets:') and '- ProductSerializer\n' in output
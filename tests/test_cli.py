@@ -0,0 +1,135 @@
+"""The command-line entry point runs every subcommand without prompting and imports only what it uses."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+from tests.conftest import DJANGO_FILES, ROOT
+
+import cli
+import git_trees
+import http_client
+import main
+import parse_cache
+import repo_directory_structure
+import repository_db
+
+
+def test_tree_local_and_remote(git_repo, monkeypatch, capsys, tmp_path):
+    expected = repo_directory_structure.fetch_directory_structure_from_local(git_repo.path)
+    assert cli.main(['tree', git_repo.path]) == 0
+    assert capsys.readouterr().out.splitlines() == expected
+
+    with MockGitHubServer(DJANGO_FILES) as server:
+        monkeypatch.setattr(git_trees, 'github_trees_url', server.trees_url)
+        output = str(tmp_path / 'tree.txt')
+        assert cli.main(['tree', f"https://github.com/{server.owner}/{server.repo}", '-o', output]) == 0
+        assert server.request_count == 1
+    with open(output, encoding='utf-8') as file:
+        assert file.read().splitlines() == expected
+
+
+def test_tree_http_cache_revalidates_on_the_next_run(monkeypatch, capsys, tmp_path):
+    cache_dir = str(tmp_path / 'http')
+    try:
+        with MockGitHubServer(DJANGO_FILES) as server:
+            monkeypatch.setattr(git_trees, 'github_trees_url', server.trees_url)
+            url = f"https://github.com/{server.owner}/{server.repo}"
+            assert cli.main(['tree', url, '--http-cache', cache_dir]) == 0
+            first = capsys.readouterr()
+            assert cli.main(['tree', url, '--http-cache', cache_dir]) == 0
+            second = capsys.readouterr()
+            assert server.not_modified_count == 1
+    finally:
+        http_client.get_client().cache.close()
+        http_client.configure()
+    assert second.out == first.out
+    assert first.err.startswith('HTTP cache: 0 hits, 1 misses')
+    assert second.err.startswith('HTTP cache: 1 hits, 0 misses')
+
+
+def test_analyze_matches_main(git_repo, tmp_path):
+    output = str(tmp_path / 'analysis.txt')
+    assert cli.main(['analyze', git_repo.path, '--output', output]) == 0
+
+    expected = str(tmp_path / 'expected.txt')
+    main.analyze_local_repository(git_repo.path, expected)
+    with open(output, encoding='utf-8') as got, open(expected, encoding='utf-8') as want:
+        assert got.read() == want.read()
+
+
+def test_analyze_parse_cache_is_reused_on_the_next_run(git_repo, tmp_path, capsys):
+    cache_dir = str(tmp_path / 'parse')
+    try:
+        assert cli.main(['analyze', git_repo.path, '--parse-cache', cache_dir]) == 0
+        first = capsys.readouterr()
+        assert cli.main(['analyze', git_repo.path, '--parse-cache', cache_dir]) == 0
+        second = capsys.readouterr()
+    finally:
+        parse_cache.get_cache().close()
+        parse_cache.configure(None)
+    assert second.out == first.out
+    assert first.err.startswith('Parse cache: 0 hits, ')
+    assert second.err.startswith('Parse cache: ') and ' hits, 0 misses' in second.err
+
+
+def test_store_records_a_run(git_repo, tmp_path):
+    db_file = str(tmp_path / 'cli.db')
+    try:
+        assert cli.main(['store', git_repo.path, '--db', db_file]) == 0
+        assert cli.main(['store', git_repo.path, '--db', db_file, '--analyzer', 'categories']) == 0
+        symbols = repository_db.find_symbols('ProductSerializer', latest_only=False, db_file=db_file)
+        assert {s['repository_url'] for s in symbols} == {os.path.abspath(git_repo.path)}
+        assert [s['category'] for s in symbols] == ['classes', 'Serializers']
+        commit_sha = repository_db.get_connection(db_file).execute("SELECT DISTINCT commit_sha FROM runs").fetchall()
+        assert commit_sha == [(git_repo.git('rev-parse', 'HEAD').strip(),)]
+    finally:
+        repository_db.close_connections()
+
+
+def test_diff_compares_stored_runs(git_repo, tmp_path, capsys):
+    db_file = str(tmp_path / 'diff.db')
+    try:
+        assert cli.main(['store', git_repo.path, '--db', db_file]) == 0
+        first = git_repo.git('rev-parse', 'HEAD').strip()
+        git_repo.git('mv', 'shop/serializers.py', 'shop/schemas.py')
+        git_repo.commit({'shop/views.py': 'def index(request):\n    pass\n'}, 'move and remove')
+        assert cli.main(['store', git_repo.path, '--db', db_file]) == 0
+        capsys.readouterr()
+
+        assert cli.main(['diff', git_repo.path, '--db', db_file]) == 0
+        assert capsys.readouterr().out.splitlines() == [
+            'classes: 0 added, 1 removed, 1 moved', '  - ProductView  (shop/views.py)',
+            '  ~ ProductSerializer  (shop/serializers.py -> shop/schemas.py)',
+        ]
+        assert cli.main(['diff', git_repo.path, '--db', db_file, '--head', first, '--base', first]) == 0
+        assert capsys.readouterr().out == ''
+    finally:
+        repository_db.close_connections()
+
+
+def test_report_writes_structure_and_details(git_repo, tmp_path, capsys):
+    output = str(tmp_path / 'report.txt')
+    assert cli.main(['report', git_repo.path, '-o', output]) == 0
+    with open(output, encoding='utf-8') as file:
+        report = file.read()
+    assert report.startswith('├── shop/\n')
+    assert 'README Content:\n# Shop\n' in report
+
+
+def test_errors_exit_non_zero(tmp_path, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main(['tree', str(tmp_path / 'missing')])
+    assert excinfo.value.code == 2
+    assert cli.main(['store', 'file://' + str(tmp_path / 'missing.git'), '--db', str(tmp_path / 'x.db')]) == 1
+    assert 'Error:' in capsys.readouterr().err
+
+
+def test_local_tree_does_not_import_network_or_database_modules(git_repo):
+    script = ("import sys, cli; cli.main(['tree', sys.argv[1]]); "
+              "print(','.join(m for m in ('requests', 'sqlite3', 'repository_db', 'concurrent.futures') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', script, git_repo.path], cwd=os.path.join(ROOT, 'github_repo_analyzer'),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == ''
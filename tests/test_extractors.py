@@ -0,0 +1,184 @@
+"""Extractors find declarations per language in one pass, never inside strings or comments, and cover mixed repositories."""
+import subprocess
+
+import pytest
+
+import extractors
+import repo_analyzer
+from extractors import Extractor, Rule
+from file_index import scan_files
+
+PYTHON_SOURCE = '''"""
+class NotAClass:
+    def not_a_method(self): pass
+"""
+# class Commented
+label = "def not_a_function(): class X"
+myclass = undefined
+class Outer(Base):
+    def method(self):
+        def helper():
+            pass
+    class Inner:
+        async def run(self):
+            sql = """
+def inside_a_string(): pass
+"""
+def top():
+    pass
+@app.route("/a")
+@app.route('/b')
+def view():
+    pass
+'''
+
+JAVA_SOURCE = '''// class Commented {
+/* public class AlsoCommented { */
+@RestController
+public class ShopController extends Base {
+    private final String sql = "class Nope { void x() {";
+    private final char brace = '{';
+    public ShopController(Service service) { this.service = service; }
+
+    @GetMapping("/items")
+    public List<Item> list(@RequestParam String q) {
+        if (q != null) { return service.find(q); }
+        return items.stream().map(i -> { return i; }).collect(toList());
+    }
+    @Override public String toString() { return "}"; }
+}
+interface Api {
+    void call();
+}
+'''
+
+JS_SOURCE = '''// function commented() {}
+const template = `class Nope {
+function nope() {}`;
+export default class Widget extends Base {
+  constructor(props) { super(props); }
+  async load(id) {
+    if (id) { return fetch('/x'); }
+  }
+}
+export async function helper(a, b) {
+  function inner() {}
+}
+const handler = async (req, res) => { res.send('}'); };
+app.get('/users/:id', handler);
+'''
+
+GO_SOURCE = '''package main
+// func Commented() {}
+var raw = `
+func Nope() {}`
+type Server struct { port int }
+type Handler interface { Serve() }
+func (s *Server) Start() error { return nil }
+func main() {
+	http.HandleFunc("/health", health)
+}
+'''
+
+
+def symbols(extension, source):
+    return {key: [(name, qualname, line) for _, name, qualname, line in entries]
+            for key, entries in extractors.EXTRACTORS[extension].extract(source).items()}
+
+
+def test_python_ignores_strings_and_comments_and_follows_scopes():
+    assert symbols('.py', PYTHON_SOURCE) == {
+        'classes': [('Outer', 'Outer', 8), ('Inner', 'Outer.Inner', 12)],
+        'functions': [('method', 'Outer.method', 9), ('helper', 'Outer.method.<locals>.helper', 10),
+                      ('run', 'Outer.Inner.run', 13), ('top', 'top', 17), ('view', 'view', 21)],
+        'endpoints': [('/a', '/a', 19), ('/b', '/b', 20)],
+    }
+    assert repo_analyzer.parse_source(PYTHON_SOURCE)['classes'] == ['Outer', 'Inner']
+
+    # Dedented lines that declare nothing still close the function above them
+    source = ("def helper():\n    pass\ntry:\n    import fast\nexcept ImportError:\n    def fallback():\n"
+              "        pass\n\ndef g(): pass\nif True:\n    # comment\n\n    class B:\n        def run(self):\n"
+              "            pass\n")
+    assert symbols('.py', source) == {
+        'classes': [('B', 'B', 13)],
+        'functions': [('helper', 'helper', 1), ('fallback', 'fallback', 6), ('g', 'g', 9), ('run', 'B.run', 14)],
+        'endpoints': [],
+    }
+
+    # Black-style signatures close at column 0 without closing the scope they open
+    source = ("class Foo(\n    Base,\n):\n    def m(self):\n        pass\n\n\ndef outer(\n    a,\n):\n"
+              "    def inner():\n        x = [\n1,\n]\n        def deeper(): pass\n")
+    assert symbols('.py', source) == {
+        'classes': [('Foo', 'Foo', 1)],
+        'functions': [('m', 'Foo.m', 4), ('outer', 'outer', 8), ('inner', 'outer.<locals>.inner', 11),
+                      ('deeper', 'outer.<locals>.inner.<locals>.deeper', 15)],
+        'endpoints': [],
+    }
+
+
+def test_java_methods_come_from_class_bodies_only():
+    assert symbols('.java', JAVA_SOURCE) == {
+        'classes': [('ShopController', 'ShopController', 4), ('Api', 'Api', 16)],
+        'functions': [('ShopController', 'ShopController.ShopController', 7), ('list', 'ShopController.list', 10),
+                      ('toString', 'ShopController.toString', 14), ('call', 'Api.call', 17)],
+        'endpoints': [('/items', '/items', 9)],
+    }
+
+
+def test_javascript_and_typescript_share_rules():
+    expected = {
+        'classes': [('Widget', 'Widget', 4)],
+        'functions': [('constructor', 'Widget.constructor', 5), ('load', 'Widget.load', 6), ('helper', 'helper', 10),
+                      ('inner', 'helper.<locals>.inner', 11), ('handler', 'handler', 13)],
+        'endpoints': [('/users/:id', '/users/:id', 14)],
+    }
+    assert symbols('.js', JS_SOURCE) == expected
+    assert symbols('.tsx', JS_SOURCE) == expected
+
+
+def test_go_methods_are_qualified_by_receiver():
+    assert symbols('.go', GO_SOURCE) == {
+        'classes': [('Server', 'Server', 5), ('Handler', 'Handler', 6)],
+        'functions': [('Start', 'Server.Start', 7), ('main', 'main', 8)],
+        'endpoints': [('/health', '/health', 9)],
+    }
+
+
+def test_registry(monkeypatch):
+    assert extractors.languages_for_extensions(['.txt', '.py', '.pyw', '.tsx', '.go', '.ts']) == \
+        ['Python', 'TypeScript', 'Go']
+    assert extractors.extractor_for('a/b/Main.java') is extractors.JAVA
+    assert extractors.extract('notes.txt', 'class Nope:') == {'classes': [], 'functions': [], 'endpoints': []}
+
+    monkeypatch.setattr(extractors, 'EXTRACTORS', dict(extractors.EXTRACTORS))
+    kotlin = extractors.register(Extractor('Kotlin', ['.kt'], [
+        Rule('classes', 'class', r'^[ \t]*(?:data[ \t]+)?class[ \t]+(?P<name>\w+)'),
+        Rule('functions', 'function', r'^[ \t]*fun[ \t]+(?P<name>\w+)'),
+    ], extractors.C_COMMENTS + '|' + extractors.C_STRINGS))
+    assert extractors.extractor_for('Main.kt') is kotlin
+    assert extractors.extract('Main.kt', '// fun hidden()\ndata class User(val id: Int)\nfun main() {}\n') == {
+        'classes': [('class', 'User', 'User', 2)], 'functions': [('function', 'main', 'main', 3)], 'endpoints': [],
+    }
+
+
+@pytest.fixture
+def mixed_repo(git_repo):
+    git_repo.commit({'server/Main.java': JAVA_SOURCE, 'web/app.js': JS_SOURCE, 'cmd/main.go': GO_SOURCE,
+                     'docs/notes.txt': 'class NotCode:\n'}, 'other languages')
+    return git_repo
+
+
+def test_mixed_repository_is_parsed_in_one_pass_per_file(mixed_repo, tmp_path):
+    index = scan_files(mixed_repo.path)
+    assert sorted(repo_analyzer.detect_languages(mixed_repo.path, index)) == ['Go', 'Java', 'JavaScript', 'Python']
+
+    table = repo_analyzer.parse_symbols(mixed_repo.path, index=index)
+    assert {symbol.path for symbol in table} >= {'server/Main.java', 'web/app.js', 'cmd/main.go', 'shop/models.py'}
+    assert 'NotCode' not in table.to_dict()['classes']
+    assert sorted(table.to_dict()['endpoints']) == ['/api/products', '/health', '/items', '/users/:id']
+    assert repo_analyzer.parse_files(mixed_repo.path, workers=2, index=index) == table.to_dict()
+
+    bare = str(tmp_path / 'bare.git')
+    subprocess.run(['git', 'clone', '-q', '--bare', mixed_repo.path, bare], check=True)
+    key = lambda symbol: (symbol.path, symbol.line, symbol.name)
+    assert sorted(repo_analyzer.parse_local_symbols(bare), key=key) == sorted(table, key=key)
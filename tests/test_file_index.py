@@ -0,0 +1,81 @@
+"""The shared scanner lists the same files as os.walk, minus pruned and ignored paths."""
+import os
+
+import pytest
+
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import file_index
+import main
+import repo_analyzer
+
+
+def relpaths(index):
+    return [entry.relpath for entry in index]
+
+
+def test_matches_os_walk_order(tmp_path):
+    root = write_files(generate_files(depth=3, dirs_per_level=3, files_per_dir=3), str(tmp_path))
+    expected = []
+    for current, _, files in os.walk(root):
+        for name in files:
+            expected.append(os.path.relpath(os.path.join(current, name), root).replace(os.sep, '/'))
+    index = file_index.scan_files(root)
+    assert relpaths(index) == expected
+    assert all(entry.size == os.path.getsize(entry.path) for entry in index)
+    assert sorted(index.extensions()) == ['.md', '.py']
+
+
+def test_prunes_dependency_directories(tmp_path):
+    root = write_files({
+        'app/models.py': 'class A:\n    pass\n',
+        'node_modules/pkg/index.js': '',
+        '.git/config': '',
+        'env/pyvenv.cfg': '',
+        'env/lib/site.py': '',
+        'vendor/lib.py': '',
+    }, str(tmp_path))
+    assert relpaths(file_index.scan_files(root)) == ['app/models.py']
+    assert 'vendor/lib.py' in relpaths(file_index.scan_files(root, prune=['.git']))
+
+
+def test_gitignore_and_exclude_globs(tmp_path):
+    root = write_files({
+        '.gitignore': '*.log\nbuild/\n/local.py\n!keep.log\n',
+        'keep.log': '',
+        'debug.log': '',
+        'local.py': '',
+        'build/out.py': '',
+        'pkg/local.py': '',
+        'pkg/build.py': '',
+        'pkg/.gitignore': '*.py\n!api.py\n',
+        'pkg/api.py': '',
+        'pkg/gen/deep/schema_pb2.py': '',
+        'docs/conf.py': '',
+    }, str(tmp_path))
+    assert sorted(relpaths(file_index.scan_files(root))) == ['.gitignore', 'docs/conf.py', 'keep.log', 'pkg/.gitignore', 'pkg/api.py']
+    assert 'docs/conf.py' not in relpaths(file_index.scan_files(root, exclude=['docs/']))
+    assert 'local.py' in relpaths(file_index.scan_files(root, use_gitignore=False))
+
+
+@pytest.mark.parametrize('pattern, path, matched', [
+    ('**/migrations', 'a/b/migrations', True),
+    ('**/migrations', 'migrations', True),
+    ('src/**', 'src/a/b.py', True),
+    ('a/**/b.py', 'a/b.py', True),
+    ('a/**/b.py', 'a/x/y/b.py', True),
+    ('*.py[co]', 'x.pyc', True),
+    ('test_?.py', 'pkg/test_1.py', True),
+    ('doc/*.txt', 'doc/sub/x.txt', False),
+])
+def test_pattern_translation(pattern, path, matched):
+    assert file_index.is_ignored(file_index.compile_rules([pattern]), path, True) is matched
+
+
+def test_consumers_share_one_index(tmp_path):
+    root = write_files(generate_files(depth=2, dirs_per_level=2, files_per_dir=12, layout='django'), str(tmp_path))
+    write_files({'node_modules/lib/models.py': 'class Vendored:\n    pass\n'}, root)
+    index = file_index.scan_files(root)
+    assert 'Vendored' not in main.categorize_items(root, index=index)['Models']
+    assert repo_analyzer.parse_files(root, index=index) == repo_analyzer.parse_files(root)
+    assert repo_analyzer.detect_languages(root, index) == ['Python']
@@ -0,0 +1,117 @@
+"""The ingest layer hands analyzers only text worth parsing, and counts the files it skipped or decoded lossily."""
+import os
+import subprocess
+
+import pytest
+
+import file_ingest
+import main
+import parallel
+import repo_analyzer
+from local_repo import iter_sources
+from tests.conftest import DJANGO_FILES
+
+BINARY = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR'
+
+
+@pytest.fixture(autouse=True)
+def limits():
+    previous = file_ingest.get_limits()
+    yield
+    file_ingest.configure(*previous)
+
+
+def write_bytes(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+
+@pytest.mark.parametrize('mmap_threshold', [file_ingest.DEFAULT_MMAP_THRESHOLD, 1])
+def test_read_source_decodes_and_skips(tmp_path, mmap_threshold):
+    file_ingest.configure(max_size=1000, mmap_threshold=mmap_threshold)
+    files = {
+        'plain.py': 'class Café:\n    pass\n'.encode('utf-8'),
+        'bom.py': b'\xef\xbb\xbfdef f():\n    pass\n',
+        'latin.py': b'# -*- coding: latin-1 -*-\nname = "\xe9"\n',
+        'broken.py': b'name = "\xe9"\n',
+        'empty.py': b'',
+        'image.py': BINARY,
+        'huge.py': b'x = 1\n' * 200,
+    }
+    for name, data in files.items():
+        write_bytes(str(tmp_path / name), data)
+
+    with file_ingest.counting() as counts:
+        texts = {name: file_ingest.read_source(str(tmp_path / name)) for name in files}
+        assert file_ingest.read_source(str(tmp_path / 'missing.py')) is None
+        assert file_ingest.read_source(str(tmp_path)) is None
+
+    assert texts['plain.py'] == 'class Café:\n    pass\n'
+    assert texts['bom.py'] == 'def f():\n    pass\n'
+    assert texts['latin.py'].endswith('name = "é"\n')
+    assert texts['broken.py'] == 'name = "�"\n'
+    assert texts['empty.py'] == ''
+    assert texts['image.py'] is None and texts['huge.py'] is None
+    assert counts == {'too_large': 1, 'binary': 1, 'unreadable': 2, 'replaced': 1}
+    assert file_ingest.describe_counts(counts) == \
+        'Skipped 4 files: 1 too large, 1 binary, 2 unreadable; decoded 1 with replacement characters'
+
+
+def test_counting_blocks_nest():
+    with file_ingest.counting() as outer:
+        file_ingest.record('binary')
+        with file_ingest.counting() as inner:
+            file_ingest.record('too_large')
+    assert inner == {'too_large': 1}
+    assert outer == {'binary': 1, 'too_large': 1}
+    assert file_ingest.describe_counts({}) == ''
+
+
+def add_problem_files(path):
+    write_bytes(os.path.join(path, 'shop', 'generated.py'), b'class Generated:\n    pass\n' + b'x = 1\n' * 1000)
+    write_bytes(os.path.join(path, 'shop', 'blob.py'), BINARY)
+    write_bytes(os.path.join(path, 'shop', 'legacy_views.py'), b'# Caf\xe9 views\ndef index():\n    pass\n')
+
+
+def test_analyzers_skip_files_instead_of_failing(git_repo):
+    add_problem_files(git_repo.path)
+    file_ingest.configure(max_size=4096)
+
+    with file_ingest.counting() as counts:
+        categories = main.categorize_items(git_repo.path)
+        symbols = repo_analyzer.parse_files(git_repo.path)
+    assert counts == {'too_large': 2, 'binary': 2, 'replaced': 2}
+    assert 'Generated' not in categories['Others'] and 'Generated' not in symbols['classes']
+    assert categories['Views'] == ['index', 'ProductView', 'index']
+    assert symbols['functions'].count('index') == 2
+
+
+def test_worker_counts_reach_the_parent(git_repo):
+    add_problem_files(git_repo.path)
+    file_ingest.configure(max_size=4096)
+    paths = sorted(os.path.join(root, name) for root, _, names in os.walk(git_repo.path)
+                   if '.git' not in root for name in names if name.endswith('.py'))
+
+    with file_ingest.counting() as counts:
+        results = parallel.analyze_files(repo_analyzer.parse_file, [(path,) for path in paths], git_repo.path,
+                                         workers=2, chunk_size=2)
+    assert counts == {'too_large': 1, 'binary': 1, 'replaced': 1}
+    assert results == [repo_analyzer.parse_file(path) for path in paths]
+
+
+def test_git_objects_skip_large_blobs_and_keep_reading(git_repo, tmp_path):
+    add_problem_files(git_repo.path)
+    git_repo.commit(message='problem files')
+    bare = str(tmp_path / 'bare.git')
+    subprocess.run(['git', 'clone', '-q', '--bare', git_repo.path, bare], check=True)
+    file_ingest.configure(max_size=4096)
+
+    with file_ingest.counting() as counts:
+        sources = dict(iter_sources(bare))
+    assert counts == {'too_large': 1, 'binary': 1, 'replaced': 1}
+    assert 'shop/generated.py' not in sources and 'shop/blob.py' not in sources
+    # Files after the drained blob still line up with their own content
+    for path, content in DJANGO_FILES.items():
+        if path.endswith('.py'):
+            assert sources[path] == content
@@ -0,0 +1,44 @@
+"""Tree fetch through the Git Trees API renders the same output as the Contents crawl."""
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files
+
+import git_trees
+import repo_directory_structure
+import repo_reader
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with MockGitHubServer(generate_files(depth=3, dirs_per_level=2, files_per_dir=2)) as server:
+        monkeypatch.setattr(repo_reader, 'github_api_url', server.contents_url)
+        monkeypatch.setattr(repo_directory_structure, 'github_api_url', server.contents_url)
+        monkeypatch.setattr(git_trees, 'github_trees_url', server.trees_url)
+        yield server
+
+
+@pytest.mark.parametrize('module', [repo_reader, repo_directory_structure])
+def test_tree_mode_matches_contents_crawl(server, module):
+    expected = module.fetch_directory_structure_from_github(server.owner, server.repo)
+    server.reset_counters()
+    assert module.fetch_directory_structure_from_tree(server.owner, server.repo) == expected
+    assert server.request_count == 1
+
+
+def test_subdirectory_path(server):
+    expected = repo_directory_structure.fetch_directory_structure_from_github(server.owner, server.repo, 'pkg_1')
+    assert repo_directory_structure.fetch_directory_structure_from_tree(server.owner, server.repo, 'pkg_1') == expected
+
+
+def test_truncated_tree_falls_back_to_subtrees(server):
+    expected = repo_directory_structure.fetch_directory_structure_from_github(server.owner, server.repo)
+    server.tree_limit = 5
+    server.reset_counters()
+    assert repo_directory_structure.fetch_directory_structure_from_tree(server.owner, server.repo) == expected
+    assert server.request_count > 1
+
+
+def test_missing_path_raises(server):
+    with pytest.raises(ValueError):
+        repo_reader.fetch_directory_structure_from_tree(server.owner, server.repo, 'missing')
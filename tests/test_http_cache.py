@@ -0,0 +1,81 @@
+"""Conditional-request cache: 304s are served from disk, scoped per token, bounded in size."""
+import time
+
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+
+import http_cache
+import http_client
+import repo_reader
+
+
+FILES = {'README.md': '# demo\n', 'app/views.py': 'def index():\n    return "x" * 100\n'}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with MockGitHubServer(FILES) as server:
+        monkeypatch.setattr(repo_reader, 'github_api_url', server.contents_url)
+        yield server
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = http_cache.ResponseCache(str(tmp_path))
+    http_client.configure(cache=cache)
+    yield cache
+    http_client.configure()
+    cache.close()
+
+
+def test_second_fetch_is_served_from_cache(server, cache):
+    first = repo_reader.fetch_file_content_from_github(server.owner, server.repo, 'app/views.py')
+    second = repo_reader.fetch_file_content_from_github(server.owner, server.repo, 'app/views.py')
+
+    assert first == second == FILES['app/views.py']
+    report = cache.report()
+    assert (report['misses'], report['hits']) == (2, 2)
+    assert report['saved_bytes'] > len(FILES['app/views.py'])
+    assert server.not_modified_count == 2
+
+
+def test_entries_are_scoped_by_token(server, cache):
+    repo_reader.fetch_directory_structure_from_github(server.owner, server.repo, access_token='token-a')
+    repo_reader.fetch_directory_structure_from_github(server.owner, server.repo, access_token='token-b')
+    assert cache.report()['hits'] == 0
+    repo_reader.fetch_directory_structure_from_github(server.owner, server.repo, access_token='token-a')
+    assert cache.report()['hits'] == 2
+
+
+def test_expired_entries_are_refetched(server, cache):
+    cache.ttl = 0
+    repo_reader.fetch_directory_structure_from_github(server.owner, server.repo)
+    time.sleep(0.01)
+    repo_reader.fetch_directory_structure_from_github(server.owner, server.repo)
+    assert cache.report()['hits'] == 0
+    assert server.not_modified_count == 0
+
+
+def test_least_recently_used_entries_are_evicted(server, cache):
+    repo_reader.fetch_directory_structure_from_github(server.owner, server.repo)
+    cache.max_bytes = cache.report()['size_bytes']
+    repo_reader.fetch_file_content_from_github(server.owner, server.repo, 'README.md')
+
+    report = cache.report()
+    assert report['evictions'] > 0
+    assert report['size_bytes'] <= cache.max_bytes * http_cache.EVICT_TO
+
+
+def test_refetched_expired_entries_keep_the_size_total_exact(server, cache):
+    repo_reader.fetch_directory_structure_from_github(server.owner, server.repo)
+    size = cache.report()['size_bytes']
+    cache.max_bytes = size
+    cache.ttl = 0
+    for _ in range(3):
+        time.sleep(0.01)
+        repo_reader.fetch_directory_structure_from_github(server.owner, server.repo)
+    # Each refetch drops the expired entry before storing its successor, so the running total stays at the cap
+    assert cache.report()['evictions'] == 0
+    assert cache.report()['size_bytes'] == size
+    assert 'cache' in http_client.get_stats()
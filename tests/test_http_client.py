@@ -0,0 +1,69 @@
+"""Shared HTTP client: pooling, retries and rate-limit handling."""
+import time
+
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+
+import github
+import http_client
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with MockGitHubServer({'README.md': '# demo\n', 'app/views.py': 'def index():\n    pass\n'}) as server:
+        monkeypatch.setattr(github, 'github_api_url', server.contents_url)
+        yield server
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = http_client.configure(backoff=0.01)
+    client.waits = []
+    client.sleep = client.waits.append
+    yield client
+    http_client.configure()
+
+
+def test_retries_rate_limited_requests(server, client):
+    server.queue_response(429, {'Retry-After': '2'})
+    server.queue_response(503)
+
+    contents = github.fetch_repository_contents(server.owner, server.repo)
+
+    assert {item['name'] for item in contents} == {'README.md', 'app'}
+    assert client.waits[0] == 2
+    assert http_client.get_stats()['requests'] == 3
+    assert http_client.get_stats()['retries'] == 2
+
+
+def test_gives_up_after_max_retries(server, client):
+    server.queue_response(502, count=client.max_retries + 1)
+    with pytest.raises(ValueError, match='502'):
+        github.fetch_repository_contents(server.owner, server.repo)
+
+
+def test_forbidden_without_rate_limit_is_not_retried(server, client):
+    server.queue_response(403, body={'message': 'Resource not accessible'})
+    with pytest.raises(ValueError, match='403'):
+        github.fetch_repository_contents(server.owner, server.repo)
+    assert client.stats['retries'] == 0
+
+
+def test_throttles_when_rate_limit_runs_low(server, client):
+    reset = str(int(time.time()) + 10)
+    server.queue_response(200, {'X-RateLimit-Remaining': '1', 'X-RateLimit-Reset': reset}, body=[])
+
+    github.fetch_repository_contents(server.owner, server.repo)
+    assert client.waits == []
+    github.fetch_repository_contents(server.owner, server.repo)
+
+    assert len(client.waits) == 1 and 3 < client.waits[0] <= 5
+    assert client.stats['wait_time'] == pytest.approx(client.waits[0])
+
+
+def test_connections_are_reused(server, client):
+    for _ in range(3):
+        github.fetch_repository_contents(server.owner, server.repo)
+    adapter = client.session.get_adapter(server.base_url)
+    assert len(adapter.poolmanager.pools) == 1
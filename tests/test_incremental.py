@@ -0,0 +1,77 @@
+"""Incremental re-analysis only re-parses files whose blobs changed."""
+import file_ingest
+from incremental import IncrementalRun, state_file
+
+import main
+import repo_analyzer
+
+
+def run_parse_files(repo, state_dir):
+    incremental = IncrementalRun(repo.path, state_file(str(state_dir), repo.path, 'parse_files'), repo_analyzer.ANALYZER_VERSION)
+    result = repo_analyzer.parse_files(repo.path, incremental)
+    incremental.save()
+    return result, incremental.stats
+
+
+def test_parse_files_reuses_unchanged_files(git_repo, tmp_path):
+    state_dir = tmp_path / 'state'
+    first, stats = run_parse_files(git_repo, state_dir)
+    assert stats == {'reused': 0, 'parsed': 6}
+
+    git_repo.commit({'shop/views.py': 'def index(request):\n    pass\n\n\ndef detail(request):\n    pass\n'})
+    second, stats = run_parse_files(git_repo, state_dir)
+
+    assert stats == {'reused': 5, 'parsed': 1}
+    assert second == repo_analyzer.parse_files(git_repo.path)
+    assert 'detail' in second['functions'] and 'ProductView' not in second['classes']
+
+
+def test_categorize_items_matches_full_run(git_repo, tmp_path):
+    path = state_file(str(tmp_path), git_repo.path, 'categorize_items')
+    first = IncrementalRun(git_repo.path, path, main.ANALYZER_VERSION)
+    main.categorize_items(git_repo.path, first)
+    first.save()
+
+    git_repo.commit({'shop/urls.py': "urlpatterns = [\n    path('orders/', views.index),\n]\n"})
+    second = IncrementalRun(git_repo.path, path, main.ANALYZER_VERSION)
+    result = main.categorize_items(git_repo.path, second)
+
+    assert second.stats == {'reused': 5, 'parsed': 1}
+    assert result == main.categorize_items(git_repo.path)
+    assert result['Endpoints'] == ['orders/']
+
+
+def test_skipped_files_are_read_again_under_new_limits(git_repo, tmp_path):
+    git_repo.commit({'shop/models.py': 'class Big:\n    """' + 'x' * 200 + '"""\n'})
+    path = state_file(str(tmp_path), git_repo.path, 'categorize_items')
+    previous = file_ingest.get_limits()
+    try:
+        file_ingest.configure(max_size=100)
+        first = IncrementalRun(git_repo.path, path, main.ANALYZER_VERSION)
+        assert main.categorize_items(git_repo.path, first)['Models'] == []
+        first.save()
+
+        file_ingest.configure(max_size=10 * 1024 * 1024)
+        second = IncrementalRun(git_repo.path, path, main.ANALYZER_VERSION)
+        with file_ingest.counting() as counts:
+            result = main.categorize_items(git_repo.path, second)
+    finally:
+        file_ingest.configure(*previous)
+
+    assert second.stats == {'reused': 5, 'parsed': 1}
+    assert result['Models'] == ['Big'] and not counts
+
+
+def test_version_change_discards_state(git_repo, tmp_path):
+    run_parse_files(git_repo, tmp_path)
+    incremental = IncrementalRun(git_repo.path, state_file(str(tmp_path), git_repo.path, 'parse_files'), 'other')
+    repo_analyzer.parse_files(git_repo.path, incremental)
+    assert incremental.stats['reused'] == 0
+
+
+def test_analyze_repository_with_state_dir(git_repo, tmp_path):
+    state_dir = str(tmp_path / 'state')
+    first = repo_analyzer.analyze_repository(git_repo.path, state_dir)
+    second = repo_analyzer.analyze_repository(git_repo.path, state_dir)
+    assert first == second == repo_analyzer.analyze_repository(git_repo.path)
+    assert 'ProductSerializer' in first['classes']
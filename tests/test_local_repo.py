@@ -0,0 +1,88 @@
+"""Local checkouts and bare repositories are analyzed without the network, with the same output as the remote path."""
+import subprocess
+
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+from tests.conftest import DJANGO_FILES
+
+import local_repo
+import main
+import repo_analyzer
+import repo_directory_structure
+import repo_reader
+
+
+@pytest.fixture
+def bare_repo(git_repo, tmp_path):
+    path = str(tmp_path / 'bare.git')
+    subprocess.run(['git', 'clone', '-q', '--bare', git_repo.path, path], check=True)
+    return path
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with MockGitHubServer(DJANGO_FILES) as server:
+        monkeypatch.setattr(repo_reader, 'github_api_url', server.contents_url)
+        monkeypatch.setattr(repo_directory_structure, 'github_api_url', server.contents_url)
+        yield server
+
+
+@pytest.mark.parametrize('module', [repo_reader, repo_directory_structure])
+def test_local_tree_matches_github(server, git_repo, bare_repo, module):
+    expected = module.fetch_directory_structure_from_github(server.owner, server.repo)
+    # Untracked caches and build output on disk are not part of the tree GitHub shows
+    git_repo.write({'.pytest_cache/v/cache/lastfailed': '{}', 'shop/__pycache__/models.cpython-312.pyc': '',
+                    'node_modules/left-pad/index.js': ''})
+    assert module.fetch_directory_structure_from_local(git_repo.path) == expected
+    assert module.fetch_directory_structure_from_local(bare_repo) == expected
+
+
+def test_local_report_matches_github(server, git_repo, bare_repo):
+    files = ['shop/models.py', 'shop/urls.py', 'README.md', 'shop/missing.py']
+    expected = repo_reader.generate_detailed_report(server.owner, server.repo, files, None)
+    assert list(repo_reader.iter_local_detailed_report(git_repo.path, files))[:-1] == expected[:-1]
+    assert list(repo_reader.iter_local_detailed_report(bare_repo, files))[:-1] == expected[:-1]
+    assert 'Failed to fetch details from shop/missing.py' in list(repo_reader.iter_local_detailed_report(bare_repo, files))[-1]
+
+
+def test_undecodable_file_fails_only_its_section(git_repo):
+    with open(f"{git_repo.path}/README.md", 'wb') as file:
+        file.write(b'# Caf\xe9\n')
+    git_repo.commit()
+    files = ['README.md', 'shop/models.py']
+    for ref in (None, 'HEAD'):
+        sections = list(repo_reader.iter_local_detailed_report(git_repo.path, files, ref))
+        assert sections[0] == ("\nFailed to fetch details from README.md: "
+                               "Failed to read file content: README.md - not UTF-8 text\n")
+        assert sections[1].startswith('\nDetails from shop/models.py:')
+
+
+def test_bare_categorize_matches_checkout(git_repo, bare_repo):
+    # One file per category, so the filesystem's walk order does not matter here
+    assert main.categorize_local_repository(bare_repo) == main.categorize_items(git_repo.path)
+
+
+def test_explicit_ref_reads_committed_content(git_repo):
+    git_repo.write({'shop/models.py': 'class Uncommitted:\n    pass\n'})
+    assert main.categorize_local_repository(git_repo.path)['Models'] == ['Uncommitted']
+    assert main.categorize_local_repository(git_repo.path, ref='HEAD')['Models'] == ['Product', 'product_count']
+
+
+def test_repo_analyzer_local(git_repo, bare_repo):
+    # os.walk order depends on the filesystem, git objects are read in sorted order
+    def normalized(result):
+        return {key: sorted(values) for key, values in result.items()}
+
+    expected = normalized(repo_analyzer.parse_files(git_repo.path))
+    assert normalized(repo_analyzer.analyze_local_repository(git_repo.path)) == expected
+    assert normalized(repo_analyzer.analyze_local_repository(bare_repo)) == expected
+
+
+def test_blob_reader_missing_object(bare_repo):
+    with local_repo.BlobReader(bare_repo) as reader:
+        assert reader.read('HEAD:README.md') == b'# Shop\n'
+        for missing in ('HEAD:nope.py', 'HEAD:no such.py', 'HEAD:not here either.py'):
+            with pytest.raises(KeyError):
+                reader.read(missing)
+        assert reader.read('HEAD:shop/serializers.py').startswith(b'class ProductSerializer')
@@ -0,0 +1,38 @@
+"""The process pool returns exactly what the serial run does."""
+import pytest
+
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import main
+import parallel
+import repo_analyzer
+
+
+@pytest.fixture(scope='module')
+def repo(tmp_path_factory):
+    return write_files(generate_files(depth=3, dirs_per_level=4, files_per_dir=12, layout='django'),
+                       str(tmp_path_factory.mktemp('repo')))
+
+
+def test_categorize_items_parallel_matches_serial(repo):
+    assert main.categorize_items(repo, workers=2) == main.categorize_items(repo)
+
+
+def test_parse_files_parallel_matches_serial(repo):
+    assert repo_analyzer.parse_files(repo, workers=2) == repo_analyzer.parse_files(repo)
+
+
+def test_map_in_order_keeps_task_order():
+    tasks = [(str(n),) for n in range(50)]
+    assert parallel.map_in_order(int, tasks, workers=3, chunk_size=4) == list(range(50))
+
+
+def test_errors_surface_like_a_serial_run(tmp_path):
+    write_files({'ok/models.py': 'class A:\n    pass\n', 'broken/views.py': 'def (:\n'}, str(tmp_path))
+    tasks = [(str(tmp_path / 'ok' / 'models.py'),), (str(tmp_path / 'broken' / 'views.py'),)]
+    # One file per chunk, so the pool runs and the SyntaxError comes back from a worker
+    with pytest.raises(SyntaxError) as raised:
+        parallel.analyze_files(main.extract_symbols, tasks, str(tmp_path), workers=2, chunk_size=1)
+    assert 'Traceback' in str(raised.value.__cause__)
+    with pytest.raises(SyntaxError):
+        main.categorize_items(str(tmp_path), workers=2)
@@ -0,0 +1,118 @@
+"""Parse results are cached by content and reused across repositories without calling ast.parse again."""
+import ast
+
+import pytest
+
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import ast_visitor
+import main
+import parse_cache
+import repo_reader
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = parse_cache.ParseCache(str(tmp_path / 'cache'))
+    parse_cache.configure(cache)
+    yield cache
+    parse_cache.configure(None)
+    cache.close()
+
+
+@pytest.fixture
+def parse_calls(monkeypatch):
+    calls = []
+    real_parse = ast.parse
+
+    def counting_parse(*args, **kwargs):
+        calls.append(args[0])
+        return real_parse(*args, **kwargs)
+
+    monkeypatch.setattr(ast, 'parse', counting_parse)
+    return calls
+
+
+def test_encoding_round_trip():
+    small = {'classes': [{'name': 'A', 'lineno': 1, 'bases': [None]}], 'url_patterns': [b'x', 1.5, ...]}
+    large = {'functions': [{'name': f"f{i}", 'top_level': True} for i in range(500)]}
+    assert parse_cache.encode(small)[:1] == b'm'
+    assert parse_cache.encode(large)[:1] == b'z'
+    assert parse_cache.decode(parse_cache.encode(small)) == small
+    assert parse_cache.decode(parse_cache.encode(large)) == large
+
+
+def test_same_content_in_another_repository_is_not_parsed_again(cache, parse_calls, tmp_path):
+    files = generate_files(depth=2, dirs_per_level=2, files_per_dir=12, layout='django')
+    first = write_files(files, str(tmp_path / 'first'))
+    second = write_files(files, str(tmp_path / 'second'))
+
+    expected = main.categorize_items(first)
+    parsed = len(parse_calls)
+    assert parsed > 0
+    assert main.categorize_items(second) == expected
+    assert len(parse_calls) == parsed
+    assert cache.report()['hits'] >= parsed
+
+
+def test_results_match_uncached(cache, parse_calls):
+    source = "class A:\n    def f(self):\n        pass\n\nasync def g():\n    pass\n"
+    parse_cache.configure(None)
+    expected = repo_reader.extract_details_from_python_file(source)
+    parse_cache.configure(cache)
+    assert repo_reader.extract_details_from_python_file(source) == expected
+    assert repo_reader.extract_details_from_python_file(source) == expected
+    assert len(parse_calls) == 2
+
+
+def test_version_bump_invalidates(cache, parse_calls, monkeypatch):
+    ast_visitor.analyze_source("x = 1\n")
+    monkeypatch.setattr(ast_visitor, 'VISITOR_VERSION', 'next')
+    ast_visitor.analyze_source("x = 1\n")
+    assert len(parse_calls) == 2
+
+
+def test_syntax_errors_are_not_cached(cache):
+    for _ in range(2):
+        with pytest.raises(SyntaxError):
+            ast_visitor.analyze_source("def broken(:\n")
+    assert cache.report()['entries'] == 0
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    cache = parse_cache.ParseCache(str(tmp_path), max_bytes=2000)
+    keys = [parse_cache.content_key('test', '1', str(i)) for i in range(20)]
+    for key in keys:
+        cache.put(key, ['x' * 200])
+    report = cache.report()
+    assert report['size_bytes'] <= 2000
+    assert report['evictions'] > 0
+    assert cache.get(keys[-1]) == ['x' * 200]
+    assert cache.get(keys[0]) is parse_cache.MISSING
+    cache.close()
+
+
+def test_eviction_counts_what_other_connections_stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'EVICT_BATCH', 2)
+    first = parse_cache.ParseCache(str(tmp_path), max_bytes=4000)
+    second = parse_cache.ParseCache(str(tmp_path), max_bytes=4000)
+    for i in range(15):
+        second.put(parse_cache.content_key('test', '1', f"second {i}"), ['x' * 200])
+    for i in range(20):
+        first.put(parse_cache.content_key('test', '1', f"first {i}"), ['x' * 200])
+    # Once the first connection's own total crosses the cap, it evicts what the second one stored as well
+    report = first.report()
+    assert 0 < report['size_bytes'] <= 4000 * parse_cache.EVICT_TO
+    assert report['evictions'] > parse_cache.EVICT_BATCH
+    assert first.get(parse_cache.content_key('test', '1', 'second 0')) is parse_cache.MISSING
+    first.close()
+    second.close()
+
+
+def test_worker_processes_use_the_cache(cache, tmp_path):
+    root = write_files(generate_files(depth=3, dirs_per_level=3, files_per_dir=12, layout='django'), str(tmp_path / 'repo'))
+    pooled = main.categorize_items(root, workers=2)
+    # Workers hand their counters back, so the misses they had are reported here
+    report = cache.report()
+    assert report['misses'] >= report['entries'] > 0
+    assert main.categorize_items(root) == pooled
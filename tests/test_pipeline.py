@@ -0,0 +1,141 @@
+"""Pipelined runs overlap discovery, fetching, parsing and storage, stay bounded, and match the staged results."""
+import random
+import subprocess
+import threading
+import time
+
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files
+import main
+import repo_analyzer
+import repo_directory_structure
+import repo_reader
+from local_repo import promisor_remote
+from pipeline import Pipeline
+from repo_clone import clone_for_streaming
+
+
+def jittered(function):
+    rng = random.Random(0)
+    delays = [rng.random() * 0.002 for _ in range(1000)]
+
+    def call(*args):
+        time.sleep(delays[args[0] % len(delays)])
+        return function(*args)
+    return call
+
+
+def test_results_come_back_in_discovery_order():
+    pipeline = Pipeline(jittered(lambda n: n * 2), jittered(lambda n, fetched: fetched + 1),
+                        fetch_workers=4, parse_workers=3, capacity=5)
+    assert list(pipeline.run(range(200))) == [(n, n * 2 + 1) for n in range(200)]
+    assert pipeline.stats == {'items': 200, 'max_in_flight': 5}
+    assert list(pipeline.run([])) == []
+
+
+def test_slow_store_throttles_discovery():
+    produced = []
+
+    def items():
+        for n in range(50):
+            produced.append(n)
+            yield n
+
+    pipeline = Pipeline(lambda n: n, lambda n, fetched: fetched, fetch_workers=2, capacity=4)
+    for stored, (n, _) in enumerate(pipeline.run(items())):
+        time.sleep(0.002)
+        # Discovery runs ahead of storage by at most the capacity
+        assert len(produced) - stored <= 4
+    assert pipeline.stats['max_in_flight'] == 4
+
+
+def test_parsing_starts_before_discovery_finishes():
+    first_stored = threading.Event()
+
+    def items():
+        yield 'first'
+        # A staged run would wait here forever: the rest is only discovered after the first item is stored
+        assert first_stored.wait(5)
+        yield 'second'
+
+    results = []
+    for item, parsed in Pipeline(str.upper, lambda item, fetched: fetched).run(items()):
+        results.append(parsed)
+        first_stored.set()
+    assert results == ['FIRST', 'SECOND']
+
+
+@pytest.mark.parametrize('stage', ['discover', 'fetch', 'parse'])
+def test_first_error_stops_every_stage(stage):
+    def fail_at(name, value):
+        if stage == name and value == 7:
+            raise ValueError(f"{name} failed")
+        return value
+
+    def items():
+        for n in range(1000):
+            yield fail_at('discover', n)
+
+    threads = threading.active_count()
+    pipeline = Pipeline(lambda n: fail_at('fetch', n), lambda n, fetched: fail_at('parse', fetched), capacity=3)
+    with pytest.raises(ValueError, match=f"{stage} failed"):
+        list(pipeline.run(items()))
+    assert threading.active_count() == threads
+    with pytest.raises(ValueError):
+        Pipeline(str, str, capacity=0)
+
+
+def test_abandoned_run_stops_its_threads():
+    threads = threading.active_count()
+    run = Pipeline(lambda n: n, lambda n, fetched: fetched, capacity=2).run(iter(range(10 ** 6)))
+    assert next(run) == (0, 0)
+    run.close()
+    assert threading.active_count() == threads
+
+
+@pytest.fixture
+def partial_clone(git_repo, tmp_path):
+    git_repo.commit({f"app{n}/views.py": f"def view_{n}():\n    pass\n" for n in range(40)}, 'more files')
+    git_repo.git('config', 'uploadpack.allowFilter', 'true')
+    full = str(tmp_path / 'full.git')
+    subprocess.run(['git', 'clone', '-q', '--bare', git_repo.path, full], check=True)
+    streamed = str(tmp_path / 'streamed.git')
+    clone_for_streaming(f"file://{git_repo.path}", streamed)
+    return full, streamed
+
+
+def test_streamed_symbols_match_a_full_clone(partial_clone):
+    full, streamed = partial_clone
+    assert promisor_remote(streamed) == 'origin'
+    missing = subprocess.run(['git', '-C', streamed, 'rev-list', '--objects', '--missing=print', 'HEAD'],
+                             capture_output=True, text=True, check=True).stdout
+    assert missing.count('\n?') >= 40
+
+    assert list(main.categorize_streamed_symbols(streamed)) == list(main.categorize_local_symbols(full))
+    assert list(repo_analyzer.parse_streamed_symbols(streamed)) == list(repo_analyzer.parse_local_symbols(full))
+    assert main.categorize_streamed_symbols(streamed).to_dict() == main.categorize_local_repository(full)
+
+
+def test_pipelined_analyze_repository_matches_bare_analysis(partial_clone, git_repo, capsys):
+    full, _ = partial_clone
+    result = repo_analyzer.analyze_repository(f"file://{git_repo.path}", pipelined=True)
+    assert result == repo_analyzer.parse_local_repository(full)
+    assert 'Detected Languages: Python' in capsys.readouterr().out
+
+
+def test_pipelined_report_is_byte_identical(monkeypatch, tmp_path):
+    files = generate_files(depth=2, dirs_per_level=2, files_per_dir=3)
+    files['urls.py'] = "urlpatterns = [path('a/', view), path('b/', view)]\n"
+    with MockGitHubServer(files, latency=0.002) as server:
+        monkeypatch.setattr(repo_reader, 'github_api_url', server.contents_url)
+        monkeypatch.setattr(repo_directory_structure, 'github_api_url', server.contents_url)
+        url = f"https://github.com/{server.owner}/{server.repo}"
+        staged = repo_reader.write_report(url, output_file=str(tmp_path / 'staged.txt'))
+        pipelined = repo_reader.write_report(url, output_file=str(tmp_path / 'pipelined.txt'), concurrency=3,
+                                             pipelined=True)
+    with open(staged, encoding='utf-8') as want, open(pipelined, encoding='utf-8') as got:
+        expected = want.read()
+        assert got.read() == expected
+    assert 'Endpoints from urls.py' in expected
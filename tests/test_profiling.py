@@ -0,0 +1,132 @@
+"""Profiling records per-stage and per-file figures when enabled and nothing when it is off."""
+import json
+import os
+import pstats
+import tracemalloc
+
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files, write_files
+
+import main
+import profiling
+import repo_directory_structure
+import repository_db
+
+
+@pytest.fixture
+def profiler():
+    profiler = profiling.enable()
+    yield profiler
+    profiling.disable()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return write_files(generate_files(depth=3, dirs_per_level=3, files_per_dir=12, layout='django'), str(tmp_path / 'repo'))
+
+
+def test_off_records_nothing(repo):
+    assert not profiling.enabled()
+    assert profiling.stage('anything') is profiling.stage('other')
+    profiling.add('anything', 1.0)
+    main.categorize_items(repo)
+    assert profiling.get_profiler() is None
+
+
+def test_stages_and_files(profiler, repo):
+    main.categorize_items(repo)
+    report = profiler.report()
+    python_files = [os.path.join(root, name) for root, _, files in os.walk(repo) for name in files if name.endswith('.py')]
+
+    assert report['stages']['scan']['calls'] == 1
+    assert report['stages']['ast.parse']['calls'] == len(python_files)
+    assert report['stages']['ast.parse']['bytes'] == sum(os.path.getsize(path) for path in python_files)
+    assert report['stages']['analyze:extract_symbols']['seconds'] >= report['stages']['ast.parse']['seconds']
+    assert set(report['files']) == set(python_files)
+    assert report['max_rss_bytes'] > 0
+    json.dumps(report)
+
+
+def test_worker_figures_are_merged(profiler, repo):
+    main.categorize_items(repo, workers=2)
+    report = profiler.report()
+    assert report['stages']['ast.parse']['calls'] == len(report['files']) > 64
+    assert report['stages']['ast.parse']['peak_memory_bytes'] == 0
+
+
+def test_workers_trace_memory_when_the_parent_does(repo):
+    profiler = profiling.enable(trace_memory=True)
+    try:
+        main.categorize_items(repo, workers=2)
+    finally:
+        profiling.disable()
+    # Every ast.parse call ran in a worker, so the peak can only come from their snapshots
+    assert profiler.report()['stages']['ast.parse']['peak_memory_bytes'] > 0
+
+
+def test_http_and_sqlite_stages(profiler, monkeypatch, tmp_path):
+    with MockGitHubServer(generate_files(depth=2, dirs_per_level=2, files_per_dir=2)) as server:
+        monkeypatch.setattr(repo_directory_structure, 'github_api_url', server.contents_url)
+        repo_directory_structure.fetch_directory_structure_from_github(server.owner, server.repo)
+        requests_made = server.request_count
+    repository_db.store_analysis_run('https://github.com/o/r', {'classes': ['A']}, db_file=str(tmp_path / 'p.db'))
+    repository_db.close_connections()
+
+    stages = profiler.report()['stages']
+    assert stages['http']['calls'] == requests_made
+    assert stages['http']['bytes'] > 0
+    assert stages['sqlite']['calls'] == 1
+
+
+def test_peak_memory_of_nested_stages():
+    profiler = profiling.enable(trace_memory=True)
+    try:
+        with profiling.stage('outer'):
+            with profiling.stage('inner'):
+                data = bytearray(4 * 1024 * 1024)
+                del data
+            with profiling.stage('after'):
+                pass
+    finally:
+        profiling.disable()
+    stages = profiler.report()['stages']
+    assert stages['inner']['peak_memory_bytes'] >= 4 * 1024 * 1024
+    assert stages['outer']['peak_memory_bytes'] >= stages['inner']['peak_memory_bytes']
+    assert stages['after']['peak_memory_bytes'] < 4 * 1024 * 1024
+
+
+def test_environment_switch_writes_report_and_cprofile(repo, tmp_path, monkeypatch):
+    report_path = str(tmp_path / 'report.json')
+    cprofile_path = str(tmp_path / 'run.prof')
+    monkeypatch.setenv(profiling.PROFILE_ENV, report_path)
+    monkeypatch.setenv(profiling.CPROFILE_ENV, cprofile_path)
+    monkeypatch.delenv(profiling.MEMORY_ENV, raising=False)
+    registered = []
+    monkeypatch.setattr(profiling.atexit, 'register', registered.append)
+
+    profiling.enable_from_environment()
+    try:
+        # Memory tracing has a switch of its own, so timings are not slowed down by it
+        assert not tracemalloc.is_tracing()
+        main.categorize_items(repo)
+    finally:
+        registered[0]()
+        profiling.disable()
+
+    with open(report_path, encoding='utf-8') as file:
+        assert 'ast.parse' in json.load(file)['stages']
+    assert pstats.Stats(cprofile_path).total_calls > 0
+
+
+def test_environment_switch_for_memory(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path / 'report.json'))
+    monkeypatch.setenv(profiling.MEMORY_ENV, '1')
+    monkeypatch.setattr(profiling.atexit, 'register', lambda finish: None)
+    try:
+        assert profiling.enable_from_environment().trace_memory and tracemalloc.is_tracing()
+        assert profiling.settings() == (True, True)
+    finally:
+        profiling.disable()
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,71 @@
+"""Clone strategies fetch only what analysis reads; mirrors are reused across runs."""
+import os
+import subprocess
+
+import pytest
+
+import main
+import repo_analyzer
+import repo_clone
+
+
+@pytest.fixture
+def remote(git_repo, tmp_path):
+    """A bare repository reachable through file://, so depth and filters apply as they would remotely."""
+    git_repo.commit({'lib/Util.java': 'class Util {}\n', 'docs/guide.txt': 'guide\n'})
+    bare = str(tmp_path / 'remote.git')
+    subprocess.run(['git', 'clone', '--quiet', '--bare', git_repo.path, bare], check=True)
+    subprocess.run(['git', '-C', bare, 'config', 'uploadpack.allowFilter', 'true'], check=True)
+    return 'file://' + bare
+
+
+def checked_out(path):
+    return sorted(os.path.relpath(os.path.join(root, name), path)
+                  for root, dirs, files in os.walk(path) if '.git' not in root.split(os.sep)
+                  for name in files)
+
+
+def git(path, *args):
+    return subprocess.run(['git', '-C', path, *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.mark.parametrize('strategy', ['shallow', 'blobless', 'sparse'])
+def test_strategies_analyze_like_a_full_clone(remote, strategy):
+    full = repo_analyzer.analyze_repository(remote)
+    assert 'ProductSerializer' in full['classes']
+    assert repo_analyzer.analyze_repository(remote, clone_strategy=strategy) == full
+
+
+def test_shallow_clone_has_one_commit(remote, tmp_path):
+    target = str(tmp_path / 'shallow')
+    repo_clone.clone_with_strategy(remote, target, 'shallow')
+    assert git(target, 'rev-list', '--count', 'HEAD') == '1'
+
+
+def test_sparse_clone_checks_out_source_and_readme_only(remote, tmp_path):
+    target = str(tmp_path / 'sparse')
+    repo_clone.clone_with_strategy(remote, target, 'sparse')
+    files = checked_out(target)
+    assert 'README.md' in files and os.path.join('shop', 'models.py') in files
+    assert os.path.join('lib', 'Util.java') in files
+    assert not any(name.endswith('.txt') for name in files)
+
+
+def test_mirror_is_created_once_and_fetched_afterwards(remote, git_repo, tmp_path):
+    cache = str(tmp_path / 'mirrors')
+    first = main.clone_repo(remote, strategy='sparse', mirror_cache=cache)
+    mirror = repo_clone.mirror_path(cache, remote)
+    assert os.path.isdir(mirror)
+    assert main.categorize_items(first)['Models'] == ['Product', 'product_count']
+
+    git_repo.commit({'shop/models.py': 'class Order:\n    pass\n'})
+    subprocess.run(['git', '-C', git_repo.path, 'push', '--quiet', remote, 'main'], check=True)
+    second = main.clone_repo(remote, mirror_cache=cache)
+
+    assert main.categorize_items(second)['Models'] == ['Order']
+    assert git(mirror, 'rev-parse', 'main') == git_repo.git('rev-parse', 'HEAD').strip()
+
+
+def test_unknown_strategy_is_rejected(remote, tmp_path):
+    with pytest.raises(ValueError, match='Unknown clone strategy'):
+        repo_clone.clone_with_strategy(remote, str(tmp_path / 'x'), 'everything')
@@ -0,0 +1,168 @@
+"""Normalized, batched storage keeps the legacy store/query behaviour."""
+import sqlite3
+
+import pytest
+
+import repository_db
+from symbol_table import SymbolTable
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository_db, 'DB_FILE', str(tmp_path / 'analysis.db'))
+    yield repository_db
+    repository_db.close_connections()
+
+
+RESULT = {'classes': ['ClassA', 'ClassB'], 'functions': ['functionA'], 'endpoints': ['/api/data']}
+
+
+def test_store_and_query_keep_legacy_format(db):
+    db.store_analysis_result('https://github.com/o/r', RESULT)
+    rows = db.query_analysis_results('https://github.com/o/r')
+
+    assert rows == [
+        {'class_name': 'ClassA', 'function_name': None, 'endpoint': None},
+        {'class_name': 'ClassB', 'function_name': None, 'endpoint': None},
+        {'class_name': None, 'function_name': 'functionA', 'endpoint': None},
+        {'class_name': None, 'function_name': None, 'endpoint': '/api/data'},
+    ]
+    assert db.query_analysis_results('https://github.com/o/other') == []
+
+
+def test_legacy_results_are_migrated_once(db):
+    # A database written by the original single-table schema
+    conn = sqlite3.connect(db.DB_FILE)
+    conn.execute("CREATE TABLE analysis_results (id INTEGER PRIMARY KEY AUTOINCREMENT, repository_url TEXT NOT NULL, "
+                 "class_name TEXT, function_name TEXT, endpoint TEXT)")
+    conn.executemany("INSERT INTO analysis_results (repository_url, class_name, function_name, endpoint) "
+                     "VALUES (?, ?, ?, ?)", [('https://github.com/o/r', 'ClassA', None, None),
+                                              ('https://github.com/o/other', None, 'helper', None),
+                                              ('https://github.com/o/r', None, None, '/api/data'),
+                                              ('https://github.com/o/r', None, 'functionA', None)])
+    conn.commit()
+    conn.close()
+
+    assert db.query_analysis_results('https://github.com/o/r') == [
+        {'class_name': 'ClassA', 'function_name': None, 'endpoint': None},
+        {'class_name': None, 'function_name': None, 'endpoint': '/api/data'},
+        {'class_name': None, 'function_name': 'functionA', 'endpoint': None},
+    ]
+    assert db.find_symbols('helper')[0]['category'] == 'functions'
+    tables = {row[0] for row in db.get_connection().execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert 'analysis_results' not in tables and 'analysis_results_migrated' in tables
+
+    # Reopening does not copy the rows again, and later runs are stored after the migrated one
+    db.close_connections()
+    db.store_analysis_result('https://github.com/o/r', {'classes': ['ClassB']})
+    assert [row['class_name'] for row in db.query_analysis_results('https://github.com/o/r')] == [
+        'ClassA', None, None, 'ClassB']
+
+
+def test_connection_is_reused_and_uses_wal(db):
+    conn = db.get_connection()
+    assert db.get_connection() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_find_symbols_searches_latest_runs(db):
+    db.store_analysis_run('https://github.com/o/a', {'classes': ['Shared', 'Old']}, commit_sha='1')
+    db.store_analysis_run('https://github.com/o/a', {'classes': ['Shared']}, commit_sha='2')
+    db.store_analysis_run('https://github.com/o/b', {'Models': ['Shared'], 'Endpoints': ['items/']})
+
+    assert [row['repository_url'] for row in db.find_symbols('Shared')] == ['https://github.com/o/a', 'https://github.com/o/b']
+    assert db.find_symbols('Old') == []
+    assert len(db.find_symbols('Old', latest_only=False)) == 1
+    assert db.find_symbols('items/', kind='endpoint')[0]['category'] == 'Endpoints'
+
+
+def test_lookup_uses_name_index(db):
+    plan = db.get_connection().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM symbols WHERE name=?", ('x',)).fetchall()
+    assert any('idx_symbols_name' in row[-1] for row in plan)
+
+
+def table_of(files):
+    table = SymbolTable(['classes', 'functions'])
+    for path, symbols in files.items():
+        for kind, name in symbols:
+            table.add_file(path, f"{kind}es" if kind == 'class' else f"{kind}s", [(kind, name, name, 1)])
+    return table
+
+
+def test_diff_runs_reports_added_removed_and_moved_per_category(db):
+    old = db.store_analysis_run('https://github.com/o/a', table_of({
+        'shop/models.py': [('class', 'Product'), ('class', 'Order')],
+        'shop/utils.py': [('function', 'slugify'), ('function', 'legacy')],
+    }), commit_sha='1')
+    new = db.store_analysis_run('https://github.com/o/a', table_of({
+        'shop/models.py': [('class', 'Product')],
+        'orders/models.py': [('class', 'Order'), ('class', 'Invoice')],
+        'shop/utils.py': [('function', 'slugify')],
+    }), commit_sha='2')
+
+    diff = db.diff_runs(old, new)
+    assert diff == {
+        'classes': {'added': [db.SymbolChange('class', 'Invoice', 'Invoice', None, 'orders/models.py')],
+                    'removed': [],
+                    'moved': [db.SymbolChange('class', 'Order', 'Order', 'shop/models.py', 'orders/models.py')]},
+        'functions': {'added': [],
+                      'removed': [db.SymbolChange('function', 'legacy', 'legacy', 'shop/utils.py', None)],
+                      'moved': []},
+    }
+    assert db.diff_latest_runs('https://github.com/o/a') == diff
+    assert db.format_diff(diff) == [
+        'classes: 1 added, 0 removed, 1 moved', '  + Invoice  (orders/models.py)',
+        '  ~ Order  (shop/models.py -> orders/models.py)',
+        'functions: 0 added, 1 removed, 0 moved', '  - legacy  (shop/utils.py)',
+    ]
+    assert db.diff_runs(new, new) == {}
+    # The first run of a repository is all additions
+    assert [change.name for change in db.diff_runs(None, old)['classes']['added']] == ['Order', 'Product']
+
+
+def test_diff_across_repositories_and_storage_formats(db):
+    table_run = db.store_analysis_run('https://github.com/o/a',
+                                      table_of({'a.py': [('class', 'Shared'), ('class', 'A')]}))
+    dict_run = db.store_analysis_run('https://github.com/o/b', {'classes': ['Shared', 'B'], 'Models': ['Product']})
+    # Without files on one side nothing can have moved; the rest compares by category, kind and name
+    assert db.diff_runs(table_run, dict_run) == {
+        'Models': {'added': [db.SymbolChange(None, 'Product', 'Product', None, None)], 'removed': [], 'moved': []},
+        'classes': {'added': [db.SymbolChange('class', 'B', 'B', None, None)],
+                    'removed': [db.SymbolChange('class', 'A', 'A', None, None)], 'moved': []},
+    }
+    assert db.previous_run_id(dict_run) is None
+    with pytest.raises(ValueError, match='No analysis runs'):
+        db.diff_latest_runs('https://github.com/o/missing')
+
+
+def test_diff_counts_duplicates_and_tells_qualified_names_apart(db):
+    def table(entries):
+        result = SymbolTable(['functions'])
+        for path, qualname, line in entries:
+            result.add_file(path, 'functions', [('function', qualname.rsplit('.', 1)[-1], qualname, line)])
+        return result
+
+    old = db.store_analysis_run('https://github.com/o/a', table([
+        ('jobs.py', 'A.run', 2), ('jobs.py', 'B.run', 6), ('util.py', 'helper', 1), ('util.py', 'helper', 9)]))
+    new = db.store_analysis_run('https://github.com/o/a', table([
+        ('jobs.py', 'A.run', 12), ('util.py', 'helper', 1), ('util.py', 'helper', 5), ('util.py', 'helper', 9),
+        ('tasks.py', 'B.run', 3)]))
+    # Lines moving inside a file are not changes; a third helper is one, and so is B.run leaving jobs.py
+    assert db.diff_runs(old, new) == {'functions': {
+        'added': [db.SymbolChange('function', 'helper', 'helper', None, 'util.py')], 'removed': [],
+        'moved': [db.SymbolChange('function', 'run', 'B.run', 'jobs.py', 'tasks.py')]}}
+    assert db.format_diff(db.diff_runs(new, old)) == [
+        'functions: 0 added, 1 removed, 1 moved', '  - helper  (util.py)', '  ~ B.run  (tasks.py -> jobs.py)']
+
+    # Dict results are counted the same way, without paths
+    first = db.store_analysis_run('https://github.com/o/b', {'functions': ['save', 'save', 'load']})
+    second = db.store_analysis_run('https://github.com/o/b', {'functions': ['save']})
+    assert db.diff_runs(first, second)['functions']['removed'] == [
+        db.SymbolChange('function', 'load', 'load', None, None), db.SymbolChange('function', 'save', 'save', None, None)]
+
+
+def test_diff_reads_runs_from_the_covering_index(db):
+    plan = db.get_connection().execute(
+        "EXPLAIN QUERY PLAN " + db._DIFF_FILES, (1, 2)).fetchall()
+    assert any('COVERING INDEX idx_symbols_diff' in row[-1] for row in plan)
@@ -0,0 +1,173 @@
+"""The route table follows include() chains, routers and blueprint/router prefixes, and re-parses only changed files."""
+import subprocess
+
+import pytest
+
+import cli
+import routes
+from incremental import IncrementalRun, state_file
+from routes import Route, RouteTable
+from tests.conftest import GitRepo
+
+PROJECT_FILES = {
+    'project/settings.py': "ROOT_URLCONF = 'project.urls'\n",
+    'project/urls.py': (
+        "from django.urls import include, path, re_path\n"
+        "from shop import urls as shop_urls\n"
+        "from api.urls import router\n"
+        "\n"
+        "urlpatterns = [\n"
+        "    path('shop/', include(shop_urls)),\n"
+        "    path('api/', include(router.urls)),\n"
+        "    re_path(r'^legacy/', include('shop.legacy_urls')),\n"
+        "    path('inline/', include([path('a/', views.a)])),\n"
+        "]\n"
+        "urlpatterns += [path('health/', views.health)]\n"
+        "if settings.DEBUG:\n"
+        "    urlpatterns.append(path('debug/', views.debug))\n"
+    ),
+    'shop/urls.py': (
+        "from django.urls import path\n"
+        "from . import views\n"
+        "extra = [path('extra/', views.extra)]\n"
+        "urlpatterns = [\n"
+        "    path('', views.ProductList.as_view(), name='list'),\n"
+        "    path('more/', include(extra)),\n"
+        "]\n"
+    ),
+    'shop/legacy_urls.py': "urlpatterns = [url(r'^old/(?P<pk>\\d+)/$', views.old)]\n",
+    'shop/views.py': "def extra(request):\n    pass\n",
+    'api/urls.py': (
+        "from rest_framework.routers import DefaultRouter\n"
+        "router = DefaultRouter()\n"
+        "router.register(r'products', ProductViewSet, basename='product')\n"
+    ),
+    'flaskapp/app.py': (
+        "from flask import Flask\n"
+        "from .views import bp\n"
+        "app = Flask(__name__)\n"
+        "app.register_blueprint(bp, url_prefix='/v2')\n"
+        "\n"
+        "@app.route(\"/\")\n"
+        "def index():\n"
+        "    pass\n"
+    ),
+    'flaskapp/views.py': (
+        "from flask import Blueprint\n"
+        "bp = Blueprint('items', __name__, url_prefix='/items')\n"
+        "\n"
+        "@bp.route('/<int:id>', methods=['GET', 'post'])\n"
+        "def item(id):\n"
+        "    pass\n"
+    ),
+    'fastapp/main.py': (
+        "from fastapi import FastAPI\n"
+        "from fastapp import users\n"
+        "app = FastAPI()\n"
+        "app.include_router(users.router, prefix='/v1')\n"
+    ),
+    'fastapp/users.py': (
+        "from fastapi import APIRouter\n"
+        "router = APIRouter(prefix='/users')\n"
+        "\n"
+        "@router.get('/{user_id}')\n"
+        "async def get_user(user_id: int):\n"
+        "    pass\n"
+    ),
+}
+
+EXPECTED = [
+    Route('shop/', (), 'views.ProductList.as_view', 'django', 'shop/urls.py', 5),
+    Route('shop/more/extra/', (), 'views.extra', 'django', 'shop/urls.py', 3),
+    Route('api/products/', (), 'ProductViewSet', 'drf', 'api/urls.py', 3),
+    Route('api/products/<pk>/', (), 'ProductViewSet', 'drf', 'api/urls.py', 3),
+    Route(r'^legacy/old/(?P<pk>\d+)/$', (), 'views.old', 'django', 'shop/legacy_urls.py', 1),
+    Route('inline/a/', (), 'views.a', 'django', 'project/urls.py', 9),
+    Route('health/', (), 'views.health', 'django', 'project/urls.py', 11),
+    Route('debug/', (), 'views.debug', 'django', 'project/urls.py', 13),
+]
+
+DECORATED = {
+    Route('/', ('GET',), 'index', 'flask', 'flaskapp/app.py', 6),
+    # register_blueprint's url_prefix replaces the blueprint's own
+    Route('/v2/<int:id>', ('GET', 'POST'), 'item', 'flask', 'flaskapp/views.py', 4),
+    # include_router's prefix goes in front of the router's own
+    Route('/v1/users/{user_id}', ('GET',), 'get_user', 'fastapi', 'fastapp/users.py', 4),
+}
+
+
+def table_of(files):
+    table = RouteTable()
+    for path, content in files.items():
+        table.update(path, content)
+    return table
+
+
+@pytest.fixture
+def project(tmp_path):
+    repo = GitRepo(tmp_path / 'project')
+    repo.commit(PROJECT_FILES, 'initial')
+    return repo
+
+
+def test_resolves_django_drf_flask_and_fastapi(project):
+    table = routes.build_route_table(project.path)
+    django = [route for route in table if route.framework in ('django', 'drf')]
+    assert django == EXPECTED
+    assert {route for route in table if route.framework in ('flask', 'fastapi')} == DECORATED
+    assert len(table) == len(EXPECTED) + len(DECORATED)
+
+
+def test_roots_without_root_urlconf_and_include_cycles():
+    files = {
+        'a/urls.py': "urlpatterns = [path('b/', include('b.urls')), path('x/', view)]\n",
+        'b/urls.py': "urlpatterns = [path('a/', include('a.urls')), path('y/', view)]\n",
+        'c/urls.py': "urlpatterns = [path('a/', include('a.urls'))]\n",
+    }
+    # c is the only module nothing includes; the a -> b -> a cycle stops where it repeats
+    assert table_of(files).paths() == ['a/b/y/', 'a/x/']
+
+
+def test_updates_reparse_only_the_changed_file(monkeypatch):
+    table = table_of(PROJECT_FILES)
+    assert len(table) == len(EXPECTED) + len(DECORATED)
+
+    parsed = []
+    collect = routes._parse_and_collect
+    monkeypatch.setattr(routes, '_parse_and_collect', lambda content, filename: parsed.append(filename) or
+                        collect(content, filename))
+    table.update('api/urls.py', PROJECT_FILES['api/urls.py'] + "router.register('orders', OrderViewSet)\n")
+    assert 'api/orders/<pk>/' in table.paths()
+    table.remove('shop/legacy_urls.py')
+    assert not any(path.startswith('^legacy') for path in table.paths())
+    # Files with nothing route-like are not parsed at all
+    table.update('shop/models.py', "class Product:\n    pass\n")
+    assert parsed == ['api/urls.py']
+
+
+def test_incremental_build_reuses_stored_facts(project, tmp_path):
+    path = state_file(str(tmp_path / 'state'), project.path, 'routes')
+    first = IncrementalRun(project.path, path, routes.ROUTES_VERSION)
+    routes.build_route_table(project.path, first)
+    first.save()
+
+    project.commit({'shop/urls.py': PROJECT_FILES['shop/urls.py'].replace("'more/'", "'other/'")})
+    second = IncrementalRun(project.path, path, routes.ROUTES_VERSION)
+    table = routes.build_route_table(project.path, second)
+    assert second.stats == {'reused': len(PROJECT_FILES) - 1, 'parsed': 1}
+    assert 'shop/other/extra/' in table.paths()
+    assert table.routes() == routes.build_route_table(project.path).routes()
+
+
+def test_git_objects_cli_and_report_endpoints(project, tmp_path, capsys):
+    bare = str(tmp_path / 'bare.git')
+    subprocess.run(['git', 'clone', '-q', '--bare', project.path, bare], check=True)
+    assert routes.local_route_table(bare).routes() == routes.build_route_table(project.path).routes()
+
+    assert cli.main(['routes', project.path]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == 'ANY      shop/  views.ProductList.as_view  (shop/urls.py:5)'
+    assert 'GET,POST /v2/<int:id>  item  (flaskapp/views.py:4)' in lines
+
+    assert routes.declared_patterns(PROJECT_FILES['project/urls.py']) == \
+        ['shop/', 'api/', '^legacy/', 'inline/', 'inline/a/', 'health/', 'debug/']
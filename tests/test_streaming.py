@@ -0,0 +1,48 @@
+"""Streaming tree and report output matches the list-based output byte for byte."""
+import pytest
+
+from benchmarks.mock_github import MockGitHubServer
+from benchmarks.synthetic_repo import generate_files
+
+import output_writer
+import repo_directory_structure
+import repo_reader
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with MockGitHubServer(generate_files(depth=2, dirs_per_level=2, files_per_dir=2)) as server:
+        monkeypatch.setattr(repo_reader, 'github_api_url', server.contents_url)
+        monkeypatch.setattr(repo_directory_structure, 'github_api_url', server.contents_url)
+        yield server
+
+
+@pytest.mark.parametrize('lines', [[], ['one'], ['a', '', 'b\n', 'c']])
+def test_write_lines_matches_join(tmp_path, lines):
+    path = tmp_path / 'out.txt'
+    output_writer.write_lines(iter(lines), str(path), buffer_size=2)
+    assert path.read_text(encoding='utf-8') == "\n".join(lines)
+
+
+def test_tree_lines_are_yielded_before_the_crawl_finishes(server):
+    lines = repo_directory_structure.iter_directory_structure_from_github(server.owner, server.repo)
+    next(lines)
+    assert server.request_count == 1
+    assert len(list(lines)) + 1 == len(repo_directory_structure.fetch_directory_structure_from_github(server.owner, server.repo))
+
+
+def test_streamed_report_file_matches_list_based_output(server, tmp_path):
+    owner, repo = server.owner, server.repo
+    expected_path, streamed_path = tmp_path / 'expected.txt', tmp_path / 'streamed.txt'
+
+    structure = repo_reader.fetch_directory_structure_from_github(owner, repo)
+    with open(expected_path, 'w', encoding='utf-8') as file:
+        file.write("\n".join(structure))
+        file.write("\n".join(repo_reader.generate_detailed_report(owner, repo, repo_reader.identify_important_files(structure), None)))
+
+    important_files = []
+    lines = repo_reader.iter_directory_structure_from_github(owner, repo)
+    repo_reader.write_directory_structure_to_file(repo_reader.track_important_files(lines, important_files), str(streamed_path))
+    repo_reader.append_details_to_output_file(repo_reader.iter_detailed_report(owner, repo, important_files, None), str(streamed_path))
+
+    assert streamed_path.read_text(encoding='utf-8') == expected_path.read_text(encoding='utf-8')
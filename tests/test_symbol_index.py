@@ -0,0 +1,91 @@
+"""The symbol index answers exact and prefix queries from a memory-mapped file built from analysis results."""
+import pytest
+
+import repository_db
+from symbol_index import SymbolIndex, SymbolIndexBuilder, build_index, build_index_from_database
+
+RESULTS = [
+    ('https://github.com/a/shop', {'classes': ['Product', 'Meta', 'Meta'], 'functions': ['index'],
+                                   'endpoints': ['api/v2/products/', 'api/v1/cart/']}),
+    ('https://github.com/b/blog', {'classes': ['Post', 'Meta'], 'endpoints': ['api/v2/posts/', 'api/v20/x/']}),
+    ('https://github.com/c/django', {'Models': ['Product'], 'Endpoints': ['api/v2/products/'], 'Others': []}),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / 'symbols.idx')
+    build_index(RESULTS, path)
+    with SymbolIndex(path) as index:
+        yield index
+
+
+def test_exact_lookup(index):
+    assert index.lookup('Product') == [
+        {'repository_url': 'https://github.com/a/shop', 'category': 'classes', 'kind': 'class', 'name': 'Product'},
+        {'repository_url': 'https://github.com/c/django', 'category': 'Models', 'kind': None, 'name': 'Product'},
+    ]
+    assert index.repositories_defining('Meta', kind='class') == ['https://github.com/a/shop', 'https://github.com/b/blog']
+    assert index.repositories_defining('Product', category='Models') == ['https://github.com/c/django']
+    assert index.lookup('Produc') == [] and index.lookup('zzz') == [] and index.lookup('') == []
+
+
+def test_prefix_search(index):
+    records = list(index.search_prefix('api/v2/', kind='endpoint'))
+    assert [(r['name'], r['repository_url']) for r in records] == [
+        ('api/v2/posts/', 'https://github.com/b/blog'),
+        ('api/v2/products/', 'https://github.com/a/shop'),
+        ('api/v2/products/', 'https://github.com/c/django'),
+    ]
+    assert index.names_with_prefix('api/v2') == ['api/v2/posts/', 'api/v2/products/', 'api/v20/x/']
+    assert index.names_with_prefix('api/', limit=2) == ['api/v1/cart/', 'api/v2/posts/']
+    assert len(list(index.search_prefix('', limit=3))) == 3
+    assert index.names_with_prefix('~') == []
+
+
+def test_strings_are_interned_and_sorted(index):
+    names = index.names_with_prefix('')
+    assert names == sorted(set(names))
+    assert len(index) == len(names) == 8
+    assert index.header['postings'] == 11
+    assert index.header['repositories'] == 3
+
+
+def test_unicode_names_sort_by_code_point(tmp_path):
+    path = str(tmp_path / 'unicode.idx')
+    build_index([('r', {'classes': ['Zebra', 'Ärger', 'apple', 'Été']})], path)
+    with SymbolIndex(path) as index:
+        assert index.names_with_prefix('') == ['Zebra', 'apple', 'Ärger', 'Été']
+        assert index.repositories_defining('Été') == ['r']
+
+
+def test_build_from_database_uses_latest_runs(tmp_path):
+    db_file = str(tmp_path / 'analysis.db')
+    path = str(tmp_path / 'db.idx')
+    try:
+        repository_db.store_analysis_run('https://github.com/a/shop', {'classes': ['Old']}, db_file=db_file)
+        repository_db.store_analysis_run('https://github.com/a/shop', {'classes': ['New']}, db_file=db_file)
+        build_index_from_database(path, db_file)
+        with SymbolIndex(path) as index:
+            assert index.lookup('Old') == []
+            assert index.repositories_defining('New', kind='class') == ['https://github.com/a/shop']
+        build_index_from_database(path, db_file, latest_only=False)
+        with SymbolIndex(path) as index:
+            assert index.names_with_prefix('') == ['New', 'Old']
+    finally:
+        repository_db.close_connections()
+
+
+def test_empty_and_invalid_files(tmp_path):
+    path = str(tmp_path / 'empty.idx')
+    SymbolIndexBuilder().write(path)
+    with SymbolIndex(path) as index:
+        assert len(index) == 0 and index.lookup('x') == [] and list(index.search_prefix('')) == []
+
+    bad = tmp_path / 'bad.idx'
+    bad.write_bytes(b'not an index at all')
+    with pytest.raises(ValueError):
+        SymbolIndex(str(bad))
+    (tmp_path / 'zero.idx').write_bytes(b'')
+    with pytest.raises(ValueError):
+        SymbolIndex(str(tmp_path / 'zero.idx'))
@@ -0,0 +1,73 @@
+"""Symbol tables store path, line, kind and qualified name compactly and still derive the dict-of-lists results."""
+import subprocess
+
+import main
+import repo_analyzer
+from symbol_table import Symbol, SymbolTable
+from tests.conftest import DJANGO_FILES
+
+
+def test_rows_views_and_derived_dict():
+    table = SymbolTable(['Models', 'Views', 'Others'])
+    table.add_file('shop/models.py', 'Models', [('class', 'Product', 'Product', 1), ('function', 'count', 'count', 5)])
+    table.add_file('shop/views.py', 'Views', [('function', 'index', 'index', 1)])
+    table.add('blog/models.py', 3, 'class', 'Product', 'Product', 'Models')
+
+    assert len(table) == 4
+    assert table[1] == Symbol('shop/models.py', 5, 'function', 'count', 'count', 'Models')
+    models = table.category('Models')
+    assert [s.path for s in models] == ['shop/models.py', 'shop/models.py', 'blog/models.py']
+    assert models[-1].line == 3 and models[:1] == [table[0]]
+    assert models.names() == ['Product', 'count', 'Product']
+    assert len(table.category('Others')) == 0 and len(table.category('Missing')) == 0
+    assert table.to_dict() == {'Models': ['Product', 'count', 'Product'], 'Views': ['index'], 'Others': []}
+
+    # Strings are stored once, and views share the table's row lists instead of copying them
+    assert table.values.count('Product') == 1 and table.values.count('shop/models.py') == 1
+    assert table.category('Models').rows is models.rows
+    assert table.nbytes() == 4 * 6 * 4 + 4 * 4
+
+
+def test_interning_keeps_equal_values_of_different_types_apart():
+    table = SymbolTable()
+    table.add_file('urls.py', 'Endpoints', [('endpoint', 1, 1, 1), ('endpoint', True, True, 2), ('endpoint', '1', '1', 3)])
+    assert table.to_dict() == {'Endpoints': [1, True, '1']}
+    assert [type(name) for name in table.to_dict()['Endpoints']] == [int, bool, str]
+
+
+def test_categorize_symbols_carries_locations(git_repo):
+    table = main.categorize_symbols(git_repo.path)
+    assert table.to_dict() == main.categorize_items(git_repo.path)
+    assert list(table.to_dict()) == list(main.empty_categories())
+
+    assert list(table.category('Models')) == [
+        Symbol('shop/models.py', 1, 'class', 'Product', 'Product', 'Models'),
+        Symbol('shop/models.py', 5, 'function', 'product_count', 'product_count', 'Models'),
+    ]
+    endpoints = table.category('Endpoints')
+    assert [(s.name, s.line, s.kind) for s in endpoints] == [('products/', 2, 'endpoint'), ('cart/', 3, 'endpoint')]
+
+
+def test_local_symbols_from_git_objects_match_checkout(git_repo, tmp_path):
+    bare = str(tmp_path / 'bare.git')
+    subprocess.run(['git', 'clone', '-q', '--bare', git_repo.path, bare], check=True)
+    key = lambda symbol: (symbol.path, symbol.line, symbol.name)
+    assert sorted(main.categorize_local_symbols(bare), key=key) == sorted(main.categorize_symbols(git_repo.path), key=key)
+    assert sorted(repo_analyzer.parse_local_symbols(bare), key=key) == sorted(repo_analyzer.parse_symbols(git_repo.path), key=key)
+
+
+def test_parse_symbols_matches_regex_output_with_lines(git_repo):
+    table = repo_analyzer.parse_symbols(git_repo.path)
+    expected = {'classes': [], 'functions': [], 'endpoints': []}
+    for path in sorted(DJANGO_FILES):
+        if path.endswith('.py'):
+            for key, names in repo_analyzer.parse_source(DJANGO_FILES[path]).items():
+                expected[key].extend(names)
+    assert {key: sorted(names) for key, names in table.to_dict().items()} == \
+        {key: sorted(names) for key, names in expected.items()}
+
+    symbols = {(s.path, s.name): s for s in table}
+    assert symbols['shop/views.py', 'ProductView'].line == 5
+    assert symbols['shop/tests.py', 'test_list'].line == 2
+    assert symbols['shop/api.py', '/api/products'] == Symbol('shop/api.py', 1, 'endpoint', '/api/products',
+                                                             '/api/products', 'endpoints')